@@ -2,19 +2,52 @@
 Compatibility wrapper so imports like ``import backend`` (and submodules such
 as ``backend.app.main``) continue to work even though the real package lives
 under ``cronoweath.backend``.
+
+Submodules are aliased lazily by a meta path finder: ``import backend`` alone
+imports nothing else, and ``backend.app.main`` resolves to the very same
+module object as ``cronoweath.backend.app.main`` only when first imported.
 """
+import importlib.abc
+import importlib.util
 import sys
 from importlib import import_module
 
-_backend_pkg = import_module("cronoweath.backend")
+_REAL = "cronoweath.backend"
+
+
+class _AliasLoader(importlib.abc.Loader):
+    def __init__(self, real_name):
+        self.real_name = real_name
+
+    def create_module(self, spec):
+        self._module = import_module(self.real_name)
+        self._real_spec = self._module.__spec__
+        return self._module
+
+    def exec_module(self, module):
+        # The import machinery stamped the alias spec on the shared module
+        module.__spec__ = self._real_spec
+
+
+class _AliasFinder(importlib.abc.MetaPathFinder):
+    """Resolve ``backend.<name>`` to ``cronoweath.backend.<name>``."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not fullname.startswith(__name__ + "."):
+            return None
+        real_name = _REAL + fullname[len(__name__):]
+        if importlib.util.find_spec(real_name) is None:
+            return None
+        return importlib.util.spec_from_loader(fullname, _AliasLoader(real_name))
+
+
+if not any(isinstance(finder, _AliasFinder) for finder in sys.meta_path):
+    sys.meta_path.insert(0, _AliasFinder())
 
-# Re-export public attributes at the package level so `import backend` works.
-__all__ = [name for name in dir(_backend_pkg) if not name.startswith("_")]
-for name in __all__:
-    globals()[name] = getattr(_backend_pkg, name)
 
-# Populate common submodules so `import backend.app.main` (and similar) resolve.
-for submodule in ("app", "app.main"):
-    full_name = f"cronoweath.backend.{submodule}"
-    proxied = import_module(full_name)
-    sys.modules[f"backend.{submodule}"] = proxied
+def __getattr__(name):
+    # ``backend.app`` without a prior ``import backend.app``
+    try:
+        return import_module(f"{__name__}.{name}")
+    except ImportError:
+        raise AttributeError(name) from None
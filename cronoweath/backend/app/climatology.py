@@ -0,0 +1,508 @@
+# backend/app/climatology.py
+"""Precomputed climatology index for popular locations.
+
+An offline builder fetches whole years of daily data for a list of
+locations (one engine call per calendar year, saving after each) and
+stores, per location and field, the values of every calendar slot
+(``MM-DD``, 366 slots) sorted ascending, with the year of each value
+alongside (CSR layout: ``offsets`` into ``values``/``years``).
+``/query`` then answers indexed locations without fetching anything:
+requests with a single check by binary search over the slots of the
+window, the others by rebuilding the window's rows from the index.
+
+Layout: ``<CLIMATOLOGY_DIR>/<engine>/<slug>.npz`` plus an ``index.json``
+manifest per engine. A request uses the index when its engine matches
+and its location falls in the same engine cell (``series_key``) as an
+indexed one, and the index covers every day of its window.
+
+Build and refresh (which fetches only from the last indexed year on, so
+it also resumes an interrupted build)::
+
+    python -m cronoweath.backend.app.climatology build cities.json --engine nasa --years 20
+    python -m cronoweath.backend.app.climatology refresh --engine nasa
+
+``cities.json`` is a list of ``{"name": ..., "lat": ..., "lon": ...}``.
+A year of NASA data is hundreds of granules, far more than the request
+path's ``NASA_DAP_TOTAL`` allows for, so the builder sets its own
+(``--dap-total``).
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .engines import Engine, get_engine
+from .evaluator import CONDITION_CHECKS, Check, condition_fields
+from .point_cache import window_days
+from .series import Series
+from .utils import now_iso, seasonal_windows
+
+SLOTS = 366
+CONDITIONS = tuple(CONDITION_CHECKS)
+# Every field a condition checks (a superset of the /query stats metrics)
+FIELDS = tuple(dict.fromkeys(field for condition in CONDITIONS for field in condition_fields(condition)))
+
+logger = logging.getLogger("cronoweath.climatology")
+
+# slot -> years of that slot the query needs
+Wanted = Dict[int, np.ndarray]
+
+
+def _is_leap(years: np.ndarray) -> np.ndarray:
+    return (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+
+
+def day_slots(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """``(year, slot)`` of each day; slots follow a leap year, so 02-29 is slot 59."""
+    years = days.astype("datetime64[Y]").astype(int) + 1970
+    doy = (days - days.astype("datetime64[Y]")).astype(int)
+    return years, doy + ((~_is_leap(years)) & (doy >= 59))
+
+
+def slot_days(years: np.ndarray, slots: np.ndarray) -> np.ndarray:
+    doy = slots - ((~_is_leap(years)) & (slots >= 60))
+    return (years - 1970).astype("datetime64[Y]").astype("datetime64[D]") + doy
+
+
+@dataclass
+class FieldSlots:
+    """Values of one field grouped by slot, ascending within each slot."""
+
+    offsets: np.ndarray  # (SLOTS + 1,)
+    values: np.ndarray
+    years: np.ndarray
+
+    @classmethod
+    def from_entries(cls, years: np.ndarray, slots: np.ndarray, values: np.ndarray) -> "FieldSlots":
+        keep = ~np.isnan(values)
+        years, slots, values = years[keep], slots[keep], values[keep]
+        order = np.lexsort((values, slots))
+        offsets = np.searchsorted(slots[order], np.arange(SLOTS + 1), side="left")
+        return cls(offsets.astype(np.int64), values[order], years[order].astype(np.int16))
+
+    def entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        slots = np.repeat(np.arange(SLOTS), np.diff(self.offsets))
+        return self.years.astype(int), slots, self.values
+
+    def segments(self, wanted: Wanted) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+        """Per wanted slot, its sorted values for the wanted years, and their years."""
+        for slot, years in wanted.items():
+            lo, hi = self.offsets[slot], self.offsets[slot + 1]
+            values, value_years = self.values[lo:hi], self.years[lo:hi]
+            if years[-1] - years[0] + 1 == years.size:
+                keep = (value_years >= years[0]) & (value_years <= years[-1])
+            else:  # e.g. 02-29, or 02-29 targets clamped to 02-28 in common years
+                keep = np.isin(value_years, years)
+            if keep.all():
+                yield values, value_years
+            else:
+                yield values[keep], value_years[keep]
+
+
+class ClimatologyIndex:
+    """Climatology of one location: ``FieldSlots`` per field plus its coverage."""
+
+    def __init__(self, meta: Dict[str, Any], fields: Dict[str, FieldSlots]) -> None:
+        self.meta = meta
+        self.fields = fields
+        self.first_day = np.datetime64(meta["first_day"], "D")
+        self.last_day = np.datetime64(meta["last_day"], "D")
+
+    @classmethod
+    def from_series(cls, meta: Dict[str, Any], series: Series) -> "ClimatologyIndex":
+        years, slots = day_slots(series.dates)
+        fields = {}
+        for name in FIELDS:
+            values = series.values(name)
+            if values is None:
+                values = np.full(len(series), np.nan)
+            fields[name] = FieldSlots.from_entries(years, slots, values)
+        meta = {
+            **meta,
+            "source": series.source,
+            "first_day": str(series.dates.min()),
+            "last_day": str(series.dates.max()),
+        }
+        return cls(meta, fields)
+
+    def merge(self, series: Series) -> "ClimatologyIndex":
+        """This index with the days of ``series`` added (replacing any it already had)."""
+        new_years, new_slots = day_slots(series.dates)
+        new_keys = new_years * SLOTS + new_slots
+        fields = {}
+        for name in FIELDS:
+            years, slots, values = self.fields[name].entries()
+            old = ~np.isin(years * SLOTS + slots, new_keys)
+            added = series.values(name)
+            if added is None:
+                added = np.full(len(series), np.nan)
+            fields[name] = FieldSlots.from_entries(
+                np.concatenate([years[old], new_years]),
+                np.concatenate([slots[old], new_slots]),
+                np.concatenate([values[old], added]),
+            )
+        meta = {
+            **self.meta,
+            # Composite engines: the index keeps one source only if all years share it
+            "source": self.meta.get("source") if self.meta.get("source") == series.source else None,
+            "first_day": str(min(self.first_day, series.dates.min())),
+            "last_day": str(max(self.last_day, series.dates.max())),
+        }
+        return ClimatologyIndex(meta, fields)
+
+    # -- encoding ------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        arrays: Dict[str, np.ndarray] = {"metadata": np.array(json.dumps(self.meta))}
+        for name, slots in self.fields.items():
+            arrays[f"{name}.offsets"] = slots.offsets
+            arrays[f"{name}.values"] = slots.values
+            arrays[f"{name}.years"] = slots.years
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ClimatologyIndex":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["metadata"]))
+            fields = {
+                name: FieldSlots(data[f"{name}.offsets"], data[f"{name}.values"], data[f"{name}.years"])
+                for name in FIELDS
+                if f"{name}.offsets" in data.files
+            }
+        return cls(meta, fields)
+
+    # -- queries -------------------------------------------------------------
+
+    def wanted(self, target_month: int, target_day: int, years: int, window: int) -> Optional[Wanted]:
+        """Slots and years of the query's window, or ``None`` when not fully covered."""
+        days = window_days(seasonal_windows(target_month, target_day, years, window))
+        if days.size == 0 or days[0] < self.first_day or days[-1] > self.last_day:
+            return None
+        day_years, slots = day_slots(days)
+        order = np.argsort(slots, kind="stable")
+        day_years, slots = day_years[order], slots[order]
+        bounds = np.flatnonzero(np.diff(slots)) + 1
+        return {
+            int(group_slots[0]): group_years
+            for group_slots, group_years in zip(np.split(slots, bounds), np.split(day_years, bounds))
+        }
+
+    def count(self, check: Check, wanted: Wanted) -> Tuple[int, int]:
+        """``(exceed_count, evaluated_days)`` for a single check, by binary search per slot."""
+        exceed = evaluated = 0
+        field = self.fields.get(check.field)
+        if field is None:
+            return 0, 0
+        for values, _ in field.segments(wanted):
+            evaluated += values.size
+            if check.op == ">=":
+                exceed += values.size - int(np.searchsorted(values, check.limit, side="left"))
+            else:
+                exceed += int(np.searchsorted(values, check.limit, side="right"))
+        return exceed, evaluated
+
+    def values(self, fields: Iterable[str], wanted: Wanted) -> np.ndarray:
+        """Every value of ``fields`` in the window (any order), missing ones excluded."""
+        parts = [
+            values
+            for name in fields
+            if name in self.fields
+            for values, _ in self.fields[name].segments(wanted)
+        ]
+        return np.concatenate(parts) if parts else np.array([], dtype=float)
+
+    def series(self, wanted: Wanted) -> Series:
+        """The window's rows (days with at least one value), as the engine would return them."""
+        columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name, field in self.fields.items():
+            days: List[np.ndarray] = []
+            values: List[np.ndarray] = []
+            for (slot, _), (segment, segment_years) in zip(wanted.items(), field.segments(wanted)):
+                days.append(slot_days(segment_years.astype(int), np.full(segment.size, slot)))
+                values.append(segment)
+            if days:
+                columns[name] = (np.concatenate(days), np.concatenate(values))
+        all_days = np.unique(np.concatenate([days for days, _ in columns.values()] or [np.array([], "datetime64[D]")]))
+        series = Series(all_days)
+        for name in FIELDS:
+            column = np.full(all_days.size, np.nan)
+            if name in columns:
+                days, values = columns[name]
+                column[np.searchsorted(all_days, days)] = values
+            series.set(name, column, present="finite")
+        return series
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+class ClimatologyStore:
+    """Index files of every engine under ``root``, loaded on demand (LRU)."""
+
+    def __init__(self, root: Path, max_loaded: int = 64) -> None:
+        self.root = Path(root)
+        self.max_loaded = max(1, max_loaded)
+        self._lock = threading.Lock()
+        self._manifests: Dict[str, Tuple[float, Dict[str, Dict[str, Any]]]] = {}
+        self._cells: Dict[Tuple[str, str], Dict[Any, str]] = {}
+        self._loaded: "OrderedDict[Tuple[str, str], ClimatologyIndex]" = OrderedDict()
+
+    def _manifest_path(self, engine: str) -> Path:
+        return self.root / engine / "index.json"
+
+    def manifest(self, engine: str) -> Dict[str, Dict[str, Any]]:
+        """``slug -> metadata`` of the engine's indexed locations (re-read when changed)."""
+        path = self._manifest_path(engine)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return {}
+        with self._lock:
+            cached = self._manifests.get(engine)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        entries = json.loads(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._manifests[engine] = (mtime, entries)
+            for key in [key for key in self._cells if key[0] == engine]:
+                del self._cells[key]
+            for key in [key for key in self._loaded if key[0] == engine]:
+                del self._loaded[key]
+        return entries
+
+    def find(self, engine: Engine, lat: float, lon: float, condition: str) -> Optional[ClimatologyIndex]:
+        """Index of the location in the same engine cell as ``(lat, lon)``, if any."""
+        entries = self.manifest(engine.name)
+        if not entries:
+            return None
+        with self._lock:
+            cells = self._cells.get((engine.name, condition))
+        if cells is None:
+            cells = {}
+            for slug, meta in entries.items():
+                cells.setdefault(engine.series_key(meta["lat"], meta["lon"], condition), slug)
+            with self._lock:
+                self._cells[(engine.name, condition)] = cells
+        slug = cells.get(engine.series_key(lat, lon, condition))
+        return None if slug is None else self.load(engine.name, slug)
+
+    def load(self, engine: str, slug: str) -> Optional[ClimatologyIndex]:
+        key = (engine, slug)
+        with self._lock:
+            index = self._loaded.get(key)
+            if index is not None:
+                self._loaded.move_to_end(key)
+                return index
+        path = self.root / engine / f"{slug}.npz"
+        if not path.exists():
+            return None
+        try:
+            index = ClimatologyIndex.from_file(path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Unreadable climatology index %s: %s", path, exc)
+            return None
+        with self._lock:
+            self._loaded[key] = index
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def save(self, engine: str, slug: str, index: ClimatologyIndex) -> None:
+        folder = self.root / engine
+        folder.mkdir(parents=True, exist_ok=True)
+        _write_atomic(folder / f"{slug}.npz", index.to_bytes())
+        path = self._manifest_path(engine)
+        entries = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        entries[slug] = index.meta
+        _write_atomic(path, json.dumps(entries, indent=1, sort_keys=True).encode("utf-8"))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+_STORE: Optional[ClimatologyStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_climatology() -> Optional[ClimatologyStore]:
+    """Store at ``CLIMATOLOGY_DIR``; ``None`` (index disabled) when it is not set."""
+    global _STORE
+    root = os.getenv("CLIMATOLOGY_DIR")
+    if not root:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None or _STORE.root != Path(root):
+            _STORE = ClimatologyStore(Path(root), int(os.getenv("CLIMATOLOGY_MAX_LOADED", "64")))
+        return _STORE
+
+
+# ---------------------------------------------------------------------------
+# Builder
+# ---------------------------------------------------------------------------
+
+
+def _year_spans(start: date, stop: date) -> List[Tuple[str, str]]:
+    """``start`` .. ``stop`` cut at calendar years, as inclusive ISO windows."""
+    return [
+        (max(start, date(year, 1, 1)).isoformat(), min(stop, date(year, 12, 31)).isoformat())
+        for year in range(start.year, stop.year + 1)
+    ]
+
+
+def _fetch_year(engine: Engine, lat: float, lon: float, span: Tuple[str, str]) -> Series:
+    """Days of ``span`` with data, every condition's fields."""
+    series = engine.fetch_windows(lat, lon, [span], CONDITIONS)
+    has_data = np.zeros(len(series), dtype=bool)
+    for name in FIELDS:
+        values = series.values(name)
+        if values is not None:
+            has_data |= ~np.isnan(values)
+    return series.take(has_data)
+
+
+def build_location(
+    store: ClimatologyStore,
+    engine: Engine,
+    name: str,
+    lat: float,
+    lon: float,
+    years: int,
+    refresh: bool = True,
+) -> Optional[ClimatologyIndex]:
+    """Build (or bring up to date) one location's index; ``None`` if nothing changed.
+
+    The index spans 07-01 of the first of the last ``years`` years to 07-01
+    this year, so it also holds the days that query windows around the
+    turn of the year reach into. With ``refresh`` an existing index only
+    fetches from 07-01 of the year before its last day on; the days fetched
+    again replace the indexed ones. The index is saved after every year.
+    """
+    end_year = date.today().year - 1
+    stop = date(end_year + 1, 7, 1)
+    slug = slugify(name) or f"{lat:.4f}_{lon:.4f}"
+    index = store.load(engine.name, slug) if refresh else None
+    if index is not None:
+        if index.last_day >= np.datetime64(stop):
+            return None
+        start = date(int(str(index.last_day)[:4]) - 1, 7, 1)
+    else:
+        start = date(end_year - years, 7, 1)
+
+    changed = False
+    for span in _year_spans(start, stop):
+        series = _fetch_year(engine, lat, lon, span)
+        if not len(series):
+            continue
+        if index is None:
+            meta = {"name": name, "lat": lat, "lon": lon, "engine": engine.name}
+            index = ClimatologyIndex.from_series(meta, series)
+        else:
+            index = index.merge(series)
+        index.meta["built_at"] = now_iso()
+        store.save(engine.name, slug, index)
+        changed = True
+        logger.info("%s: indexed %s .. %s", name, span[0], span[1])
+    if index is None:
+        raise RuntimeError("the engine returned no data")
+    return index if changed else None
+
+
+def _load_locations(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as fh:
+        locations = json.load(fh)
+    for item in locations:
+        if not {"name", "lat", "lon"} <= set(item):
+            raise ValueError(f"location needs name, lat and lon: {item!r}")
+    return locations
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="climatology", description="Build the climatology index")
+    parser.add_argument("command", choices=("build", "refresh"))
+    parser.add_argument("locations", nargs="?", help="JSON list of {name, lat, lon} (build)")
+    parser.add_argument("--engine", default=os.getenv("CRONOWEATH_ENGINE", "nasa").lower())
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--dir", default=os.getenv("CLIMATOLOGY_DIR"))
+    parser.add_argument("--full", action="store_true", help="rebuild instead of adding new years")
+    parser.add_argument(
+        "--dap-total",
+        type=float,
+        default=900.0,
+        help="seconds allowed per NASA granule batch (one year), instead of NASA_DAP_TOTAL",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # Read per batch by the NASA engine; the request path's value is far too short here
+    os.environ["NASA_DAP_TOTAL"] = str(args.dap_total)
+
+    if not args.dir:
+        parser.error("--dir or CLIMATOLOGY_DIR is required")
+    store = ClimatologyStore(Path(args.dir))
+    engine = get_engine(args.engine)
+    if args.command == "build":
+        if not args.locations:
+            parser.error("build needs a locations file")
+        locations = _load_locations(args.locations)
+    else:
+        locations = list(store.manifest(engine.name).values())
+
+    failed = 0
+    for item in locations:
+        try:
+            index = build_location(
+                store, engine, item["name"], float(item["lat"]), float(item["lon"]), args.years, not args.full
+            )
+        except Exception as exc:  # pragma: no cover - depends on external services
+            failed += 1
+            logger.error("%s: %s", item["name"], exc)
+            continue
+        if index is None:
+            logger.info("%s: up to date", item["name"])
+        else:
+            logger.info("%s: %s .. %s", item["name"], index.meta["first_day"], index.meta["last_day"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
+
+
+__all__ = [
+    "ClimatologyIndex",
+    "ClimatologyStore",
+    "FIELDS",
+    "FieldSlots",
+    "build_location",
+    "day_slots",
+    "get_climatology",
+    "slot_days",
+]
@@ -0,0 +1,253 @@
+# backend/app/engines.py
+"""Data engine registry.
+
+Engines are registered by name with their module path and dataset hints,
+and imported on first use only: a process serving the mock engine never
+imports xarray/earthaccess/pydap, and a NASA process pays for them on its
+first query instead of at startup. ``CRONOWEATH_ENGINE`` sets the default
+engine, ``CRONOWEATH_ENGINE_BY_CONDITION`` (e.g. ``wet=nasa,hot=meteomatics``)
+overrides it per condition, and requests may name one explicitly. The
+``hybrid`` engine (``hybrid_engine.py``) composes the others with hedging.
+
+Everything else about an engine is duck-typed on its module, as before:
+``Engine`` forwards attribute access to it, and ``capabilities`` lists the
+optional entry points it provides.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .series import Series
+
+logger = logging.getLogger("cronoweath.engines")
+
+# Optional entry points -> capability name
+_CAPABILITIES = {
+    "assemble_series_real": "remote",
+    "iter_series_real": "progress",
+    "assemble_series_real_async": "async",
+    "assemble_series_points": "points",
+    "assemble_grid": "grid",
+    "assemble_windows": "windows",
+    "close_clients": "clients",
+}
+
+ConditionArg = Union[None, str, Sequence[str]]
+
+
+class UnknownEngine(ValueError):
+    pass
+
+
+class Engine:
+    """One registered engine; its module is imported on first attribute access."""
+
+    def __init__(self, name: str, module: str, datasets: Dict[str, List[str]], remote: bool) -> None:
+        self.name = name
+        self.module_name = module
+        self.datasets = datasets
+        # Remote engines answer /query asynchronously by default (edge timeouts)
+        self.remote = remote
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Engine({self.name!r}, loaded={self.loaded})"
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    @property
+    def module(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    logger.info("Loading engine %s (%s)", self.name, self.module_name)
+                    self._module = importlib.import_module(self.module_name, __package__)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only reached for names not set in __init__ (the engine's functions)
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.module, attr)
+
+    @property
+    def capabilities(self) -> List[str]:
+        return [name for attr, name in _CAPABILITIES.items() if hasattr(self.module, attr)]
+
+    def dataset_hints(self, condition: str) -> List[str]:
+        return list(self.datasets.get(condition, []))
+
+    def fetch_series(
+        self,
+        lat: float,
+        lon: float,
+        target_month: int,
+        target_day: int,
+        years: int,
+        window: int,
+        condition: ConditionArg = None,
+    ) -> Series:
+        """Daily series around the target day; ``condition`` may be a tuple (union of variables)."""
+        module = self.module
+        if hasattr(module, "assemble_series_real"):
+            return module.assemble_series_real(
+                lat, lon, target_month, target_day, years=years, window=window, condition=condition
+            )
+        return module.assemble_series(target_month, target_day, years=years, window=window)
+
+    def fetch_windows(
+        self,
+        lat: float,
+        lon: float,
+        windows: List[Tuple[str, str]],
+        condition: ConditionArg = None,
+    ) -> Series:
+        """Daily series of explicit inclusive ISO windows (the ``windows`` capability)."""
+        if not hasattr(self.module, "assemble_windows"):
+            raise NotImplementedError(f"engine {self.name} cannot fetch explicit windows")
+        return self.module.assemble_windows(lat, lon, windows, condition=condition)
+
+    def iter_series(
+        self,
+        lat: float,
+        lon: float,
+        target_month: int,
+        target_day: int,
+        years: int,
+        window: int,
+        condition: ConditionArg = None,
+    ) -> Iterator[Tuple[Series, int, int]]:
+        """``(series so far, chunks done, chunks total)``; a single step without ``progress``."""
+        if hasattr(self.module, "iter_series_real"):
+            yield from self.module.iter_series_real(
+                lat, lon, target_month, target_day, years=years, window=window, condition=condition
+            )
+            return
+        yield self.fetch_series(lat, lon, target_month, target_day, years, window, condition), 1, 1
+
+
+_SYNTHETIC = ["Synthetic dataset"]
+_METEOMATICS = ["Meteomatics API"]
+
+ENGINES: Dict[str, Engine] = {
+    "mock": Engine(
+        "mock",
+        ".mock_engine",
+        {name: _SYNTHETIC for name in ("hot", "cold", "windy", "wet", "muggy")},
+        remote=False,
+    ),
+    "nasa": Engine(
+        "nasa",
+        ".nasa_engine",
+        {
+            "hot": ["MERRA-2"],
+            "cold": ["MERRA-2"],
+            "windy": ["MERRA-2"],
+            "wet": ["GPM IMERG"],
+            "muggy": ["MERRA-2"],
+        },
+        remote=True,
+    ),
+    "meteomatics": Engine(
+        "meteomatics",
+        ".meteomatics_engine",
+        {name: _METEOMATICS for name in ("hot", "cold", "windy", "wet", "muggy")},
+        remote=True,
+    ),
+}
+
+
+def hybrid_sources() -> List[str]:
+    """``HYBRID_ENGINES``: engines tried by ``hybrid``, in order (default ``nasa,meteomatics``)."""
+    names = [name.strip().lower() for name in os.getenv("HYBRID_ENGINES", "nasa,meteomatics").split(",")]
+    return [name for name in dict.fromkeys(names) if name in ENGINES and name != "hybrid"]
+
+
+ENGINES["hybrid"] = Engine(
+    "hybrid",
+    ".hybrid_engine",
+    # Whichever source answered is reported instead (``Series.source``)
+    {
+        condition: [hint for name in hybrid_sources() for hint in ENGINES[name].datasets.get(condition, [])]
+        for condition in ("hot", "cold", "windy", "wet", "muggy")
+    },
+    remote=True,
+)
+
+
+def _default_name() -> str:
+    name = os.getenv("CRONOWEATH_ENGINE", "mock").lower()
+    return name if name in ENGINES else "mock"
+
+
+def _by_condition() -> Dict[str, str]:
+    """``CRONOWEATH_ENGINE_BY_CONDITION``: ``condition=engine`` pairs, comma separated."""
+    mapping: Dict[str, str] = {}
+    for item in os.getenv("CRONOWEATH_ENGINE_BY_CONDITION", "").split(","):
+        condition, _, name = item.partition("=")
+        condition, name = condition.strip(), name.strip().lower()
+        if not condition or not name:
+            continue
+        if name not in ENGINES:
+            logger.warning("Ignoring unknown engine %r for condition %r", name, condition)
+            continue
+        mapping[condition] = name
+    return mapping
+
+
+DEFAULT_ENGINE = _default_name()
+ENGINE_BY_CONDITION = _by_condition()
+
+
+def get_engine(name: str) -> Engine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise UnknownEngine(f"Unknown engine {name!r}") from None
+
+
+def engine_for(condition: ConditionArg = None, name: Optional[str] = None) -> Engine:
+    """Explicit ``name``, else the engine configured for the condition(s), else the default.
+
+    Several conditions use a per-condition engine only when they all agree on it.
+    """
+    if name:
+        return get_engine(name)
+    conditions = [condition] if isinstance(condition, str) else list(condition or ())
+    chosen = {ENGINE_BY_CONDITION.get(item, DEFAULT_ENGINE) for item in conditions}
+    return ENGINES[chosen.pop() if len(chosen) == 1 else DEFAULT_ENGINE]
+
+
+def loaded_engines() -> List[Engine]:
+    return [engine for engine in ENGINES.values() if engine.loaded]
+
+
+def engines_info() -> Dict[str, Any]:
+    """Registry state for ``/health``; capabilities only of engines already imported."""
+    return {
+        "default": DEFAULT_ENGINE,
+        "by_condition": dict(ENGINE_BY_CONDITION),
+        "loaded": {engine.name: engine.capabilities for engine in loaded_engines()},
+    }
+
+
+__all__ = [
+    "DEFAULT_ENGINE",
+    "ENGINES",
+    "ENGINE_BY_CONDITION",
+    "Engine",
+    "UnknownEngine",
+    "engine_for",
+    "engines_info",
+    "get_engine",
+    "hybrid_sources",
+    "loaded_engines",
+]
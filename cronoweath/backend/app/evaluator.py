@@ -0,0 +1,186 @@
+# backend/app/evaluator.py
+"""Declarative threshold evaluator over column arrays.
+
+Each condition's thresholds (from thresholds.json, possibly overridden per
+request) compile into comparison ops ``(field, operator, limit)``. They are
+applied as boolean masks over whole columns and combined with ANY/ALL.
+Semantics match the former per-row evaluator exactly: a check applies to a
+row only when its limit is set and the row has a value for the field; rows
+where no check applies are not "considered" and have no exceed flag.
+"""
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .series import Series
+
+# condition -> ((threshold key, field, operator), ...)
+CONDITION_CHECKS: Dict[str, Tuple[Tuple[str, str, str], ...]] = {
+    "hot": (("T_min", "t2m_max", ">="), ("HI_min", "hi_max", ">=")),
+    "cold": (("T_max", "t2m_min", "<="), ("WC_max", "wc_min", "<=")),
+    "windy": (("V_min", "wind_speed_max", ">="), ("gust_min", "wind_gust_p95", ">=")),
+    "wet": (("P_daily", "precip_daily", ">="), ("P_rate", "precip_rate_max", ">=")),
+    "muggy": (("HI_min", "hi_max", ">="), ("Td_min", "dewpoint_max", ">=")),
+}
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
+class Check(NamedTuple):
+    key: str
+    field: str
+    op: str
+    limit: float
+
+
+@dataclass
+class Evaluation:
+    exceed: np.ndarray
+    considered: np.ndarray
+
+    @property
+    def exceed_count(self) -> int:
+        return int(np.count_nonzero(self.exceed))
+
+    @property
+    def evaluated_days(self) -> int:
+        return int(np.count_nonzero(self.considered))
+
+    def flags(self) -> np.ndarray:
+        """Per-row exceed as 1.0/0.0, NaN where the row was not considered."""
+        return np.where(self.considered, self.exceed.astype(float), np.nan)
+
+
+def compile_checks(condition: str, thresholds: Mapping[str, Any]) -> List[Check]:
+    """Comparison ops for ``condition``; thresholds set to ``None`` are skipped."""
+    checks: List[Check] = []
+    for key, field, op in CONDITION_CHECKS.get(condition, ()):
+        limit = thresholds.get(key)
+        if limit is not None:
+            checks.append(Check(key, field, op, float(limit)))
+    return checks
+
+
+def condition_fields(condition: str) -> List[str]:
+    return [field for _, field, _ in CONDITION_CHECKS.get(condition, ())]
+
+
+def evaluate_columns(
+    columns: Mapping[str, Optional[np.ndarray]],
+    checks: Sequence[Check],
+    logic: str,
+    shape: Tuple[int, ...],
+) -> Evaluation:
+    """Evaluate ``checks`` over arrays of any (common) shape, NaN = missing."""
+    applicable = np.zeros(shape, dtype=bool)
+    passed = np.zeros(shape, dtype=bool)
+    failed = np.zeros(shape, dtype=bool)
+    for check in checks:
+        values = columns.get(check.field)
+        if values is None:
+            continue
+        has = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            ok = has & OPERATORS[check.op](values, check.limit)
+        applicable |= has
+        passed |= ok
+        failed |= has & ~ok
+    exceed = applicable & (passed if logic == "ANY" else ~failed)
+    return Evaluation(exceed=exceed, considered=applicable)
+
+
+def evaluate(series: Series, checks: Sequence[Check], logic: str) -> Evaluation:
+    columns = {check.field: series.values(check.field) for check in checks}
+    return evaluate_columns(columns, checks, logic, (len(series),))
+
+
+def count_batch(
+    series: Series,
+    condition: str,
+    thresholds_list: Sequence[Mapping[str, Any]],
+    logics: Sequence[str],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``(exceed_count, evaluated_days)`` per request, for many requests on one series.
+
+    Requests that set the same thresholds (same keys non-null) and logic are
+    evaluated together: their limits are stacked into a column and compared
+    against the field values in one broadcast, giving a (requests, days) mask.
+    """
+    exceed_counts = np.zeros(len(thresholds_list), dtype=int)
+    evaluated = np.zeros(len(thresholds_list), dtype=int)
+    groups: Dict[Tuple[str, Tuple[str, ...]], List[int]] = {}
+    for idx, (thresholds, logic) in enumerate(zip(thresholds_list, logics)):
+        keys = tuple(
+            key for key, _, _ in CONDITION_CHECKS.get(condition, ()) if thresholds.get(key) is not None
+        )
+        groups.setdefault((logic, keys), []).append(idx)
+
+    for (logic, keys), members in groups.items():
+        specs = [spec for spec in CONDITION_CHECKS.get(condition, ()) if spec[0] in keys]
+        checks = [
+            Check(key, field, op, np.array([float(thresholds_list[i][key]) for i in members])[:, None])
+            for key, field, op in specs
+        ]
+        columns: Dict[str, Optional[np.ndarray]] = {}
+        for check in checks:
+            values = series.values(check.field)
+            columns[check.field] = None if values is None else values[None, :]
+        result = evaluate_columns(columns, checks, logic, (len(members), len(series)))
+        exceed_counts[members] = np.count_nonzero(result.exceed, axis=1)
+        evaluated[members] = np.count_nonzero(result.considered, axis=1)
+    return exceed_counts, evaluated
+
+
+def exceedance_curve(
+    series: Series,
+    checks: Sequence[Check],
+    sweep: Check,
+    logic: str,
+    limits: np.ndarray,
+) -> Tuple[np.ndarray, int]:
+    """Exceed counts for every limit of ``sweep``, other ``checks`` held fixed.
+
+    Which rows are considered does not depend on the swept limit, so rows
+    split into those exceeding (or not) whatever the limit is and those
+    decided by the swept field alone. The latter are sorted once and each
+    limit is counted with ``searchsorted``. Returns ``(counts, evaluated_days)``.
+    """
+    fixed = evaluate(series, [check for check in checks if check.key != sweep.key], logic)
+    values = series.values(sweep.field)
+    if values is None:
+        values = np.full(len(series), np.nan)
+    has = ~np.isnan(values)
+    if logic == "ANY":
+        always = fixed.exceed
+        sweepable = has & ~fixed.exceed
+    else:
+        always = fixed.exceed & ~has
+        sweepable = has & ~(fixed.considered & ~fixed.exceed)
+    ordered = np.sort(values[sweepable])
+    limits = np.asarray(limits, dtype=float)
+    if sweep.op == ">=":
+        passing = ordered.size - np.searchsorted(ordered, limits, side="left")
+    else:
+        passing = np.searchsorted(ordered, limits, side="right")
+    counts = int(np.count_nonzero(always)) + passing
+    return counts, int(np.count_nonzero(fixed.considered | has))
+
+
+__all__ = [
+    "CONDITION_CHECKS",
+    "Check",
+    "Evaluation",
+    "compile_checks",
+    "condition_fields",
+    "count_batch",
+    "evaluate",
+    "evaluate_columns",
+    "exceedance_curve",
+]
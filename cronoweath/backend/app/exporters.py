@@ -0,0 +1,290 @@
+# backend/app/exporters.py
+"""Chunked, generator-based exporters for ``/download``.
+
+Every exporter walks the series ``CHUNK_ROWS`` rows at a time and yields
+encoded bytes, so peak memory per download depends on the chunk size and
+not on how many years were requested. Columns come from the series
+itself: the historical CSV columns first (in their historical order),
+followed by any other field the engine produced (``rh_max``,
+``dewpoint_max``, per-condition ``exceed_*`` flags...).
+
+The binary formats (Arrow IPC stream, Parquet, NumPy ``.npz``) carry only
+the columns present, with missing values as nulls (NaN in ``.npz``), and
+put the query metadata (thresholds, location, generated_at, ...) in the
+file's schema metadata as JSON values instead of ``#`` comment lines.
+Arrow and Parquet need the optional ``pyarrow`` package.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .series import Series
+
+if TYPE_CHECKING:  # optional: Arrow IPC / Parquet exports, imported on first use
+    import pyarrow as pa
+
+CHUNK_ROWS = 2048
+
+CSV_COLUMNS = (
+    "t2m_max",
+    "hi_max",
+    "t2m_min",
+    "wc_min",
+    "wind_speed_max",
+    "wind_gust_p95",
+    "precip_daily",
+    "precip_rate_max",
+    "exceed",
+)
+
+
+def csv_columns(series: Series) -> List[str]:
+    """Historical columns (always, empty when absent) plus every other field present."""
+    return [*CSV_COLUMNS, *(name for name in series.fields if name not in CSV_COLUMNS)]
+
+
+def _chunks(series: Series, chunk_rows: int) -> Iterator[Series]:
+    for start in range(0, len(series), chunk_rows):
+        yield series.take(slice(start, start + chunk_rows))
+
+
+def _json(value: Any) -> str:
+    # Same encoding as Starlette's JSONResponse
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def iter_csv(
+    meta: Dict[str, Any],
+    series: Series,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """``# key: value`` metadata lines, a header row, then the rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    for key, value in meta.items():
+        buffer.write(f"# {key}: {value}\n")
+    columns = csv_columns(series)
+    writer.writerow(["date", *columns])
+    yield _drain()
+    for part in _chunks(series, chunk_rows):
+        writer.writerows(part.iter_records(columns))
+        yield _drain()
+
+
+def iter_ndjson(
+    header: Optional[Dict[str, Any]],
+    series: Optional[Series],
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """One JSON document per line: ``header`` (if any), then one per row."""
+    if header is not None:
+        yield (_json(header) + "\n").encode("utf-8")
+    if series is None:
+        return
+    for part in _chunks(series, chunk_rows):
+        yield "".join(_json(row) + "\n" for row in part.to_rows()).encode("utf-8")
+
+
+def iter_json(
+    document: Dict[str, Any],
+    series: Optional[Series],
+    key: str = "timeseries",
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """``document`` as one JSON object whose ``key`` holds the streamed rows."""
+    if series is None:
+        yield _json(document).encode("utf-8")
+        return
+    head = _json({k: v for k, v in document.items() if k != key})
+    opener = "{" if head == "{}" else head[:-1] + ","
+    yield f"{opener}{_json(key)}:[".encode("utf-8")
+    first = True
+    for part in _chunks(series, chunk_rows):
+        rows = ",".join(_json(row) for row in part.to_rows())
+        if rows:
+            yield (rows if first else "," + rows).encode("utf-8")
+            first = False
+    yield b"]}"
+
+
+# ---------------------------------------------------------------------------
+# Binary columnar formats
+# ---------------------------------------------------------------------------
+
+ARROW_CHUNK_ROWS = 65536
+
+
+class ExportUnavailable(RuntimeError):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every batch."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        return len(chunk)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def binary_columns(series: Series) -> List[str]:
+    return [name for name in csv_columns(series) if name in series]
+
+
+def _metadata(meta: Dict[str, Any]) -> Dict[str, str]:
+    return {key: _json(value) for key, value in meta.items()}
+
+
+def _require_pyarrow() -> None:
+    # Imported here rather than at module level: loading pyarrow adds
+    # tens of milliseconds to every cold start, and only these formats need it
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ExportUnavailable("Arrow/Parquet export requires the 'pyarrow' package") from None
+
+
+def _arrow_schema(series: Series, meta: Dict[str, Any]) -> "pa.Schema":
+    import pyarrow as pa
+
+    fields = [pa.field("date", pa.date32(), nullable=False)]
+    for name in binary_columns(series):
+        fields.append(pa.field(name, pa.bool_() if name in series.flags else pa.float64()))
+    return pa.schema(fields, metadata=_metadata(meta))
+
+
+def _arrow_batch(part: Series, schema: "pa.Schema") -> "pa.RecordBatch":
+    import pyarrow as pa
+
+    arrays = [pa.array(part.dates, type=pa.date32())]
+    for field in schema:
+        if field.name == "date":
+            continue
+        values = part.values(field.name)
+        missing = np.isnan(values)
+        if part.flags and field.name in part.flags:
+            arrays.append(pa.array(values == 1.0, type=pa.bool_(), mask=missing))
+        else:
+            arrays.append(pa.array(values, type=pa.float64(), mask=missing))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_arrow(
+    meta: Dict[str, Any],
+    series: Series,
+    chunk_rows: int = ARROW_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per chunk.
+
+    Raises ``ExportUnavailable`` right away (not on first iteration).
+    """
+    _require_pyarrow()
+    return _arrow_stream(_arrow_schema(series, meta), series, chunk_rows)
+
+
+def _arrow_stream(schema: "pa.Schema", series: Series, chunk_rows: int) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    sink = _Sink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for part in _chunks(series, chunk_rows):
+            writer.write_batch(_arrow_batch(part, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(
+    meta: Dict[str, Any],
+    series: Series,
+    chunk_rows: int = ARROW_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Parquet file, one row group per chunk (raises like ``iter_arrow``)."""
+    _require_pyarrow()
+    return _parquet_stream(_arrow_schema(series, meta), series, chunk_rows)
+
+
+def _parquet_stream(schema: "pa.Schema", series: Series, chunk_rows: int) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+
+    sink = _Sink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for part in _chunks(series, chunk_rows):
+            writer.write_batch(_arrow_batch(part, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def npz_bytes(meta: Dict[str, Any], series: Series) -> bytes:
+    """Compressed ``.npz``: ``date`` (datetime64[D]), one float64 array per column
+    (NaN when missing; flags as 1.0/0.0) and ``metadata`` (a JSON string)."""
+    arrays: Dict[str, np.ndarray] = {"date": series.dates}
+    for name in binary_columns(series):
+        arrays[name] = series.values(name)
+    arrays["metadata"] = np.array(_json(meta))
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    if not accept_encoding:
+        return False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into one gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+__all__ = [
+    "CHUNK_ROWS",
+    "CSV_COLUMNS",
+    "ExportUnavailable",
+    "accepts_gzip",
+    "binary_columns",
+    "csv_columns",
+    "gzip_chunks",
+    "iter_arrow",
+    "iter_csv",
+    "iter_json",
+    "iter_ndjson",
+    "iter_parquet",
+    "npz_bytes",
+]
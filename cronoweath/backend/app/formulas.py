@@ -2,12 +2,18 @@
 """Common meteorological formulas used across data engines.
 
 All functions accept/return SI units (temperature in Celsius, wind in km/h,
-relative humidity in percentage) unless otherwise noted.
+relative humidity in percentage) unless otherwise noted. The ``*_array``
+variants take NumPy arrays (NaN for missing values) and return NaN where the
+scalar version returns ``None``; results match the scalar versions exactly.
 """
 from __future__ import annotations
 
 import math
-from typing import Optional
+from typing import Any, Optional
+
+import numpy as np
+
+from .utils import round_exact
 
 
 def c_to_f(temp_c: float) -> float:
@@ -86,8 +92,75 @@ def compute_dew_point(temp_c: Optional[float], rh_pct: Optional[float]) -> Optio
     return round(td, 2)
 
 
+# ---------------------------------------------------------------------------
+# Array versions
+# ---------------------------------------------------------------------------
+
+def _as_float_arrays(*values: Any) -> tuple:
+    return np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in values))
+
+
+def heat_index_array(temp_c: Any, rh_pct: Any) -> np.ndarray:
+    """Array version of :func:`compute_heat_index`."""
+    temp_c, rh_pct = _as_float_arrays(temp_c, rh_pct)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid = ~np.isnan(temp_c) & (rh_pct > 0)
+        t = c_to_f(temp_c)
+        r = rh_pct
+        hi_f = (
+            -42.379
+            + 2.04901523 * t
+            + 10.14333127 * r
+            - 0.22475541 * t * r
+            - 0.00683783 * t * t
+            - 0.05481717 * r * r
+            + 0.00122874 * t * t * r
+            + 0.00085282 * t * r * r
+            - 0.00000199 * t * t * r * r
+        )
+        dry = (r < 13) & (80 <= t) & (t <= 112)
+        humid = ~dry & (r > 85) & (80 <= t) & (t <= 87)
+        hi_f = np.where(dry, hi_f - ((13 - r) / 4) * np.sqrt((17 - np.abs(t - 95)) / 17), hi_f)
+        hi_f = np.where(humid, hi_f + ((r - 85) / 10) * ((87 - t) / 5), hi_f)
+        hi_c = f_to_c(hi_f)
+        raw = np.where((t < 80) | (r < 40), temp_c, np.where(hi_c >= temp_c, hi_c, temp_c))
+        raw = np.where(valid, raw, np.nan)
+    return round_exact(raw, 2)
+
+
+def wind_chill_array(temp_c: Any, wind_kmh: Any) -> np.ndarray:
+    """Array version of :func:`compute_wind_chill`."""
+    temp_c, wind_kmh = _as_float_arrays(temp_c, wind_kmh)
+    with np.errstate(invalid="ignore"):
+        valid = ~np.isnan(temp_c) & ~np.isnan(wind_kmh)
+        t_f = c_to_f(temp_c)
+        v_mph = kmh_to_mph(wind_kmh)
+        wc_f = 35.74 + 0.6215 * t_f - 35.75 * (v_mph ** 0.16) + 0.4275 * t_f * (v_mph ** 0.16)
+        wc_c = f_to_c(wc_f)
+        raw = np.where((temp_c > 10) | (wind_kmh < 4.8), temp_c, wc_c)
+        raw = np.where(valid, raw, np.nan)
+    return round_exact(raw, 2)
+
+
+def dew_point_array(temp_c: Any, rh_pct: Any) -> np.ndarray:
+    """Array version of :func:`compute_dew_point`."""
+    temp_c, rh_pct = _as_float_arrays(temp_c, rh_pct)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid = ~np.isnan(temp_c) & (rh_pct > 0)
+        rh_frac = rh_pct / 100.0
+        valid &= rh_frac > 0
+        a, b = 17.27, 237.7
+        gamma = (a * temp_c) / (b + temp_c) + np.log(np.where(valid, rh_frac, 1.0))
+        td = (b * gamma) / (a - gamma)
+        raw = np.where(valid, td, np.nan)
+    return round_exact(raw, 2)
+
+
 __all__ = [
     "compute_heat_index",
     "compute_wind_chill",
     "compute_dew_point",
+    "heat_index_array",
+    "wind_chill_array",
+    "dew_point_array",
 ]
@@ -0,0 +1,181 @@
+# backend/app/hybrid_engine.py
+"""Composite engine: first complete series among several engines, hedged.
+
+The engines listed in ``HYBRID_ENGINES`` (default ``nasa,meteomatics``;
+``meteomatics,nasa`` for the other way round) are tried in order. The
+first one starts right away; when it has not answered within
+``HYBRID_HEDGE_AFTER`` seconds the next one is started as well (and so on),
+and a source that fails hands over to the next immediately. The first
+complete series wins and is tagged with its engine in ``Series.source``,
+so the API reports the dataset actually used.
+
+Each source runs on its own pool of ``HYBRID_WORKERS`` threads, so a
+stuck source cannot starve the others. Once a winner is in, the losing
+fetches are signalled (``progress.cancellable``) and stop at their next
+step, e.g. the next NASA granule. A source whose threads are all busy is
+not hedged onto; it is only used when nothing else is running.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from . import progress
+from .engines import Engine, get_engine, hybrid_sources
+from .jobs import JobCancelled
+from .series import Series
+
+HEDGE_AFTER_S = float(os.getenv("HYBRID_HEDGE_AFTER", "8"))
+WORKERS = max(1, int(os.getenv("HYBRID_WORKERS", "8")))
+
+logger = logging.getLogger("cronoweath.hybrid")
+
+
+class _SourcePool:
+    """Threads of one source, and how many fetches it has in flight.
+
+    Never joined: a cancelled loser still holds its thread until it reaches
+    its next cancellation check.
+    """
+
+    def __init__(self, name: str, workers: int) -> None:
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"cronoweath-hybrid-{name}")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def saturated(self) -> bool:
+        with self._lock:
+            return self.in_flight >= self.workers
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            self.in_flight += 1
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+_POOLS: Dict[str, _SourcePool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool(name: str) -> _SourcePool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(name)
+        if pool is None:
+            pool = _POOLS[name] = _SourcePool(name, WORKERS)
+        return pool
+
+
+def _sources() -> List[Engine]:
+    names = hybrid_sources()
+    if not names:
+        raise RuntimeError("HYBRID_ENGINES does not name any known engine")
+    return [get_engine(name) for name in names]
+
+
+def parse_target_day(value: str) -> Tuple[int, int]:
+    return _sources()[0].parse_target_day(value)
+
+
+def series_key(lat: float, lon: float, condition: str | Sequence[str] | None = None) -> Tuple[Any, ...]:
+    """Cells of every source: requests share a fetch only if they would in each."""
+    return tuple(engine.series_key(lat, lon, condition) for engine in _sources())
+
+
+def _hedged(fetch: Callable[[Engine], Series]) -> Series:
+    """``fetch(engine)`` over the sources, hedged; the first non-empty series wins."""
+    waiting = _sources()
+    pending: Dict[Future, Engine] = {}
+    stop = threading.Event()
+    errors: List[str] = []
+    t0 = time.monotonic()
+
+    def _fetch(engine: Engine) -> Series:
+        with progress.cancellable(stop):
+            return fetch(engine)
+
+    def _start(hedge: bool) -> None:
+        engine = waiting[0]
+        pool = _pool(engine.name)
+        if hedge and pool.saturated():
+            logger.warning("Not hedging to %s: %d fetches already in flight", engine.name, pool.in_flight)
+            return
+        waiting.pop(0)
+        if hedge:
+            logger.info("Hedging to %s after %.1fs", engine.name, time.monotonic() - t0)
+        # Copied context: job progress reporting follows the fetch into the pool
+        context = contextvars.copy_context()
+        pending[pool.submit(context.run, _fetch, engine)] = engine
+
+    _start(hedge=False)
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=HEDGE_AFTER_S if waiting else None, return_when=FIRST_COMPLETED)
+            if not done:
+                _start(hedge=True)
+                continue
+            for future in done:
+                engine = pending.pop(future)
+                try:
+                    series = future.result()
+                except JobCancelled:
+                    raise
+                except Exception as exc:  # pragma: no cover - depends on external services
+                    logger.warning("Hybrid source %s failed: %s", engine.name, exc)
+                    errors.append(f"{engine.name}: {exc}")
+                    continue
+                if not series:
+                    errors.append(f"{engine.name}: empty series")
+                    continue
+                logger.info("Hybrid answered by %s in %.1fs", engine.name, time.monotonic() - t0)
+                result = series.copy()
+                result.source = engine.name
+                return result
+            if not pending and waiting:
+                _start(hedge=False)
+    finally:
+        # Losers (or every source, on error) stop at their next step
+        stop.set()
+    raise RuntimeError("All hybrid sources failed: " + "; ".join(errors))
+
+
+def assemble_series_real(
+    lat: float,
+    lon: float,
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | Sequence[str] | None = None,
+) -> Series:
+    return _hedged(
+        lambda engine: engine.fetch_series(lat, lon, target_month, target_day, years, window, condition)
+    )
+
+
+def assemble_windows(
+    lat: float,
+    lon: float,
+    windows: List[Tuple[str, str]],
+    condition: str | Sequence[str] | None = None,
+) -> Series:
+    return _hedged(lambda engine: engine.fetch_windows(lat, lon, windows, condition))
+
+
+__all__ = [
+    "assemble_series_real",
+    "assemble_windows",
+    "parse_target_day",
+    "series_key",
+]
@@ -0,0 +1,213 @@
+# backend/app/jobs.py
+"""Bounded priority job scheduler for async queries.
+
+Jobs wait in a priority queue (lower value first, FIFO within a priority)
+of at most ``JOB_QUEUE_MAX`` entries and run on ``JOB_WORKERS`` dedicated
+threads, so slow remote fetches never occupy the request threadpool. A
+full queue rejects new jobs with ``JobQueueFull`` (HTTP 429). Each job has
+a deadline (``JOB_TIMEOUT`` seconds from submission) and can be cancelled:
+queued jobs are dropped, running ones are told to stop through their
+``JobContext`` and their result is discarded.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("cronoweath.jobs")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+class JobDeadlineExceeded(TimeoutError):
+    pass
+
+
+@dataclass
+class JobContext:
+    """Handed to the job function: cancellation/deadline checks and progress."""
+
+    job_id: str
+    deadline: float
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    progress: Dict[str, Any] = field(default_factory=dict)
+    # Called with a snapshot of ``progress`` after every change
+    listener: Optional[Callable[[Dict[str, Any]], None]] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        """Set once the job is cancelled; for ``progress.cancellable``."""
+        return self._cancel
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def check(self) -> None:
+        """Raise if the job was cancelled or ran past its deadline."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"job {self.job_id} cancelled")
+        if time.monotonic() >= self.deadline:
+            raise JobDeadlineExceeded(f"job {self.job_id} exceeded its deadline")
+
+    def report(self, **info: Any) -> None:
+        with self._lock:
+            self.progress.update(info)
+            snapshot = dict(self.progress)
+        if self.listener is not None:
+            self.listener(snapshot)
+
+    def add(self, **deltas: int) -> None:
+        with self._lock:
+            for key, delta in deltas.items():
+                self.progress[key] = self.progress.get(key, 0) + delta
+            snapshot = dict(self.progress)
+        if self.listener is not None:
+            self.listener(snapshot)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.progress)
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    ctx: JobContext = field(compare=False)
+    fn: Callable[..., Any] = field(compare=False)
+    args: Tuple[Any, ...] = field(compare=False)
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+    ) -> None:
+        self.workers = max(1, workers or int(os.getenv("JOB_WORKERS", "4")))
+        self.max_queue = max(1, max_queue or int(os.getenv("JOB_QUEUE_MAX", "64")))
+        self.timeout_s = timeout_s if timeout_s is not None else float(os.getenv("JOB_TIMEOUT", "300"))
+        self._cond = threading.Condition()
+        self._heap: List[_Job] = []
+        self._queued: Dict[str, _Job] = {}
+        self._running: Dict[str, JobContext] = {}
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+
+    # -- submission ----------------------------------------------------------
+
+    def submit(
+        self,
+        job_id: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = 0,
+        timeout_s: Optional[float] = None,
+    ) -> JobContext:
+        """Queue ``fn(ctx, *args)``; raises ``JobQueueFull`` when at capacity."""
+        ctx = JobContext(job_id, time.monotonic() + (timeout_s or self.timeout_s))
+        with self._cond:
+            if len(self._queued) >= self.max_queue:
+                raise JobQueueFull(f"job queue full ({self.max_queue})")
+            job = _Job(priority, next(self._seq), ctx, fn, args)
+            heapq.heappush(self._heap, job)
+            self._queued[job_id] = job
+            self._ensure_workers()
+            self._cond.notify()
+        return ctx
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a queued job or signal a running one; False if it is unknown here."""
+        with self._cond:
+            job = self._queued.pop(job_id, None)
+            if job is not None:
+                job.ctx.cancel()
+                return True
+            ctx = self._running.get(job_id)
+            if ctx is not None:
+                ctx.cancel()
+                return True
+        return False
+
+    # -- introspection -------------------------------------------------------
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the queue (in run order), None unless queued."""
+        with self._cond:
+            job = self._queued.get(job_id)
+            if job is None:
+                return None
+            return 1 + sum(1 for other in self._queued.values() if other < job)
+
+    def context(self, job_id: str) -> Optional[JobContext]:
+        with self._cond:
+            job = self._queued.get(job_id)
+            return job.ctx if job is not None else self._running.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "max_queue": self.max_queue,
+            }
+
+    # -- workers -------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name=f"cronoweath-job-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> _Job:
+        with self._cond:
+            while True:
+                while self._heap:
+                    job = heapq.heappop(self._heap)
+                    # Cancelled jobs stay in the heap until popped
+                    if self._queued.get(job.ctx.job_id) is job:
+                        del self._queued[job.ctx.job_id]
+                        self._running[job.ctx.job_id] = job.ctx
+                        return job
+                self._cond.wait()
+
+    def _work(self) -> None:
+        while True:
+            job = self._next()
+            try:
+                job.fn(job.ctx, *job.args)
+            except Exception:  # the job reports its own failures
+                logger.exception("job %s failed", job.ctx.job_id)
+            finally:
+                with self._cond:
+                    self._running.pop(job.ctx.job_id, None)
+
+
+SCHEDULER = JobScheduler()
+
+__all__ = ["JobCancelled", "JobContext", "JobDeadlineExceeded", "JobQueueFull", "JobScheduler", "SCHEDULER"]
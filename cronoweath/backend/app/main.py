@@ -7,28 +7,71 @@ future work can plug in predictive formulas without changing the HTTP surface.
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 import logging
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse, RedirectResponse
-
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from pydantic import ValidationError
+
+from . import progress
+from .climatology import get_climatology
+from .engines import DEFAULT_ENGINE, ENGINES, Engine, engine_for, engines_info, loaded_engines
+from .evaluator import Check, compile_checks, count_batch, evaluate, exceedance_curve
+from .exporters import (
+    ExportUnavailable,
+    accepts_gzip,
+    gzip_chunks,
+    iter_arrow,
+    iter_csv,
+    iter_json,
+    iter_ndjson,
+    iter_parquet,
+    npz_bytes,
+)
+from .jobs import SCHEDULER, JobCancelled, JobContext, JobDeadlineExceeded, JobQueueFull
+from .maps import (
+    MAP_CACHE,
+    ProbabilityGrid,
+    blocks_for,
+    grid_extent,
+    grid_npz,
+    grid_png,
+    probability_grid,
+    probability_map,
+)
 from .models import (
+    BatchItemResult,
+    ConditionResult,
+    CurvePoint,
+    CurveRequest,
+    CurveResponse,
     ErrorResponse,
+    MapRequest,
+    MapResponse,
+    MultiQueryRequest,
+    MultiQueryResponse,
     QueryRequest,
     QueryResponse,
     SampleInfo,
     Years,
 )
-from .storage import STORE
-from .utils import default_units, now_iso, timeseries_to_csv
+from .series import Series
+from .singleflight import SingleFlight
+from .storage import STORE, TASKS, StoredResult
+from .utils import default_units, now_iso
 
 # ---------------------------------------------------------------------------
 # Configuration & engine selection
@@ -68,43 +111,25 @@ if _CONFIG_PATH is None:  # pragma: no cover - config must exist for app to boot
 with _CONFIG_PATH.open("r", encoding="utf-8") as fh:
     CONF = json.load(fh)
 
-# Choose data engine (mock by default for development)
-_ENGINE_KIND = os.getenv("CRONOWEATH_ENGINE", "mock").lower()
-if _ENGINE_KIND == "nasa":
-    from . import nasa_engine as data_engine
-    DATASET_HINTS = {
-        "hot": ["MERRA-2"],
-        "cold": ["MERRA-2"],
-        "windy": ["MERRA-2"],
-        "wet": ["GPM IMERG"],
-        "muggy": ["MERRA-2"],
-    }
-elif _ENGINE_KIND == "meteomatics":
-    from . import meteomatics_engine as data_engine
-    DATASET_HINTS = {
-        "hot": ["Meteomatics API"],
-        "cold": ["Meteomatics API"],
-        "windy": ["Meteomatics API"],
-        "wet": ["Meteomatics API"],
-        "muggy": ["Meteomatics API"],
-    }
-else:
-    _ENGINE_KIND = "mock"
-    from . import mock_engine as data_engine
-    DATASET_HINTS = {
-        "hot": ["Synthetic dataset"],
-        "cold": ["Synthetic dataset"],
-        "windy": ["Synthetic dataset"],
-        "wet": ["Synthetic dataset"],
-        "muggy": ["Synthetic dataset"],
-    }
+# Data engines are imported on first use (see engines.py): CRONOWEATH_ENGINE
+# is the default, CRONOWEATH_ENGINE_BY_CONDITION and the request's
+# ``engine`` field pick another one.
 
 
 # ---------------------------------------------------------------------------
 # FastAPI initialisation
 # ---------------------------------------------------------------------------
 
-app = FastAPI(title="Cronoweath Probability API", version="v1")
+@contextlib.asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Pooled HTTP clients of remote engines
+    for engine in loaded_engines():
+        if hasattr(engine, "close_clients"):
+            await engine.close_clients()
+
+
+app = FastAPI(title="Cronoweath Probability API", version="v1", lifespan=_lifespan)
 # Optional logging level for internal engines
 _log_level = os.getenv("CRONOWEATH_LOG", "").strip().upper()
 if _log_level:
@@ -181,62 +206,8 @@ def _choose_metric(condition: str) -> Iterable[str]:
     return mapping.get(condition, [])
 
 
-def _evaluate_row(row: Dict[str, Any], condition: str, thr: Dict[str, Any], logic: str) -> Tuple[bool, bool]:
-    checks: List[bool] = []
-
-    def has(field: str) -> Optional[float]:
-        value = row.get(field)
-        return None if value is None else float(value)
-
-    if condition == "hot":
-        t_lim = thr.get("T_min")
-        if t_lim is not None and (val := has("t2m_max")) is not None:
-            checks.append(val >= float(t_lim))
-        hi_lim = thr.get("HI_min")
-        if hi_lim is not None and (val := has("hi_max")) is not None:
-            checks.append(val >= float(hi_lim))
-
-    elif condition == "cold":
-        t_lim = thr.get("T_max")
-        if t_lim is not None and (val := has("t2m_min")) is not None:
-            checks.append(val <= float(t_lim))
-        wc_lim = thr.get("WC_max")
-        if wc_lim is not None and (val := has("wc_min")) is not None:
-            checks.append(val <= float(wc_lim))
-
-    elif condition == "windy":
-        v_lim = thr.get("V_min")
-        if v_lim is not None and (val := has("wind_speed_max")) is not None:
-            checks.append(val >= float(v_lim))
-        g_lim = thr.get("gust_min")
-        if g_lim is not None and (val := has("wind_gust_p95")) is not None:
-            checks.append(val >= float(g_lim))
-
-    elif condition == "wet":
-        p_lim = thr.get("P_daily")
-        if p_lim is not None and (val := has("precip_daily")) is not None:
-            checks.append(val >= float(p_lim))
-        r_lim = thr.get("P_rate")
-        if r_lim is not None and (val := has("precip_rate_max")) is not None:
-            checks.append(val >= float(r_lim))
-
-    elif condition == "muggy":
-        hi_lim = thr.get("HI_min")
-        if hi_lim is not None and (val := has("hi_max")) is not None:
-            checks.append(val >= float(hi_lim))
-        td_lim = thr.get("Td_min")
-        if td_lim is not None and (val := has("dewpoint_max")) is not None:
-            checks.append(val >= float(td_lim))
-
-    if not checks:
-        return False, False
-    return (any(checks) if logic == "ANY" else all(checks)), True
-
-
-def _compute_stats(values: List[float]) -> Optional[Dict[str, float]]:
-    if not values:
-        return None
-    arr = np.array(values, dtype=float)
+def _compute_stats(values: Iterable[float]) -> Optional[Dict[str, float]]:
+    arr = np.asarray(values, dtype=float)
     arr = arr[~np.isnan(arr)]
     if arr.size == 0:
         return None
@@ -257,6 +228,163 @@ def _year_metadata(years: int, mode: str) -> Years:
     return Years(mode=mode)
 
 
+# A leader's cancellation or deadline is its own: followers retry instead
+_INFLIGHT = SingleFlight(leader_local=(JobCancelled, JobDeadlineExceeded, progress.FetchCancelled))
+
+# (series so far, chunks done, chunks total)
+PartialCallback = Callable[[Series, int, int], None]
+
+
+def _engine(req: Any, condition: Any = None) -> Engine:
+    """The request's ``engine``, else the one configured for its condition(s)."""
+    if condition is None:
+        condition = getattr(req, "condition", None) or tuple(getattr(req, "conditions", ()))
+    return engine_for(condition, getattr(req, "engine", None))
+
+
+def _source_engine(engine: Engine, series: Series) -> Engine:
+    """Engine whose data ``series`` holds: composite engines tag it in ``source``."""
+    return ENGINES.get(series.source, engine) if series.source else engine
+
+
+def _engine_notes(engine: Engine, source: Engine) -> List[str]:
+    return [f"engine={engine.name}"] + ([f"source={source.name}"] if source is not engine else [])
+
+
+def _fetch_key(req: Any, target_month: int, target_day: int, years: int, condition: Any) -> Tuple[Any, ...]:
+    engine = _engine(req, condition)
+    cell = engine.series_key(req.location.lat, req.location.lon, condition)
+    return (engine.name, cell, target_month, target_day, req.window_days, years)
+
+
+def _fetch_series(
+    req: QueryRequest,
+    target_month: int,
+    target_day: int,
+    years: int,
+    condition: Any = None,
+    on_partial: Optional[PartialCallback] = None,
+) -> Series:
+    """Fetch the timeseries, coalescing concurrent identical fetches.
+
+    Requests in the same engine cell (see ``series_key``) with the same target
+    window and years wait on one shared fetch. The shared ``Series`` is never
+    mutated: callers add their ``exceed`` column with ``with_column``.
+    ``condition`` defaults to ``req.condition``; a tuple of conditions asks the
+    engine for the union of the variables they need. With ``on_partial``,
+    engines that fetch incrementally (``iter_series_real``) report the series
+    so far after every chunk; callers that join an in-flight fetch do not.
+    """
+    condition = req.condition if condition is None else condition
+    lat, lon = req.location.lat, req.location.lon
+    engine = _engine(req, condition)
+    key = _fetch_key(req, target_month, target_day, years, condition)
+
+    def _fetch() -> Series:
+        if on_partial is not None:
+            series = None
+            for series, done, total in engine.iter_series(
+                lat, lon, target_month, target_day, years, req.window_days, condition
+            ):
+                if done < total:
+                    on_partial(series, done, total)
+            return series
+        return engine.fetch_series(lat, lon, target_month, target_day, years, req.window_days, condition)
+
+    shared, _ = _INFLIGHT.do(key, _fetch)
+    return shared
+
+
+def _resolve_years(req: Any) -> int:
+    return req.lastN_years if req.years_mode == "lastN" else CONF.get("lastN_years", 20)
+
+
+def _load_series(
+    req: Any,
+    condition: Any = None,
+    on_partial: Optional[PartialCallback] = None,
+) -> Tuple[Series, int, int, int]:
+    """Parse the request's day and period and fetch its series (HTTP errors on failure)."""
+    try:
+        target_month, target_day = _engine(req, condition).parse_target_day(req.target_day)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid target_day: {exc}") from exc
+
+    years = _resolve_years(req)
+
+    try:
+        timeseries = _fetch_series(req, target_month, target_day, years, condition, on_partial)
+    except (JobCancelled, progress.FetchCancelled):
+        raise
+    except Exception as exc:  # pragma: no cover - depends on external services
+        raise HTTPException(status_code=400, detail=f"Data engine error: {exc}") from exc
+    return timeseries, target_month, target_day, years
+
+
+async def _load_series_async(req: Any) -> Tuple[Series, int, int, int]:
+    """``_load_series`` through the engine's ``assemble_series_real_async``.
+
+    The request waits on the event loop instead of holding a threadpool
+    thread for the whole remote fetch.
+    """
+    engine = _engine(req)
+    try:
+        target_month, target_day = engine.parse_target_day(req.target_day)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid target_day: {exc}") from exc
+
+    years = _resolve_years(req)
+    key = _fetch_key(req, target_month, target_day, years, req.condition)
+    try:
+        timeseries, _ = await _INFLIGHT.do_async(
+            key,
+            lambda: engine.assemble_series_real_async(
+                req.location.lat,
+                req.location.lon,
+                target_month,
+                target_day,
+                years=years,
+                window=req.window_days,
+                condition=req.condition,
+            ),
+        )
+    except Exception as exc:  # pragma: no cover - depends on external services
+        raise HTTPException(status_code=400, detail=f"Data engine error: {exc}") from exc
+    return timeseries, target_month, target_day, years
+
+
+def _provisional_reporter(
+    job: Optional[JobContext],
+    checks_by_condition: Dict[str, Tuple[List[Check], str]],
+) -> Optional[PartialCallback]:
+    """Publish a provisional probability per condition after every fetched chunk."""
+    if job is None:
+        return None
+
+    def _on_partial(partial: Series, done: int, total: int) -> None:
+        job.check()
+        provisional: Dict[str, Any] = {}
+        for condition, (checks, logic) in checks_by_condition.items():
+            evaluation = evaluate(partial, checks, logic)
+            n_days = evaluation.evaluated_days
+            provisional[condition] = {
+                "probability_pct": round(100.0 * evaluation.exceed_count / n_days, 1) if n_days else None,
+                "n_days": n_days,
+            }
+        job.report(years_done=done, years_total=total, provisional=provisional)
+
+    return _on_partial
+
+
+def _metric_values(series: Series, fields: Iterable[str]) -> np.ndarray:
+    """Values of the metric fields, row-major (day by day), missing ones dropped."""
+    columns = [series.values(name) for name in fields if name in series]
+    if not columns:
+        return np.array([], dtype=float)
+    stacked = np.column_stack(columns).ravel()
+    return stacked[~np.isnan(stacked)]
+
+
 def _coverage(n_rows: int, years: int, window: int) -> float:
     theoretical = years * (2 * window + 1)
     if theoretical <= 0:
@@ -273,8 +401,12 @@ def _coverage(n_rows: int, years: int, window: int) -> float:
 def health() -> Dict[str, Any]:
     return {
         "status": "ok",
-        "engine": _ENGINE_KIND,
+        "engine": DEFAULT_ENGINE,
+        "engines": engines_info(),
         "version": app.version,
+        "result_store": STORE.stats(),
+        "jobs": SCHEDULER.stats(),
+        "map_cache": MAP_CACHE.stats(),
         "time_utc": now_iso(),
     }
 
@@ -291,59 +423,57 @@ def conditions() -> Dict[str, Any]:
     }
 
 
-def _compute_query_response(req: QueryRequest) -> Dict[str, Any]:
+def _compute_query_response(
+    req: QueryRequest,
+    query_id: Optional[str] = None,
+    job: Optional[JobContext] = None,
+    loaded: Optional[Tuple[Series, int, int, int]] = None,
+) -> Dict[str, Any]:
     condition_conf = CONF["conditions"][req.condition]
+    engine = _engine(req)
     thresholds = _resolve_thresholds(req.condition, req.thresholds)
     logic = _resolve_logic(req.logic, req.condition)
+    checks = compile_checks(req.condition, thresholds)
+
+    if loaded is None:
+        loaded = _load_series(req, on_partial=_provisional_reporter(job, {req.condition: (checks, logic)}))
+    timeseries, target_month, target_day, years = loaded
+    source = _source_engine(engine, timeseries)
+
+    evaluation = evaluate(timeseries, checks, logic)
+    timeseries = timeseries.with_column("exceed", evaluation.flags(), flag=True)
+    metric_values = _metric_values(timeseries, _choose_metric(req.condition))
+    return _query_payload(
+        req,
+        engine,
+        source,
+        thresholds,
+        logic,
+        (target_month, target_day, years),
+        evaluation.evaluated_days,
+        evaluation.exceed_count,
+        metric_values,
+        timeseries,
+        query_id,
+    )
 
-    try:
-        target_month, target_day = data_engine.parse_target_day(req.target_day)
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid target_day: {exc}") from exc
-
-    years = req.lastN_years if req.years_mode == "lastN" else CONF.get("lastN_years", 20)
-
-    try:
-        if hasattr(data_engine, "assemble_series_real"):
-            timeseries = data_engine.assemble_series_real(
-                req.location.lat,
-                req.location.lon,
-                target_month,
-                target_day,
-                years=years,
-                window=req.window_days,
-                condition=req.condition,
-            )
-        else:
-            timeseries = data_engine.assemble_series(
-                target_month,
-                target_day,
-                years=years,
-                window=req.window_days,
-            )
-    except Exception as exc:  # pragma: no cover - depends on external services
-        raise HTTPException(status_code=400, detail=f"Data engine error: {exc}") from exc
-
-    evaluated_days = 0
-    exceed_count = 0
-    metric_values: List[float] = []
-    metrics_to_check = list(_choose_metric(req.condition))
-
-    for row in timeseries:
-        exceeds, considered = _evaluate_row(row, req.condition, thresholds, logic)
-        if considered:
-            evaluated_days += 1
-            if exceeds:
-                exceed_count += 1
-            row["exceed"] = exceeds
-        else:
-            row["exceed"] = None
-
-        for metric_field in metrics_to_check:
-            value = row.get(metric_field)
-            if value is not None:
-                metric_values.append(float(value))
 
+def _query_payload(
+    req: QueryRequest,
+    engine: Engine,
+    source: Engine,
+    thresholds: Dict[str, Any],
+    logic: str,
+    period: Tuple[int, int, int],
+    evaluated_days: int,
+    exceed_count: int,
+    metric_values: np.ndarray,
+    timeseries: Optional[Series],
+    query_id: Optional[str] = None,
+    notes: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """``/query`` response from the counts, stored with its series (if any) for /download."""
+    target_month, target_day, years = period
     if evaluated_days == 0:
         raise HTTPException(
             status_code=400,
@@ -361,7 +491,7 @@ def _compute_query_response(req: QueryRequest) -> Dict[str, Any]:
     probability_pct = round(100.0 * exceed_count / evaluated_days, 1)
     stats = _compute_stats(metric_values)
 
-    query_id = "q_" + uuid.uuid4().hex[:10]
+    query_id = query_id or "q_" + uuid.uuid4().hex[:10]
     years_meta = _year_metadata(years, req.years_mode)
     units = default_units(req.units)
 
@@ -380,21 +510,26 @@ def _compute_query_response(req: QueryRequest) -> Dict[str, Any]:
             n_days=evaluated_days,
             coverage_pct=_coverage(evaluated_days, years, req.window_days),
         ),
-        dataset_used=DATASET_HINTS.get(req.condition, []),
+        dataset_used=source.dataset_hints(req.condition),
         notes=[
-            f"engine={_ENGINE_KIND}",
+            *_engine_notes(engine, source),
             f"window+/-{req.window_days}",
             f"{years} years",
+            *notes,
         ],
         units=units,
         generated_at=now_iso(),
-        timeseries=timeseries if req.include_timeseries else None,
+        timeseries=timeseries.to_rows() if req.include_timeseries and timeseries is not None else None,
     ).model_dump()
 
-    STORE[query_id] = {
-        **response_payload,
-        "timeseries": timeseries,  # ensure stored even if not returned
-    }
+    # The series is stored columnar (even if not returned) for /download;
+    # rows are only materialised at the JSON boundary.
+    STORE.put(
+        query_id,
+        {**response_payload, "timeseries": None},
+        timeseries,
+        include_timeseries=req.include_timeseries,
+    )
 
     if req.response_fields:
         keep = {"query_id", "condition", *req.response_fields}
@@ -403,107 +538,803 @@ def _compute_query_response(req: QueryRequest) -> Dict[str, Any]:
     return response_payload
 
 
+def _climatology_response(req: QueryRequest) -> Optional[Any]:
+    """Answer from the precomputed climatology index, or ``None`` to fetch as usual.
+
+    A single check is counted by binary search over the sorted values of each
+    calendar slot of the window, and the stats come from those values too;
+    no series is built, so /download has no timeseries for such answers.
+    Several checks rebuild the window's rows from the index and evaluate them.
+    """
+    store = get_climatology()
+    if store is None or req.include_timeseries:
+        return None
+    engine = _engine(req)
+    index = store.find(engine, req.location.lat, req.location.lon, req.condition)
+    if index is None:
+        return None
+    try:
+        target_month, target_day = engine.parse_target_day(req.target_day)
+    except Exception:
+        return None  # the regular path reports it
+    years = _resolve_years(req)
+    wanted = index.wanted(target_month, target_day, years, req.window_days)
+    if wanted is None:
+        return None
+
+    thresholds = _resolve_thresholds(req.condition, req.thresholds)
+    logic = _resolve_logic(req.logic, req.condition)
+    checks = compile_checks(req.condition, thresholds)
+    timeseries: Optional[Series] = None
+    if len(checks) == 1:
+        exceed_count, evaluated_days = index.count(checks[0], wanted)
+    else:
+        timeseries = index.series(wanted)
+        evaluation = evaluate(timeseries, checks, logic)
+        exceed_count, evaluated_days = evaluation.exceed_count, evaluation.evaluated_days
+        timeseries = timeseries.with_column("exceed", evaluation.flags(), flag=True)
+    return _query_payload(
+        req,
+        engine,
+        ENGINES.get(index.meta.get("source") or "", engine),
+        thresholds,
+        logic,
+        (target_month, target_day, years),
+        evaluated_days,
+        exceed_count,
+        index.values(_choose_metric(req.condition), wanted),
+        timeseries,
+        notes=["climatology index"],
+    )
+
+
 @app.post("/query")
-def query(req: QueryRequest, bg: BackgroundTasks):
+async def query(req: QueryRequest):
+    answer = await run_in_threadpool(_climatology_response, req)
+    if answer is not None:
+        return answer
     # For remote engines (NASA/Meteomatics) default to async to avoid edge timeouts.
-    default_async = "true" if _ENGINE_KIND in ("nasa", "meteomatics") else "false"
+    engine = _engine(req)
+    default_async = "true" if engine.remote else "false"
     always_async = os.getenv("ALWAYS_ASYNC", default_async).lower() == "true"
     if always_async:
-        query_id = "q_" + uuid.uuid4().hex[:10]
-        TASKS[query_id] = {"status": "running"}
-        bg.add_task(_bg_compute, req.model_dump(), query_id)
-        return JSONResponse(status_code=202, content={"query_id": query_id, "status": "running"})
-    return _compute_query_response(req)
+        return JSONResponse(status_code=202, content=await run_in_threadpool(_submit_job, req.model_dump()))
+    if hasattr(engine, "assemble_series_real_async"):
+        # Await the remote fetch; only the evaluation takes a threadpool slot
+        loaded = await _load_series_async(req)
+        return await run_in_threadpool(_compute_query_response, req, None, None, loaded)
+    return await run_in_threadpool(_compute_query_response, req)
 
 
 # ----------------------------
 # Async task-based querying
 # ----------------------------
-TASKS: Dict[str, Dict[str, Any]] = {}
 
 
-def _bg_compute(req_dict: Dict[str, Any], query_id: str):
+_PROGRESS_INTERVAL_S = 0.5
+
+
+def _progress_publisher(query_id: str, ctx: JobContext) -> Callable[[Dict[str, Any]], None]:
+    """Mirror job progress into TASKS (shared across workers), throttled.
+
+    The update fails once the task is no longer running, i.e. ``/cancel``
+    reached another worker: the job is then cancelled here too and stops at
+    its next check.
+    """
+    last = {"at": 0.0, "chunk": None}
+
+    def _publish(snapshot: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        chunk = snapshot.get("years_done")
+        if chunk == last["chunk"] and now - last["at"] < _PROGRESS_INTERVAL_S:
+            return
+        last["at"], last["chunk"] = now, chunk
+        if not TASKS.transition(query_id, {"status": "running", "progress": snapshot}, expect=("running",)):
+            ctx.cancel()
+
+    return _publish
+
+
+def _bg_compute(ctx: JobContext, req_dict: Dict[str, Any], query_id: str, multi: bool = False):
+    # A job cancelled while queued (possibly through another worker) never
+    # starts; its task already holds its final status
+    if not TASKS.transition(query_id, {"status": "running"}, expect=("queued",)):
+        return
+    ctx.listener = _progress_publisher(query_id, ctx)
+    # Whatever ends the job, the task leaves "running"
+    status: Dict[str, Any] = {"status": "error", "message": "task failed"}
     try:
-        req = QueryRequest(**req_dict)
-        result = _compute_query_response(req)
-        STORE[query_id] = {**result, "timeseries": result.get("timeseries")}
-        TASKS[query_id] = {"status": "done"}
+        ctx.check()
+        with progress.reporting(ctx), progress.cancellable(ctx.cancel_event):
+            if multi:
+                result = _compute_multi_response(MultiQueryRequest(**req_dict), query_id, ctx)
+            else:
+                result = _compute_query_response(QueryRequest(**req_dict), query_id, ctx)
+        ctx.check()
+        if isinstance(result, JSONResponse):
+            content = json.loads(result.body)
+            status = {"status": "error", "message": content.get("message", "task failed")}
+        else:
+            status = {"status": "done"}
+    except (JobCancelled, progress.FetchCancelled):
+        STORE.delete(query_id)
+        status = {"status": "cancelled"}
     except Exception as exc:  # pragma: no cover - external services
-        TASKS[query_id] = {"status": "error", "message": f"{exc}"}
+        STORE.delete(query_id)
+        status = {"status": "error", "message": f"{exc}"}
+    finally:
+        if not TASKS.transition(query_id, status, expect=("running",)):
+            STORE.delete(query_id)
 
 
-@app.post("/query_async")
-def query_async(req: QueryRequest, bg: BackgroundTasks):
+def _submit_job(req_dict: Dict[str, Any], multi: bool = False, priority: int = 0) -> Dict[str, Any]:
+    """Queue a background query; 429 when the job queue is full."""
     query_id = "q_" + uuid.uuid4().hex[:10]
-    TASKS[query_id] = {"status": "running"}
-    bg.add_task(_bg_compute, req.model_dump(), query_id)
-    return {"query_id": query_id, "status": "running"}
+    TASKS[query_id] = {"status": "queued"}
+    try:
+        SCHEDULER.submit(query_id, _bg_compute, req_dict, query_id, multi, priority=priority)
+    except JobQueueFull as exc:
+        TASKS.transition(query_id, {"status": "error", "message": str(exc)}, expect=("queued",))
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "5"}) from exc
+    return {"query_id": query_id, "status": "queued", "position": SCHEDULER.position(query_id)}
+
+
+@app.post("/query_async")
+def query_async(req: QueryRequest):
+    # Explicitly asynchronous callers yield to queries that /query turned async
+    return _submit_job(req.model_dump(), priority=1)
+
+
+@app.post("/cancel")
+def cancel(query_id: str = Query(...)):
+    task = TASKS.get(query_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="query_id not found")
+    if not TASKS.transition(query_id, {"status": "cancelled"}, expect=("queued", "running")):
+        raise HTTPException(status_code=409, detail=f"query already {task.get('status')}")
+    SCHEDULER.cancel(query_id)
+    STORE.delete(query_id)
+    return {"query_id": query_id, "status": "cancelled"}
+
+
+def _compute_multi_response(
+    req: MultiQueryRequest,
+    query_id: Optional[str] = None,
+    job: Optional[JobContext] = None,
+) -> Dict[str, Any]:
+    """Evaluate several conditions over one fetched series (the union of their variables)."""
+    conditions = list(req.conditions)
+    resolved: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    for condition in conditions:
+        resolved[condition] = (
+            _resolve_thresholds(condition, (req.thresholds or {}).get(condition)),
+            _resolve_logic((req.logic or {}).get(condition), condition),
+        )
+    checks_by_condition = {
+        condition: (compile_checks(condition, thresholds), logic)
+        for condition, (thresholds, logic) in resolved.items()
+    }
+    engine = _engine(req, tuple(conditions))
+    timeseries, target_month, target_day, years = _load_series(
+        req, tuple(conditions), _provisional_reporter(job, checks_by_condition)
+    )
+    source = _source_engine(engine, timeseries)
+    min_sample = CONF.get("min_sample_size", 300)
+
+    results: Dict[str, ConditionResult] = {}
+    for condition in conditions:
+        thresholds, logic = resolved[condition]
+        evaluation = evaluate(timeseries, checks_by_condition[condition][0], logic)
+        timeseries = timeseries.with_column(f"exceed_{condition}", evaluation.flags(), flag=True)
+        evaluated_days = evaluation.evaluated_days
+        outcome = ConditionResult(
+            status="ok",
+            condition=condition,
+            logic=logic,
+            thresholds_resolved=thresholds,
+            sample=SampleInfo(
+                n_days=evaluated_days,
+                coverage_pct=_coverage(evaluated_days, years, req.window_days),
+            ),
+            dataset_used=source.dataset_hints(condition),
+        )
+        if evaluated_days == 0:
+            outcome.status = "no_data"
+            outcome.message = "Timeseries does not contain data for the requested condition"
+        elif evaluated_days < min_sample:
+            outcome.status = "insufficient_sample"
+            outcome.message = "Not enough historical data to compute probability"
+            outcome.sample = SampleInfo(n_days=evaluated_days)
+        else:
+            outcome.probability_pct = round(100.0 * evaluation.exceed_count / evaluated_days, 1)
+            outcome.stats = _compute_stats(_metric_values(timeseries, _choose_metric(condition)))
+        results[condition] = outcome
+
+    query_id = query_id or "q_" + uuid.uuid4().hex[:10]
+    response_payload = MultiQueryResponse(
+        query_id=query_id,
+        conditions=conditions,
+        location=req.location,
+        target_day=f"{target_month:02d}-{target_day:02d}",
+        window_days=req.window_days,
+        years=_year_metadata(years, req.years_mode),
+        results=results,
+        notes=[
+            *_engine_notes(engine, source),
+            f"window+/-{req.window_days}",
+            f"{years} years",
+        ],
+        units=default_units(req.units),
+        generated_at=now_iso(),
+        timeseries=timeseries.to_rows() if req.include_timeseries else None,
+    ).model_dump()
+
+    STORE.put(
+        query_id,
+        {**response_payload, "timeseries": None},
+        timeseries,
+        include_timeseries=req.include_timeseries,
+    )
+    return response_payload
+
+
+@app.post("/query/multi")
+def query_multi(req: MultiQueryRequest):
+    default_async = "true" if _engine(req).remote else "false"
+    always_async = os.getenv("ALWAYS_ASYNC", default_async).lower() == "true"
+    if always_async:
+        return JSONResponse(status_code=202, content=_submit_job(req.model_dump(), multi=True))
+    return _compute_multi_response(req)
+
+
+_MAX_CURVE_STEPS = 2001
+
+
+def _curve_limits(req: CurveRequest) -> np.ndarray:
+    if req.range is not None:
+        lo, hi = req.range
+    else:
+        slider = CONF.get("ui_sliders", {}).get(req.condition, {}).get(req.threshold)
+        if not slider:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No slider range for {req.condition}.{req.threshold}; pass 'range'",
+            )
+        lo, hi = float(slider[0]), float(slider[1])
+    n_steps = int(np.floor((hi - lo) / req.step + 1e-9)) + 1
+    if n_steps > _MAX_CURVE_STEPS:
+        raise HTTPException(status_code=400, detail=f"Too many curve steps ({n_steps} > {_MAX_CURVE_STEPS})")
+    # Rounded so that e.g. 7.6 reached from 2.0 in 0.1 steps equals the literal 7.6
+    return np.round(lo + req.step * np.arange(n_steps), 10)
+
+
+@app.post("/query/curve")
+def query_curve(req: CurveRequest):
+    """Probability for every step of one threshold, from a single fetched series."""
+    thresholds = _resolve_thresholds(req.condition, req.thresholds)
+    if req.threshold not in thresholds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown threshold {req.threshold!r} for condition {req.condition!r}",
+        )
+    logic = _resolve_logic(req.logic, req.condition)
+    limits = _curve_limits(req)
+    # The swept threshold is compiled even when its configured value is null
+    checks = compile_checks(req.condition, {**thresholds, req.threshold: 0.0})
+    sweep = next(check for check in checks if check.key == req.threshold)
+
+    engine = _engine(req)
+    timeseries, target_month, target_day, years = _load_series(req)
+    source = _source_engine(engine, timeseries)
+    counts, evaluated_days = exceedance_curve(timeseries, checks, sweep, logic, limits)
+
+    if evaluated_days == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Timeseries does not contain data for the requested condition",
+        )
+
+    if evaluated_days < CONF.get("min_sample_size", 300):
+        error = ErrorResponse(
+            status="insufficient_sample",
+            message="Not enough historical data to compute probability",
+            sample=SampleInfo(n_days=evaluated_days),
+        )
+        return JSONResponse(status_code=200, content=error.model_dump())
+
+    curve = [
+        CurvePoint(
+            threshold=limit,
+            probability_pct=round(100.0 * count / evaluated_days, 1),
+            exceed_count=count,
+        )
+        for limit, count in zip(limits.tolist(), counts.tolist())
+    ]
+    return CurveResponse(
+        condition=req.condition,
+        logic=logic,
+        location=req.location,
+        target_day=f"{target_month:02d}-{target_day:02d}",
+        window_days=req.window_days,
+        years=_year_metadata(years, req.years_mode),
+        threshold=req.threshold,
+        thresholds_resolved=thresholds,
+        curve=curve,
+        sample=SampleInfo(
+            n_days=evaluated_days,
+            coverage_pct=_coverage(evaluated_days, years, req.window_days),
+        ),
+        dataset_used=source.dataset_hints(req.condition),
+        notes=[
+            *_engine_notes(engine, source),
+            f"window+/-{req.window_days}",
+            f"{years} years",
+        ],
+        units=default_units(req.units),
+        generated_at=now_iso(),
+    ).model_dump()
+
+
+# ---------------------------------------------------------------------------
+# Batch queries
+# ---------------------------------------------------------------------------
+
+_BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "10000"))
+_BATCH_WORKERS = max(1, int(os.getenv("BATCH_WORKERS", "4")))
+
+# (index in the batch, request, target month, target day)
+_BatchMember = Tuple[int, QueryRequest, int, int]
+
+
+def _parse_batch(body: bytes, content_type: str) -> List[Any]:
+    """Raw batch items: a JSON list (or ``{"queries": [...]}``) or NDJSON lines.
+
+    A malformed NDJSON line becomes an ``Exception`` item, reported on its own
+    output line instead of rejecting the whole upload.
+    """
+    text = body.decode("utf-8-sig")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items: List[Any] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                items.append(exc)
+        return items
+    try:
+        document = json.loads(text)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {exc}") from exc
+    if isinstance(document, dict):
+        document = document.get("queries")
+    if not isinstance(document, list):
+        raise HTTPException(status_code=400, detail="Expected a list of queries or {\"queries\": [...]}")
+    return document
+
+
+def _batch_line(item: BatchItemResult) -> bytes:
+    return (json.dumps(item.model_dump(), ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _batch_error(index: int, message: str, req: Optional[QueryRequest] = None) -> bytes:
+    return _batch_line(
+        BatchItemResult(
+            index=index,
+            status="error",
+            condition=req.condition if req else None,
+            location=req.location if req else None,
+            message=message,
+        )
+    )
+
+
+def _evaluate_batch_group(members: List[_BatchMember], years: int) -> List[bytes]:
+    """Fetch one cell/window once and evaluate every request of the group on it."""
+    _, first, target_month, target_day = members[0]
+    try:
+        timeseries = _fetch_series(first, target_month, target_day, years)
+    except Exception as exc:  # pragma: no cover - depends on external services
+        return [_batch_error(index, f"Data engine error: {exc}", req) for index, req, _, _ in members]
+    return _batch_lines(members, timeseries, years)
+
+
+def _evaluate_batch_region(groups: List[List[_BatchMember]], years: int) -> List[bytes]:
+    """Several cells with the same window and period, fetched as one regional read."""
+    _, first, target_month, target_day = groups[0][0]
+    points = [(members[0][1].location.lat, members[0][1].location.lon) for members in groups]
+    try:
+        series_list = _engine(first).assemble_series_points(
+            points,
+            target_month,
+            target_day,
+            years=years,
+            window=first.window_days,
+            condition=first.condition,
+        )
+    except Exception as exc:  # pragma: no cover - depends on external services
+        return [
+            _batch_error(index, f"Data engine error: {exc}", req)
+            for members in groups
+            for index, req, _, _ in members
+        ]
+    lines: List[bytes] = []
+    for members, timeseries in zip(groups, series_list):
+        lines.extend(_batch_lines(members, timeseries, years))
+    return lines
+
+
+def _batch_lines(members: List[_BatchMember], timeseries: Series, years: int) -> List[bytes]:
+    """Evaluate a group's queries on its series, stacked per condition (``count_batch``)."""
+    _, _, target_month, target_day = members[0]
+    min_sample = CONF.get("min_sample_size", 300)
+    by_condition: Dict[str, List[_BatchMember]] = {}
+    for member in members:
+        by_condition.setdefault(member[1].condition, []).append(member)
+
+    lines: List[bytes] = []
+    for condition, group in by_condition.items():
+        thresholds = [_resolve_thresholds(condition, req.thresholds) for _, req, _, _ in group]
+        logics = [_resolve_logic(req.logic, condition) for _, req, _, _ in group]
+        exceed_counts, evaluated = count_batch(timeseries, condition, thresholds, logics)
+        stats: Optional[Dict[str, float]] = None
+        if evaluated.max(initial=0) >= min_sample:
+            stats = _compute_stats(_metric_values(timeseries, _choose_metric(condition)))
+
+        for (index, req, _, _), resolved, logic, exceed_count, evaluated_days in zip(
+            group, thresholds, logics, exceed_counts.tolist(), evaluated.tolist()
+        ):
+            item = BatchItemResult(
+                index=index,
+                status="ok",
+                condition=condition,
+                logic=logic,
+                location=req.location,
+                target_day=f"{target_month:02d}-{target_day:02d}",
+                thresholds_resolved=resolved,
+                sample=SampleInfo(
+                    n_days=evaluated_days,
+                    coverage_pct=_coverage(evaluated_days, years, req.window_days),
+                ),
+            )
+            if evaluated_days == 0:
+                item.status = "no_data"
+                item.message = "Timeseries does not contain data for the requested condition"
+            elif evaluated_days < min_sample:
+                item.status = "insufficient_sample"
+                item.message = "Not enough historical data to compute probability"
+                item.sample = SampleInfo(n_days=evaluated_days)
+            else:
+                item.probability_pct = round(100.0 * exceed_count / evaluated_days, 1)
+                item.stats = stats
+            lines.append(_batch_line(item))
+    return lines
+
+
+def _run_batch(items: List[Any]) -> Iterator[bytes]:
+    """Validate, group by fetch key and evaluate; yield NDJSON as groups finish."""
+    groups: Dict[Tuple[Any, ...], List[_BatchMember]] = {}
+    for index, raw in enumerate(items):
+        if isinstance(raw, Exception):
+            yield _batch_error(index, f"Invalid JSON line: {raw}")
+            continue
+        try:
+            req = QueryRequest.model_validate(raw)
+            target_month, target_day = _engine(req).parse_target_day(req.target_day)
+        except ValidationError as exc:
+            yield _batch_error(index, f"Invalid query: {exc.errors(include_url=False)}")
+            continue
+        except Exception as exc:
+            yield _batch_error(index, f"Invalid target_day: {exc}")
+            continue
+        # Same key as ``_fetch_series``: (engine, cell, month, day, window, years)
+        key = _fetch_key(req, target_month, target_day, _resolve_years(req), req.condition)
+        groups.setdefault(key, []).append((index, req, target_month, target_day))
+
+    pool = ThreadPoolExecutor(max_workers=_BATCH_WORKERS, thread_name_prefix="cronoweath-batch")
+    try:
+        futures = []
+        regions: Dict[Tuple[Any, ...], List[List[_BatchMember]]] = {}
+        for key, members in groups.items():
+            if hasattr(_engine(members[0][1]), "assemble_series_points"):
+                # Engines that read regions fetch all cells sharing the window,
+                # period and fetch condition (that of each group's first query) at once
+                regions.setdefault((key[0], members[0][1].condition, *key[2:]), []).append(members)
+            else:
+                futures.append(pool.submit(_evaluate_batch_group, members, key[-1]))
+        futures.extend(pool.submit(_evaluate_batch_region, cells, key[-1]) for key, cells in regions.items())
+        for future in as_completed(futures):
+            yield b"".join(future.result())
+    finally:
+        # Client gone (generator closed) or done: drop groups not started yet
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.post("/query/batch")
+async def query_batch(request: Request):
+    """Many queries in one call, answered as NDJSON lines (one per query, any order).
+
+    The body is a JSON list of ``QueryRequest`` objects (or ``{"queries": [...]}``),
+    or one query per line with ``Content-Type: application/x-ndjson``. Queries
+    in the same engine cell, target window and period share a single fetch
+    and are evaluated together, so cost grows with the number of distinct
+    cells, not with the number of queries; engines with regional reads
+    (``assemble_series_points``) also fetch nearby cells together. Each line carries the query's
+    ``index`` in the batch; invalid queries get a ``status: "error"`` line.
+    """
+    items = _parse_batch(await request.body(), request.headers.get("content-type", "").lower())
+    if len(items) > _BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many queries in batch ({len(items)} > {_BATCH_MAX_QUERIES})",
+        )
+    return StreamingResponse(_run_batch(items), media_type="application/x-ndjson")
+
+
+# ---------------------------------------------------------------------------
+# Probability maps
+# ---------------------------------------------------------------------------
+
+_MAP_MAX_BLOCKS = int(os.getenv("MAP_MAX_BLOCKS", "64"))
+
+
+def _nan_to_none(grid: np.ndarray) -> List[List[Optional[float]]]:
+    return [[None if np.isnan(value) else value for value in row] for row in grid.tolist()]
+
+
+@app.post("/map")
+def probability_map_endpoint(req: MapRequest):
+    """Probability of the condition for every native grid cell in ``bbox``.
+
+    The missing cache blocks of the bbox are fetched as one region and
+    evaluated over (day, lat, lon) arrays. ``format`` picks a JSON grid, a
+    compact ``.npz`` or a PNG heatmap (north up, cell edges in ``X-Map-Extent``
+    as south,north,west,east); rows of the JSON/npz grids go south to north.
+    """
+    engine = _engine(req)
+    if not hasattr(engine, "assemble_grid"):
+        raise HTTPException(status_code=501, detail=f"Engine {engine.name!r} does not support maps")
+    try:
+        target_month, target_day = engine.parse_target_day(req.target_day)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid target_day: {exc}") from exc
+    bbox = tuple(req.bbox)
+    n_blocks = len(blocks_for(bbox))
+    if n_blocks > _MAP_MAX_BLOCKS:
+        raise HTTPException(status_code=400, detail=f"bbox too large ({n_blocks} blocks > {_MAP_MAX_BLOCKS})")
+
+    thresholds = _resolve_thresholds(req.condition, req.thresholds)
+    logic = _resolve_logic(req.logic, req.condition)
+    checks = compile_checks(req.condition, thresholds)
+    years = _resolve_years(req)
+    min_sample = CONF.get("min_sample_size", 300)
+    key = (
+        engine.name,
+        req.condition,
+        logic,
+        tuple(sorted(thresholds.items())),
+        target_month,
+        target_day,
+        req.window_days,
+        years,
+        min_sample,
+    )
+
+    def _compute(hull: Tuple[float, float, float, float]) -> ProbabilityGrid:
+        grid = engine.assemble_grid(
+            hull, target_month, target_day, years=years, window=req.window_days, condition=req.condition
+        )
+        return probability_grid(grid, checks, logic, min_sample)
+
+    try:
+        # Identical concurrent maps share one computation
+        grid, _ = _INFLIGHT.do(("map", key, bbox), lambda: probability_map(bbox, key, _compute))
+    except Exception as exc:  # pragma: no cover - depends on external services
+        raise HTTPException(status_code=400, detail=f"Data engine error: {exc}") from exc
+    if grid.lats.size == 0 or grid.lons.size == 0:
+        raise HTTPException(status_code=400, detail="No grid cells in bbox")
+
+    if req.format == "png":
+        extent = ",".join(f"{edge:.6g}" for edge in grid_extent(grid))
+        return Response(
+            content=grid_png(grid, req.scale),
+            media_type="image/png",
+            headers={"X-Map-Extent": extent},
+        )
+
+    payload = MapResponse(
+        condition=req.condition,
+        logic=logic,
+        target_day=f"{target_month:02d}-{target_day:02d}",
+        window_days=req.window_days,
+        years=_year_metadata(years, req.years_mode),
+        bbox=list(bbox),
+        thresholds_resolved=thresholds,
+        lats=grid.lats.tolist(),
+        lons=grid.lons.tolist(),
+        probability_pct=_nan_to_none(grid.probability_pct),
+        n_days=grid.n_days.tolist(),
+        min_sample_size=min_sample,
+        dataset_used=engine.dataset_hints(req.condition),
+        notes=[
+            f"engine={engine.name}",
+            f"window+/-{req.window_days}",
+            f"{years} years",
+        ],
+        units=default_units(req.units),
+        generated_at=now_iso(),
+    ).model_dump()
+    if req.format == "npz":
+        meta = {k: v for k, v in payload.items() if k not in ("lats", "lons", "probability_pct", "n_days")}
+        return Response(
+            content=grid_npz(meta, grid),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": "attachment; filename=map.npz"},
+        )
+    return payload
+
+
+def _stored_payload(entry: StoredResult, with_timeseries: bool) -> Dict[str, Any]:
+    payload = dict(entry.payload)
+    series = entry.series() if with_timeseries else None
+    payload["timeseries"] = series.to_rows() if series is not None else None
+    return payload
 
 
 @app.get("/result")
 def result(query_id: str = Query(...)):
-    if query_id in STORE:
-        return STORE[query_id]
+    entry = STORE.get(query_id)
+    if entry is not None:
+        return _stored_payload(entry, entry.include_timeseries)
     task = TASKS.get(query_id)
     if not task:
         raise HTTPException(status_code=404, detail="query_id not found")
-    if task.get("status") == "error":
+    return JSONResponse(status_code=202, content=_pending_state(query_id, task))
+
+
+def _pending_state(query_id: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Body for a task that has no result yet; raises for failed/cancelled/expired ones."""
+    status = task.get("status")
+    if status == "error":
         raise HTTPException(status_code=400, detail=task.get("message", "task failed"))
-    # running
-    return JSONResponse(status_code=202, content={"status": "running"})
+    if status == "cancelled":
+        raise HTTPException(status_code=410, detail="query cancelled")
+    if status == "done":
+        # Finished but the stored result has since expired or been evicted
+        raise HTTPException(status_code=404, detail="result expired")
+    content: Dict[str, Any] = {"status": status}
+    # Queue position and live progress are only known to the worker running the job
+    if status == "queued":
+        content["position"] = SCHEDULER.position(query_id)
+    ctx = SCHEDULER.context(query_id)
+    job_progress = ctx.snapshot() if ctx is not None else task.get("progress")
+    if job_progress:
+        content["progress"] = job_progress
+    return content
+
+
+_STREAM_POLL_S = 0.5
+
+
+@app.get("/result/stream")
+async def result_stream(query_id: str = Query(...)):
+    """Server-Sent Events: ``progress`` events while the query runs, then one
+    ``result`` (the /result payload) or ``error`` event."""
+    if query_id not in STORE and TASKS.get(query_id) is None:
+        raise HTTPException(status_code=404, detail="query_id not found")
+
+    def _event(name: str, data: Any) -> str:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    async def _events():
+        give_up = time.monotonic() + SCHEDULER.timeout_s + 60
+        last: Optional[Dict[str, Any]] = None
+        while time.monotonic() < give_up:
+            entry = STORE.get(query_id) if query_id in STORE else None
+            if entry is not None:
+                yield _event("result", _stored_payload(entry, entry.include_timeseries))
+                return
+            task = TASKS.get(query_id)
+            if task is None:
+                yield _event("error", {"status_code": 404, "detail": "query_id not found"})
+                return
+            try:
+                state = _pending_state(query_id, task)
+            except HTTPException as exc:
+                # The job may have finished between the two lookups
+                entry = STORE.get(query_id)
+                if entry is not None:
+                    yield _event("result", _stored_payload(entry, entry.include_timeseries))
+                else:
+                    yield _event("error", {"status_code": exc.status_code, "detail": exc.detail})
+                return
+            if state != last:
+                yield _event("progress", state)
+                last = state
+            await asyncio.sleep(_STREAM_POLL_S)
+        yield _event("error", {"status_code": 504, "detail": "timed out waiting for the query"})
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+_DOWNLOAD_MEDIA = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "npz": "application/octet-stream",
+}
+_BINARY_FORMATS = {"arrow": "arrows", "parquet": "parquet", "npz": "npz"}
 
 
 @app.get("/download")
 def download(
     query_id: str = Query(..., description="Identifier returned by /query"),
-    format: str = Query("csv", pattern="^(csv|json)$"),
+    format: str = Query("csv", pattern="^(csv|json|ndjson|arrow|parquet|npz)$"),
     fields: str = Query(
         "all",
         pattern="^(all|result|timeseries)$",
         description="Portion of the cached payload to download",
     ),
+    accept_encoding: Optional[str] = Header(None),
 ):
-    payload = STORE.get(query_id)
-    if not payload:
+    entry = STORE.get(query_id)
+    if not entry:
         raise HTTPException(status_code=404, detail="query_id not found")
-
-    if format == "json":
-        if fields == "result":
-            data = {k: v for k, v in payload.items() if k != "timeseries"}
-        elif fields == "timeseries":
-            if payload.get("timeseries") is None:
-                raise HTTPException(
-                    status_code=400,
-                    detail="timeseries not available for this query",
-                )
-            data = {
-                "query_id": payload["query_id"],
-                "timeseries": payload["timeseries"],
-            }
-        else:  # all
-            data = payload
-        return JSONResponse(content=data)
-
-    # CSV export requires timeseries data
-    if payload.get("timeseries") is None:
-        raise HTTPException(
-            status_code=400,
-            detail="timeseries not available for CSV download",
-        )
-
-    meta = {
-        "query_id": payload["query_id"],
-        "condition": payload["condition"],
-        "location": f"{payload['location']['lat']},{payload['location']['lon']}",
-        "generated_at": payload["generated_at"],
-    }
-    csv_bytes = timeseries_to_csv(meta, payload["timeseries"])
-    filename = f"{payload['query_id']}.csv"
-    return StreamingResponse(
-        iter([csv_bytes]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    payload = {k: v for k, v in entry.payload.items() if k != "timeseries"}
+
+    # csv and the binary formats always export the timeseries
+    tabular = format == "csv" or format in _BINARY_FORMATS
+    series = entry.series() if tabular or fields != "result" else None
+    if series is None and (tabular or fields == "timeseries"):
+        what = f"{format.upper()} download" if tabular else "this query"
+        raise HTTPException(status_code=400, detail=f"timeseries not available for {what}")
+
+    headers: Dict[str, str] = {}
+    if format in _BINARY_FORMATS:
+        # Query metadata travels in the schema metadata
+        filename = f"{payload['query_id']}.{_BINARY_FORMATS[format]}"
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+        if format == "npz":
+            return Response(npz_bytes(payload, series), media_type=_DOWNLOAD_MEDIA[format], headers=headers)
+        try:
+            chunks = (iter_arrow if format == "arrow" else iter_parquet)(payload, series)
+        except ExportUnavailable as exc:
+            raise HTTPException(status_code=501, detail=str(exc)) from exc
+        if format == "parquet":
+            # Already compressed column chunks
+            return StreamingResponse(chunks, media_type=_DOWNLOAD_MEDIA[format], headers=headers)
+    elif format == "csv":
+        meta = {
+            "query_id": payload["query_id"],
+            "condition": payload.get("condition") or ",".join(payload.get("conditions", [])),
+            "location": f"{payload['location']['lat']},{payload['location']['lon']}",
+            "generated_at": payload["generated_at"],
+        }
+        chunks = iter_csv(meta, series)
+        headers["Content-Disposition"] = f"attachment; filename={payload['query_id']}.csv"
+    elif format == "ndjson":
+        # First line: the result document (unless only the timeseries is asked for)
+        chunks = iter_ndjson(None if fields == "timeseries" else payload, series)
+        headers["Content-Disposition"] = f"attachment; filename={payload['query_id']}.ndjson"
+    elif fields == "result":
+        chunks = iter_json(payload, None)
+    elif fields == "timeseries":
+        chunks = iter_json({"query_id": payload["query_id"]}, series)
+    else:  # all
+        chunks = iter_json({**payload, "timeseries": None}, series)
+
+    if accepts_gzip(accept_encoding):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=_DOWNLOAD_MEDIA[format], headers=headers)
 
 
 __all__ = ["app"]
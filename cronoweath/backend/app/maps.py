@@ -0,0 +1,317 @@
+# backend/app/maps.py
+"""Gridded probability maps for ``/map``.
+
+Engines with ``assemble_grid`` return the daily fields of a bbox as
+``(day, lat, lon)`` arrays on their native grid; the evaluator runs over
+those arrays directly, so one regional fetch yields the probability of
+every cell. Results are cached in blocks of ``MAP_BLOCK_DEG`` degrees per
+query key (condition, logic, thresholds, day, window, period): panning or
+widening a map only fetches the blocks not seen before, as one region
+covering all of them.
+"""
+from __future__ import annotations
+
+import io
+import json
+import math
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .evaluator import Check, evaluate_columns
+from .utils import round_exact
+
+# (lat_min, lat_max, lon_min, lon_max), inclusive
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass
+class GridData:
+    """Daily fields over a regular grid; ``lats``/``lons`` ascending, NaN = missing."""
+
+    dates: np.ndarray
+    lats: np.ndarray
+    lons: np.ndarray
+    fields: Dict[str, np.ndarray]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return len(self.dates), len(self.lats), len(self.lons)
+
+
+def axis_inside(coord: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """Indices of the cell centres within [lo, hi], or of the one nearest its middle."""
+    idx = np.nonzero((coord >= lo) & (coord <= hi))[0]
+    if idx.size == 0 and coord.size:
+        idx = np.array([int(np.abs(coord - (lo + hi) / 2.0).argmin())])
+    return idx
+
+
+@dataclass
+class ProbabilityGrid:
+    lats: np.ndarray
+    lons: np.ndarray
+    # Percent, 1 decimal; NaN where the sample is below the minimum
+    probability_pct: np.ndarray
+    n_days: np.ndarray
+
+    def crop(self, bbox: BBox) -> "ProbabilityGrid":
+        rows = axis_inside(self.lats, bbox[0], bbox[1])
+        cols = axis_inside(self.lons, bbox[2], bbox[3])
+        return ProbabilityGrid(
+            self.lats[rows],
+            self.lons[cols],
+            self.probability_pct[np.ix_(rows, cols)],
+            self.n_days[np.ix_(rows, cols)],
+        )
+
+
+def probability_grid(grid: GridData, checks: Sequence[Check], logic: str, min_sample: int) -> ProbabilityGrid:
+    """Exceedance probability per cell, counted over the day axis."""
+    columns = {check.field: grid.fields.get(check.field) for check in checks}
+    result = evaluate_columns(columns, checks, logic, grid.shape)
+    n_days = np.count_nonzero(result.considered, axis=0)
+    exceed = np.count_nonzero(result.exceed, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        probability = round_exact(100.0 * exceed / n_days, 1)
+    probability[n_days < max(min_sample, 1)] = np.nan
+    return ProbabilityGrid(grid.lats, grid.lons, probability, n_days.astype(np.int32))
+
+
+# ---------------------------------------------------------------------------
+# Block cache
+# ---------------------------------------------------------------------------
+
+MAP_BLOCK_DEG = float(os.getenv("MAP_BLOCK_DEG", "5"))
+
+
+def blocks_for(bbox: BBox, size: float = MAP_BLOCK_DEG) -> List[Tuple[int, int]]:
+    lat_min, lat_max, lon_min, lon_max = bbox
+    rows = range(math.floor((lat_min + 90.0) / size), math.floor((lat_max + 90.0) / size) + 1)
+    cols = range(math.floor((lon_min + 180.0) / size), math.floor((lon_max + 180.0) / size) + 1)
+    return [(row, col) for row in rows for col in cols]
+
+
+def block_bbox(block: Tuple[int, int], size: float = MAP_BLOCK_DEG) -> BBox:
+    """Half-open block bounds, so a cell centre on an edge belongs to one block only."""
+    lat_min = block[0] * size - 90.0
+    lon_min = block[1] * size - 180.0
+    eps = 1e-9
+    return lat_min, lat_min + size - eps, lon_min, lon_min + size - eps
+
+
+def _hull(boxes: Sequence[BBox]) -> BBox:
+    return (
+        min(box[0] for box in boxes),
+        max(box[1] for box in boxes),
+        min(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def _block_cells(grid: ProbabilityGrid, bbox: BBox) -> ProbabilityGrid:
+    # Unlike ``crop``, a block may hold no cell centre at all
+    rows = np.nonzero((grid.lats >= bbox[0]) & (grid.lats <= bbox[1]))[0]
+    cols = np.nonzero((grid.lons >= bbox[2]) & (grid.lons <= bbox[3]))[0]
+    return ProbabilityGrid(
+        grid.lats[rows],
+        grid.lons[cols],
+        grid.probability_pct[np.ix_(rows, cols)],
+        grid.n_days[np.ix_(rows, cols)],
+    )
+
+
+def mosaic(blocks: Dict[Tuple[int, int], ProbabilityGrid]) -> ProbabilityGrid:
+    """Stitch aligned blocks (rows of blocks share lats, columns share lons)."""
+    rows = sorted({row for row, _ in blocks})
+    cols = sorted({col for _, col in blocks})
+    lats = np.concatenate([blocks[(row, cols[0])].lats for row in rows])
+    lons = np.concatenate([blocks[(rows[0], col)].lons for col in cols])
+    probability = np.vstack(
+        [np.hstack([blocks[(row, col)].probability_pct for col in cols]) for row in rows]
+    )
+    n_days = np.vstack([np.hstack([blocks[(row, col)].n_days for col in cols]) for row in rows])
+    return ProbabilityGrid(lats, lons, probability, n_days)
+
+
+class MapCache:
+    """LRU of computed probability blocks, at most ``max_blocks`` entries."""
+
+    def __init__(self, max_blocks: int) -> None:
+        self.max_blocks = max(1, max_blocks)
+        self._lock = threading.Lock()
+        self._blocks: "OrderedDict[Hashable, ProbabilityGrid]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "MapCache":
+        return cls(int(os.getenv("MAP_CACHE_BLOCKS", "1024")))
+
+    def get(self, key: Hashable) -> Optional[ProbabilityGrid]:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, key: Hashable, block: ProbabilityGrid) -> None:
+        with self._lock:
+            self._blocks[key] = block
+            self._blocks.move_to_end(key)
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "blocks": len(self._blocks),
+                "max_blocks": self.max_blocks,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+MAP_CACHE = MapCache.from_env()
+
+
+def probability_map(
+    bbox: BBox,
+    key: Hashable,
+    compute: Callable[[BBox], ProbabilityGrid],
+    cache: MapCache = MAP_CACHE,
+) -> ProbabilityGrid:
+    """Probability grid over ``bbox`` from cached blocks, computing the missing
+    ones with a single ``compute`` call over their hull."""
+    wanted = blocks_for(bbox)
+    found: Dict[Tuple[int, int], ProbabilityGrid] = {}
+    missing: List[Tuple[int, int]] = []
+    for block in wanted:
+        cached = cache.get((key, block))
+        if cached is None:
+            missing.append(block)
+        else:
+            found[block] = cached
+    if missing:
+        computed = compute(_hull([block_bbox(block) for block in missing]))
+        for block in missing:
+            found[block] = _block_cells(computed, block_bbox(block))
+            cache.put((key, block), found[block])
+    return mosaic(found).crop(bbox)
+
+
+# ---------------------------------------------------------------------------
+# Encoders
+# ---------------------------------------------------------------------------
+
+def _json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def grid_npz(meta: Dict[str, Any], grid: ProbabilityGrid) -> bytes:
+    """Compressed ``.npz``: ``lat``, ``lon``, ``probability_pct`` (float32, NaN = no
+    data), ``n_days`` (int32), both (lat, lon) south to north, and ``metadata`` (JSON)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        lat=grid.lats,
+        lon=grid.lons,
+        probability_pct=grid.probability_pct.astype(np.float32),
+        n_days=grid.n_days,
+        metadata=np.array(_json(meta)),
+    )
+    return buffer.getvalue()
+
+
+# Probability (%) -> RGB, interpolated between stops
+_RAMP_STOPS = np.array([0.0, 25.0, 50.0, 75.0, 100.0])
+_RAMP_RGB = np.array(
+    [
+        [255, 255, 204],
+        [254, 217, 118],
+        [253, 141, 60],
+        [227, 26, 28],
+        [128, 0, 38],
+    ],
+    dtype=float,
+)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """8-bit RGBA PNG from an (height, width, 4) uint8 array."""
+    height, width, _ = rgba.shape
+    scanlines = np.zeros((height, 1 + width * 4), dtype=np.uint8)  # filter byte 0 per row
+    scanlines[:, 1:] = rgba.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def grid_png(grid: ProbabilityGrid, scale: int = 1) -> bytes:
+    """Heatmap, north up, ``scale`` x ``scale`` pixels per cell; no data is transparent."""
+    values = grid.probability_pct[::-1]
+    missing = np.isnan(values)
+    filled = np.where(missing, 0.0, values)
+    rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.round(np.interp(filled, _RAMP_STOPS, _RAMP_RGB[:, channel]))
+    rgba[..., 3] = np.where(missing, 0, 255)
+    if scale > 1:
+        rgba = np.repeat(np.repeat(rgba, scale, axis=0), scale, axis=1)
+    return encode_png(rgba)
+
+
+def grid_extent(grid: ProbabilityGrid) -> BBox:
+    """Outer edges (south, north, west, east) of the cells, for placing the image."""
+
+    def _half(coord: np.ndarray) -> float:
+        return float(np.min(np.diff(coord))) / 2.0 if coord.size > 1 else 0.0
+
+    dlat, dlon = _half(grid.lats), _half(grid.lons)
+    return (
+        float(grid.lats[0]) - dlat,
+        float(grid.lats[-1]) + dlat,
+        float(grid.lons[0]) - dlon,
+        float(grid.lons[-1]) + dlon,
+    )
+
+
+__all__ = [
+    "BBox",
+    "GridData",
+    "MAP_BLOCK_DEG",
+    "MAP_CACHE",
+    "MapCache",
+    "ProbabilityGrid",
+    "axis_inside",
+    "block_bbox",
+    "blocks_for",
+    "encode_png",
+    "grid_extent",
+    "grid_npz",
+    "grid_png",
+    "mosaic",
+    "probability_grid",
+    "probability_map",
+]
@@ -1,16 +1,43 @@
 ﻿# backend/app/meteomatics_engine.py
+"""Meteomatics API engine.
+
+Requests go through one pooled ``httpx.Client`` per process (and one
+``httpx.AsyncClient`` per event loop for the ``*_async`` variants), with
+keep-alive and HTTP/2 when the ``h2`` package is installed. Long periods
+are split into sub-requests of ``METEOMATICS_CHUNK_WINDOWS`` seasonal
+windows, run with at most ``METEOMATICS_CONCURRENCY`` in flight and
+retried with exponential backoff on 429/5xx and transport errors. A
+server's ``Retry-After`` is honoured up to ``METEOMATICS_MAX_BACKOFF``
+seconds, and no retry is scheduled past the ``METEOMATICS_TOTAL`` budget
+of the whole fetch.
+
+Responses are parsed straight into one array per parameter, indexed by
+day offset from the sub-request's first day. Sub-requests of at least
+``METEOMATICS_STREAM_MIN_DAYS`` days are streamed and parsed incrementally
+with the optional ``ijson`` package, which keeps memory flat but is
+slower; smaller ones (the default seasonal chunks) and every response
+without ``ijson`` are decoded whole with ``json.loads``.
+"""
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import os
-from datetime import date, timedelta
-from typing import Any, Dict, List, Tuple
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 import httpx
 import numpy as np
 
-from .formulas import compute_dew_point, compute_heat_index, compute_wind_chill
+from .formulas import dew_point_array, heat_index_array, wind_chill_array
+from .series import Series
+from .utils import round_exact, seasonal_windows
 
-BASE_URL = "https://api.meteomatics.com"
+BASE_URL = os.getenv("METEOMATICS_BASE_URL", "https://api.meteomatics.com").rstrip("/")
 PARAMETERS = {
     "t_max_2m_24h:C": "t2m_max",
     "t_min_2m_24h:C": "t2m_min",
@@ -20,7 +47,38 @@ PARAMETERS = {
     "precip_24h:mm": "precip_daily",
     "relative_humidity_max_2m_24h:p": "rh_max",
 }
+SERIES_FIELDS = (
+    "t2m_max",
+    "t2m_min",
+    "wind_speed_max",
+    "wind_speed_mean",
+    "wind_gust_p95",
+    "precip_daily",
+    "rh_max",
+)
 DEFAULT_TIMEOUT = float(os.getenv("METEOMATICS_TIMEOUT", "15"))
+CHUNK_WINDOWS = int(os.getenv("METEOMATICS_CHUNK_WINDOWS", "5"))
+CONCURRENCY = int(os.getenv("METEOMATICS_CONCURRENCY", "4"))
+RETRIES = int(os.getenv("METEOMATICS_RETRIES", "3"))
+BACKOFF_S = float(os.getenv("METEOMATICS_BACKOFF", "0.5"))
+MAX_BACKOFF_S = float(os.getenv("METEOMATICS_MAX_BACKOFF", "8"))
+TOTAL_S = float(os.getenv("METEOMATICS_TOTAL", "30"))
+STREAM_MIN_DAYS = int(os.getenv("METEOMATICS_STREAM_MIN_DAYS", "1500"))
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+logger = logging.getLogger("cronoweath.meteomatics")
+
+try:  # optional: HTTP/2 needs the h2 package (httpx[http2])
+    import h2  # noqa: F401
+
+    HTTP2 = True
+except ImportError:  # pragma: no cover - depends on the deployment
+    HTTP2 = False
+
+try:  # optional: incremental JSON parsing of the responses
+    import ijson
+except ImportError:  # pragma: no cover - depends on the deployment
+    ijson = None
 
 
 class MeteomaticsAuthError(RuntimeError):
@@ -45,38 +103,104 @@ def parse_target_day(value: str) -> Tuple[int, int]:
 
 
 def daterange_around(month: int, day: int, years: int, window: int) -> Tuple[str, str]:
-    today = date.today()
-    end_year = today.year - 1
-    start_year = end_year - (years - 1)
-    center_day = min(day, 28)
-    start = date(start_year, month, center_day) - timedelta(days=window)
-    end = date(end_year, month, center_day) + timedelta(days=window)
-    return start.isoformat(), end.isoformat()
+    windows = seasonal_windows(month, day, years, window)
+    return windows[0][0], windows[-1][1]
+
 
+def series_key(lat: float, lon: float, condition: str | None = None) -> Tuple[Any, ...]:
+    """Requests are point queries at 4-decimal precision (see ``_build_url``)."""
+    return round(lat, 4), round(lon, 4)
 
-def _build_url(start_iso: str, end_iso: str, lat: float, lon: float) -> str:
+
+def _build_url(windows: List[Tuple[str, str]], lat: float, lon: float) -> str:
+    """Build a multi-range request: one ``start--end:PT24H`` period per window."""
     params = ",".join(PARAMETERS.keys())
-    start_stamp = f"{start_iso}T00:00:00Z"
-    end_stamp = f"{end_iso}T00:00:00Z"
+    periods = ",".join(
+        f"{start_iso}T00:00:00Z--{end_iso}T00:00:00Z:PT24H" for start_iso, end_iso in windows
+    )
     return (
-        f"{BASE_URL}/{start_stamp}--{end_stamp}:PT24H/"
+        f"{BASE_URL}/{periods}/"
         f"{params}/{lat:.4f},{lon:.4f}/json"
     )
 
 
-def _to_float(value: Any) -> float | None:
-    if value is None:
-        return None
+# ---------------------------------------------------------------------------
+# Pooled clients
+# ---------------------------------------------------------------------------
+
+_CLIENT: Optional[httpx.Client] = None
+_CLIENT_LOCK = threading.Lock()
+_ASYNC_CLIENTS: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def _client_options() -> Dict[str, Any]:
+    connections = max(1, CONCURRENCY) * 2
+    return {
+        "http2": HTTP2,
+        "timeout": DEFAULT_TIMEOUT,
+        "limits": httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+    }
+
+
+def get_client() -> httpx.Client:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(**_client_options())
+        return _CLIENT
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Client of the running event loop (an ``AsyncClient`` cannot move between loops)."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        for old_loop in [item for item in _ASYNC_CLIENTS if item.is_closed()]:
+            del _ASYNC_CLIENTS[old_loop]
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+async def close_clients() -> None:
+    """Close the pooled clients (application shutdown)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        client, _CLIENT = _CLIENT, None
+    if client is not None:
+        client.close()
     try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # pragma: no cover - called outside a loop
+        return
+    async_client = _ASYNC_CLIENTS.pop(loop, None)
+    if async_client is not None:
+        await async_client.aclose()
+
+
+def _chunks(windows: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    size = max(1, CHUNK_WINDOWS)
+    return [windows[start:start + size] for start in range(0, len(windows), size)]
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """``Retry-After`` when the server sends seconds, else exponential backoff with jitter.
 
+    Either way the wait is capped at ``MAX_BACKOFF_S``.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF_S)
+    return min(BACKOFF_S * (2 ** attempt) + random.uniform(0, BACKOFF_S), MAX_BACKOFF_S)
 
-def fetch_daily_series(lat: float, lon: float, start_iso: str, end_iso: str) -> List[Dict[str, Any]]:
-    user, password = _credentials()
-    url = _build_url(start_iso, end_iso, lat, lon)
-    response = httpx.get(url, auth=(user, password), timeout=DEFAULT_TIMEOUT)
+
+def _may_retry(attempt: int, delay: float, deadline: float) -> bool:
+    """Whether another attempt fits: retries left, and the wait ends before ``deadline``."""
+    return attempt < RETRIES and time.monotonic() + delay < deadline
+
+
+def _check_response(response: httpx.Response) -> None:
+    """Raise for 4xx/5xx; the body of a streamed response must have been read."""
     if response.status_code == 401:
         raise MeteomaticsAuthError("Meteomatics authentication failed (401)")
     if response.status_code >= 400:
@@ -84,63 +208,250 @@ def fetch_daily_series(lat: float, lon: float, start_iso: str, end_iso: str) ->
             f"Meteomatics request failed ({response.status_code}): {response.text[:200]}"
         )
 
-    payload = response.json()
-    rows: Dict[str, Dict[str, Any]] = {}
 
-    for entry in payload.get("data", []):
-        parameter = entry.get("parameter")
-        field = PARAMETERS.get(parameter)
+def _fetch_chunk(
+    url: str,
+    auth: Tuple[str, str],
+    windows: List[Tuple[str, str]],
+    deadline: float,
+) -> Series:
+    client = get_client()
+    for attempt in range(RETRIES + 1):
+        try:
+            with client.stream("GET", url, auth=auth) as response:
+                retry = response.status_code in _RETRY_STATUS
+                delay = _retry_delay(attempt, response) if retry else 0.0
+                if not retry or not _may_retry(attempt, delay, deadline):
+                    if response.status_code >= 400:
+                        response.read()
+                        _check_response(response)
+                    return _parse_stream(response.iter_bytes(), windows)
+                # Read the (short) error body so the connection stays in the pool
+                response.read()
+        except httpx.TransportError as exc:
+            delay = _retry_delay(attempt, None)
+            if not _may_retry(attempt, delay, deadline):
+                raise
+            logger.warning("Meteomatics transport error (attempt %d): %s", attempt + 1, exc)
+        else:
+            logger.warning("Meteomatics %d (attempt %d)", response.status_code, attempt + 1)
+        time.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+async def _fetch_chunk_async(
+    url: str,
+    auth: Tuple[str, str],
+    windows: List[Tuple[str, str]],
+    deadline: float,
+) -> Series:
+    client = get_async_client()
+    for attempt in range(RETRIES + 1):
+        try:
+            async with client.stream("GET", url, auth=auth) as response:
+                retry = response.status_code in _RETRY_STATUS
+                delay = _retry_delay(attempt, response) if retry else 0.0
+                if not retry or not _may_retry(attempt, delay, deadline):
+                    if response.status_code >= 400:
+                        await response.aread()
+                        _check_response(response)
+                    return await _parse_stream_async(response.aiter_bytes(), windows)
+                await response.aread()
+        except httpx.TransportError as exc:
+            delay = _retry_delay(attempt, None)
+            if not _may_retry(attempt, delay, deadline):
+                raise
+            logger.warning("Meteomatics transport error (attempt %d): %s", attempt + 1, exc)
+        else:
+            logger.warning("Meteomatics %d (attempt %d)", response.status_code, attempt + 1)
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+# ---------------------------------------------------------------------------
+# Fetch and parse
+# ---------------------------------------------------------------------------
+
+def _to_float(value: Any) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_daily_series(lat: float, lon: float, windows: List[Tuple[str, str]]) -> Series:
+    auth = _credentials()
+    chunks = _chunks(windows)
+    deadline = time.monotonic() + TOTAL_S
+
+    def _fetch(chunk: List[Tuple[str, str]]) -> Series:
+        return _fetch_chunk(_build_url(chunk, lat, lon), auth, chunk, deadline)
+
+    if len(chunks) == 1:
+        parts = [_fetch(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(CONCURRENCY, len(chunks)))) as pool:
+            parts = list(pool.map(_fetch, chunks))
+    return _with_derived(Series.concat(parts))
+
+
+async def fetch_daily_series_async(lat: float, lon: float, windows: List[Tuple[str, str]]) -> Series:
+    """``fetch_daily_series`` on the event loop; sub-requests run concurrently."""
+    auth = _credentials()
+    slots = asyncio.Semaphore(max(1, CONCURRENCY))
+    deadline = time.monotonic() + TOTAL_S
+
+    async def _fetch(chunk: List[Tuple[str, str]]) -> Series:
+        async with slots:
+            return await _fetch_chunk_async(_build_url(chunk, lat, lon), auth, chunk, deadline)
+
+    parts = await asyncio.gather(*(_fetch(chunk) for chunk in _chunks(windows)))
+    return _with_derived(Series.concat(list(parts)))
+
+
+class DailyArrays:
+    """Base fields of one response, filled entry by entry.
+
+    Each parameter's values are written into a preallocated array indexed by
+    day offset from the first window's start, so days come out in order
+    without sorting; only days present in the response are kept.
+    """
+
+    def __init__(self, windows: List[Tuple[str, str]]) -> None:
+        self.start = np.datetime64(windows[0][0], "D")
+        size = int((np.datetime64(windows[-1][1], "D") - self.start).astype(np.int64)) + 1
+        self.values = {field: np.full(size, np.nan) for field in SERIES_FIELDS}
+        self.seen = np.zeros(size, dtype=bool)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """One ``data`` entry: ``{"parameter": ..., "coordinates": [{"dates": [...]}]}``."""
+        field = PARAMETERS.get(entry.get("parameter"))
         if field is None:
-            continue
+            return
         for coordinate in entry.get("coordinates", []):
-            for item in coordinate.get("dates", []):
-                date_iso = item.get("date")
-                if not date_iso:
-                    continue
-                day_key = date_iso[:10]
-                rows.setdefault(day_key, {})[field] = _to_float(item.get("value"))
-
-    sorted_days = sorted(rows.keys())
-    result: List[Dict[str, Any]] = []
-    for day in sorted_days:
-        raw = rows[day]
-        record: Dict[str, Any] = {"date": day}
-        for field in [
-            "t2m_max",
-            "t2m_min",
-            "wind_speed_max",
-            "wind_speed_mean",
-            "wind_gust_p95",
-            "precip_daily",
-            "rh_max",
-        ]:
-            if field in raw and raw[field] is not None:
-                record[field] = round(float(raw[field]), 2)
-
-        # Provide defaults for optional keys expected downstream
-        if "precip_rate_max" not in record:
-            record["precip_rate_max"] = None
-
-        temp_max = record.get("t2m_max")
-        temp_min = record.get("t2m_min")
-        rh_max = record.get("rh_max")
-        wind_speed = record.get("wind_speed_max") or record.get("wind_speed_mean")
-
-        hi = compute_heat_index(temp_max, rh_max)
-        if hi is not None:
-            record["hi_max"] = hi
-
-        dew = compute_dew_point(temp_max, rh_max)
-        if dew is not None:
-            record["dewpoint_max"] = dew
-
-        wc = compute_wind_chill(temp_min, wind_speed)
-        if wc is not None:
-            record["wc_min"] = wc
-
-        result.append(record)
-
-    return result
+            items = [item for item in coordinate.get("dates", []) if item.get("date")]
+            if not items:
+                continue
+            days = np.array([item["date"][:10] for item in items], dtype="datetime64[D]")
+            offsets = (days - self.start).astype(np.int64)
+            raw = [item.get("value") for item in items]
+            try:
+                values = np.array(raw, dtype=float)  # None -> NaN
+            except (TypeError, ValueError):
+                values = np.array([np.nan if (value := _to_float(item)) is None else value for item in raw])
+            # Days outside the requested span cannot be indexed and are dropped
+            inside = (offsets >= 0) & (offsets < self.seen.size)
+            self.values[field][offsets[inside]] = values[inside]
+            self.seen[offsets[inside]] = True
+
+    def series(self) -> Series:
+        days = np.flatnonzero(self.seen)
+        series = Series(self.start + days)
+        for field in SERIES_FIELDS:
+            series.set(field, round_exact(self.values[field][days], 2), present="finite")
+        return series
+
+
+class _ChunkReader:
+    """``read(size)`` over the body chunks: the file interface ``ijson`` pulls from."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._pending = b""
+
+    def _take(self, size: int) -> bytes:
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = chunk
+        return self._take(size)
+
+
+class _AsyncChunkReader(_ChunkReader):
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        super().__init__(iter(()))
+        self._async_chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:  # type: ignore[override]
+        while not self._pending:
+            chunk = await anext(self._async_chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = chunk
+        return self._take(size)
+
+
+def _streamed(windows: List[Tuple[str, str]]) -> bool:
+    """Whether to parse incrementally: ``ijson`` is there and the body is large."""
+    if ijson is None:
+        return False
+    days = sum(
+        int((np.datetime64(end, "D") - np.datetime64(start, "D")).astype(np.int64)) + 1
+        for start, end in windows
+    )
+    return days >= STREAM_MIN_DAYS
+
+
+def _parse_stream(chunks: Iterator[bytes], windows: List[Tuple[str, str]]) -> Series:
+    """Parse a response body, incrementally for large ones (see ``_streamed``):
+    at most one ``data`` entry (one parameter) is then materialized at a time."""
+    arrays = DailyArrays(windows)
+    if _streamed(windows):
+        entries = ijson.items(_ChunkReader(chunks), "data.item", use_float=True)
+    else:
+        entries = json.loads(b"".join(chunks)).get("data", [])
+    for entry in entries:
+        arrays.add(entry)
+    return arrays.series()
+
+
+async def _parse_stream_async(chunks: AsyncIterator[bytes], windows: List[Tuple[str, str]]) -> Series:
+    arrays = DailyArrays(windows)
+    if _streamed(windows):
+        async for entry in ijson.items_async(_AsyncChunkReader(chunks), "data.item", use_float=True):
+            arrays.add(entry)
+    else:
+        body = b"".join([chunk async for chunk in chunks])
+        for entry in json.loads(body).get("data", []):
+            arrays.add(entry)
+    return arrays.series()
+
+
+def _with_derived(series: Series) -> Series:
+    # Provide defaults for optional keys expected downstream
+    if "precip_rate_max" not in series:
+        series.set("precip_rate_max", np.full(len(series), np.nan))
+
+    temp_max = series.values("t2m_max")
+    temp_min = series.values("t2m_min")
+    rh_max = series.values("rh_max")
+    wind_max = series.values("wind_speed_max")
+    # Same fallback as ``wind_speed_max or wind_speed_mean`` (missing or zero max)
+    wind_speed = np.where(np.isnan(wind_max) | (wind_max == 0), series.values("wind_speed_mean"), wind_max)
+
+    series.set("hi_max", heat_index_array(temp_max, rh_max), present="finite")
+    series.set("dewpoint_max", dew_point_array(temp_max, rh_max), present="finite")
+    series.set("wc_min", wind_chill_array(temp_min, wind_speed), present="finite")
+    return series
+
+
+def assemble_windows(
+    lat: float,
+    lon: float,
+    windows: List[Tuple[str, str]],
+    condition: str | None = None,
+) -> Series:
+    """Series of the given inclusive ISO windows (every parameter is always requested)."""
+    return fetch_daily_series(lat, lon, windows)
 
 
 def assemble_series_real(
@@ -150,9 +461,26 @@ def assemble_series_real(
     target_day: int,
     years: int = 20,
     window: int = 15,
-) -> List[Dict[str, Any]]:
-    start_iso, end_iso = daterange_around(target_month, target_day, years, window)
-    series = fetch_daily_series(lat, lon, start_iso, end_iso)
+    condition: str | None = None,
+) -> Series:
+    windows = seasonal_windows(target_month, target_day, years, window)
+    series = fetch_daily_series(lat, lon, windows)
+    if not series:
+        raise RuntimeError("Meteomatics devolvió un conjunto vacío de datos")
+    return series
+
+
+async def assemble_series_real_async(
+    lat: float,
+    lon: float,
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | None = None,
+) -> Series:
+    windows = seasonal_windows(target_month, target_day, years, window)
+    series = await fetch_daily_series_async(lat, lon, windows)
     if not series:
         raise RuntimeError("Meteomatics devolvió un conjunto vacío de datos")
     return series
@@ -160,6 +488,8 @@ def assemble_series_real(
 
 __all__ = [
     "assemble_series_real",
+    "assemble_series_real_async",
+    "close_clients",
     "parse_target_day",
     "daterange_around",
 ]
@@ -5,11 +5,11 @@ from datetime import date, timedelta
 
 import numpy as np
 
-from .formulas import (
-    compute_dew_point,
-    compute_heat_index,
-    compute_wind_chill,
-)
+from .evaluator import compile_checks, evaluate_columns
+from .formulas import dew_point_array, heat_index_array, wind_chill_array
+from .maps import GridData, axis_inside
+from .series import Series
+from .utils import round_exact, seasonal_windows
 
 
 def parse_target_day(value: str) -> Tuple[int, int]:
@@ -19,13 +19,21 @@ def parse_target_day(value: str) -> Tuple[int, int]:
     return int(parts[0]), int(parts[1])
 
 
-def generate_daily_series(n_days: int, seed: int = 42) -> List[Dict[str, Any]]:
+def series_key(lat: float, lon: float, condition: str | None = None) -> Tuple[Any, ...]:
+    """Synthetic series do not depend on the location."""
+    return ()
+
+
+def generate_daily_series(n_days: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """Synthetic daily columns (rounded to 0.1) for ``n_days`` consecutive days."""
     rng = random.Random(seed)
-    series: List[Dict[str, Any]] = []
     base_t = 28 + rng.uniform(-3, 3)
     base_p = 8 + rng.uniform(-4, 4)
     base_w = 22 + rng.uniform(-8, 8)
 
+    raw: Dict[str, List[float]] = {
+        name: [] for name in ("tmax", "tmin", "rh", "wspd", "gust", "precip", "rate")
+    }
     for i in range(n_days):
         tmax = base_t + 6 * math.sin(i / 15.0) + rng.uniform(-2, 2)
         tmin = tmax - (5 + rng.uniform(0, 2))
@@ -34,86 +42,85 @@ def generate_daily_series(n_days: int, seed: int = 42) -> List[Dict[str, Any]]:
         gust = max(wspd, wspd + rng.uniform(5, 15))
         precip = max(0.0, base_p + 12 * max(0, math.sin(i / 7.0)) + rng.uniform(-5, 5))
         rate = max(0.0, precip / 6 + rng.uniform(0, 3))
+        for name, value in zip(raw, (tmax, tmin, rh, wspd, gust, precip, rate)):
+            raw[name].append(value)
+
+    cols = {name: np.array(values, dtype=float) for name, values in raw.items()}
+    hi = heat_index_array(cols["tmax"], cols["rh"])
+    dew = dew_point_array(cols["tmax"], cols["rh"])
+    wc = wind_chill_array(cols["tmin"], np.maximum(0.0, cols["wspd"]))
+
+    return {
+        "t2m_max": round_exact(cols["tmax"], 1),
+        "hi_max": round_exact(hi, 1),
+        "t2m_min": round_exact(cols["tmin"], 1),
+        "wc_min": round_exact(wc, 1),
+        "wind_speed_max": round_exact(cols["wspd"], 1),
+        "wind_gust_p95": round_exact(cols["gust"], 1),
+        "precip_daily": round_exact(cols["precip"], 1),
+        "precip_rate_max": round_exact(cols["rate"], 1),
+        "rh_max": round_exact(cols["rh"], 1),
+        "dewpoint_max": round_exact(dew, 1),
+    }
+
+
+def assemble_series(target_month: int, target_day: int, years: int = 20, window: int = 15) -> Series:
+    return assemble_windows(0.0, 0.0, seasonal_windows(target_month, target_day, years, window))
 
-        hi = compute_heat_index(tmax, rh)
-        dew = compute_dew_point(tmax, rh)
-        wc = compute_wind_chill(tmin, max(0.0, wspd))
-
-        series.append(
-            {
-                "date": None,
-                "t2m_max": round(tmax, 1),
-                "hi_max": None if hi is None else round(hi, 1),
-                "t2m_min": round(tmin, 1),
-                "wc_min": None if wc is None else round(wc, 1),
-                "wind_speed_max": round(wspd, 1),
-                "wind_gust_p95": round(gust, 1),
-                "precip_daily": round(precip, 1),
-                "precip_rate_max": round(rate, 1),
-                "rh_max": round(rh, 1),
-                "dewpoint_max": None if dew is None else round(dew, 1),
-            }
-        )
-
-    return series
-
-
-def assemble_series(target_month: int, target_day: int, years: int = 20, window: int = 15) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    today = date.today()
-    end_year = today.year - 1
-    start_year = end_year - (years - 1)
+
+def assemble_windows(
+    lat: float,
+    lon: float,
+    windows: List[Tuple[str, str]],
+    condition: str | None = None,
+) -> Series:
+    """Synthetic series of the given inclusive ISO windows, seeded by each window's year."""
+    parts: List[Series] = []
     seed = 1234
-    for year in range(start_year, end_year + 1):
-        center_day = min(target_day, 28)
-        start = date(year, target_month, center_day) - timedelta(days=window)
-        rows = generate_daily_series(2 * window + 1, seed=seed + year)
-        for offset, row in enumerate(rows):
-            row["date"] = (start + timedelta(days=offset)).isoformat()
-            results.append(row)
-    return results
+    for start_iso, end_iso in windows:
+        start = date.fromisoformat(start_iso)
+        n_days = (date.fromisoformat(end_iso) - start).days + 1
+        year = (start + timedelta(days=n_days // 2)).year
+        part = Series(np.arange(np.datetime64(start_iso), np.datetime64(end_iso) + 1))
+        for name, values in generate_daily_series(n_days, seed=seed + year).items():
+            part.set(name, values)
+        parts.append(part)
+    return Series.concat(parts)
+
+
+# Same spacing as MERRA-2, so maps have a realistic cell count
+_GRID_LATS = -90.0 + 0.5 * np.arange(361)
+_GRID_LONS = -180.0 + 0.625 * np.arange(576)
+
+
+def assemble_grid(
+    bbox: Tuple[float, float, float, float],
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | None = None,
+) -> GridData:
+    """The synthetic series repeated over every grid cell of ``bbox`` (no copies)."""
+    series = assemble_series(target_month, target_day, years=years, window=window)
+    lats = _GRID_LATS[axis_inside(_GRID_LATS, bbox[0], bbox[1])]
+    lons = _GRID_LONS[axis_inside(_GRID_LONS, bbox[2], bbox[3])]
+    shape = (len(series), lats.size, lons.size)
+    fields = {
+        name: np.broadcast_to(series.values(name)[:, None, None], shape) for name in series.fields
+    }
+    return GridData(series.dates, lats, lons, fields)
 
 
 def exceed(row: Dict[str, Any], condition: str, thr: Dict[str, Any], logic: str) -> bool:
-    checks: List[bool] = []
-
-    def has(key: str) -> float | None:
-        value = row.get(key)
-        return None if value is None else float(value)
-
-    if condition == "hot":
-        if thr.get("T_min") is not None and (val := has("t2m_max")) is not None:
-            checks.append(val >= float(thr["T_min"]))
-        if thr.get("HI_min") is not None and (val := has("hi_max")) is not None:
-            checks.append(val >= float(thr["HI_min"]))
-
-    elif condition == "cold":
-        if thr.get("T_max") is not None and (val := has("t2m_min")) is not None:
-            checks.append(val <= float(thr["T_max"]))
-        if thr.get("WC_max") is not None and (val := has("wc_min")) is not None:
-            checks.append(val <= float(thr["WC_max"]))
-
-    elif condition == "windy":
-        if thr.get("V_min") is not None and (val := has("wind_speed_max")) is not None:
-            checks.append(val >= float(thr["V_min"]))
-        if thr.get("gust_min") is not None and (val := has("wind_gust_p95")) is not None:
-            checks.append(val >= float(thr["gust_min"]))
-
-    elif condition == "wet":
-        if thr.get("P_daily") is not None and (val := has("precip_daily")) is not None:
-            checks.append(val >= float(thr["P_daily"]))
-        if thr.get("P_rate") is not None and (val := has("precip_rate_max")) is not None:
-            checks.append(val >= float(thr["P_rate"]))
-
-    elif condition == "muggy":
-        if thr.get("HI_min") is not None and (val := has("hi_max")) is not None:
-            checks.append(val >= float(thr["HI_min"]))
-        if thr.get("Td_min") is not None and (val := has("dewpoint_max")) is not None:
-            checks.append(val >= float(thr["Td_min"]))
-
-    if not checks:
-        return False
-    return all(checks) if logic == "ALL" else any(checks)
+    """Single-row check, kept for callers of the old helper; see ``evaluator``."""
+    checks = compile_checks(condition, thr)
+    columns = {
+        check.field: np.float64(np.nan if row.get(check.field) is None else float(row[check.field]))
+        for check in checks
+    }
+    result = evaluate_columns(columns, checks, "ALL" if logic == "ALL" else "ANY", ())
+    return bool(result.exceed)
 
 
 def summarize(values: List[float]) -> Dict[str, float]:
@@ -11,11 +11,20 @@ class Years(BaseModel):
     range: Optional[str] = None
     n_years: Optional[int] = None
 
+def _check_target_day(v: str) -> str:
+    import re
+    if not re.match(r"^\d{2}-\d{2}$|^\d{4}-\d{2}-\d{2}$", v):
+        raise ValueError("target_day debe ser 'MM-DD' o 'YYYY-MM-DD'")
+    return v
+
+ConditionName = Literal["hot", "cold", "windy", "wet", "muggy"]
+EngineName = Literal["mock", "nasa", "meteomatics", "hybrid"]
+
 class QueryRequest(BaseModel):
     location: Location
     # "MM-DD" o "YYYY-MM-DD"
     target_day: str = Field(..., description="MM-DD o YYYY-MM-DD")
-    condition: Literal["hot", "cold", "windy", "wet", "muggy"]
+    condition: ConditionName
     logic: Literal["ANY", "ALL"] = "ANY"
     units: Literal["SI", "Imperial"] = "SI"
 
@@ -33,14 +42,53 @@ class QueryRequest(BaseModel):
     include_timeseries: bool = False
     response_fields: Optional[List[str]] = None
 
+    # Motor de datos; por defecto el de la condición o CRONOWEATH_ENGINE
+    engine: Optional[EngineName] = None
+
     @field_validator("target_day")
     @classmethod
     def validate_day(cls, v: str):
-        import re
-        if not re.match(r"^\d{2}-\d{2}$|^\d{4}-\d{2}-\d{2}$", v):
-            raise ValueError("target_day debe ser 'MM-DD' o 'YYYY-MM-DD'")
+        return _check_target_day(v)
+
+class CurveRequest(QueryRequest):
+    # Umbral a barrer (p. ej. "T_min") y rango [desde, hasta]; por defecto ui_sliders
+    threshold: str
+    range: Optional[List[float]] = None
+    step: float = Field(1.0, gt=0)
+
+    @field_validator("range")
+    @classmethod
+    def validate_range(cls, v: Optional[List[float]]):
+        if v is not None and (len(v) != 2 or v[0] > v[1]):
+            raise ValueError("range debe ser [desde, hasta] con desde <= hasta")
         return v
 
+class MultiQueryRequest(BaseModel):
+    location: Location
+    target_day: str = Field(..., description="MM-DD o YYYY-MM-DD")
+    # Condiciones evaluadas sobre una única serie descargada
+    conditions: List[ConditionName] = Field(default_factory=lambda: ["hot", "cold", "windy", "wet", "muggy"], min_length=1)
+    # Lógica y overrides de umbrales por condición, p. ej. {"hot": {"T_min": 30}}
+    logic: Optional[Dict[ConditionName, Literal["ANY", "ALL"]]] = None
+    thresholds: Optional[Dict[ConditionName, Dict[str, Optional[float]]]] = None
+    units: Literal["SI", "Imperial"] = "SI"
+
+    window_days: int = 15
+    years_mode: Literal["lastN", "all"] = "lastN"
+    lastN_years: int = 20
+    include_timeseries: bool = False
+    engine: Optional[EngineName] = None
+
+    @field_validator("target_day")
+    @classmethod
+    def validate_day(cls, v: str):
+        return _check_target_day(v)
+
+    @field_validator("conditions")
+    @classmethod
+    def dedupe_conditions(cls, v: List[str]):
+        return list(dict.fromkeys(v))
+
 class SampleInfo(BaseModel):
     n_days: int
     coverage_pct: Optional[float] = None
@@ -63,6 +111,119 @@ class QueryResponse(BaseModel):
     generated_at: str
     timeseries: Optional[List[Dict[str, Any]]] = None
 
+class CurvePoint(BaseModel):
+    threshold: float
+    probability_pct: float
+    exceed_count: int
+
+class CurveResponse(BaseModel):
+    condition: str
+    logic: str
+    location: Location
+    target_day: str
+    window_days: int
+    years: Years
+    threshold: str
+    thresholds_resolved: Dict[str, Optional[float]]
+    curve: List[CurvePoint]
+    sample: SampleInfo
+    dataset_used: List[str]
+    notes: List[str]
+    units: Dict[str, str]
+    generated_at: str
+
+class ConditionResult(BaseModel):
+    status: Literal["ok", "insufficient_sample", "no_data"]
+    condition: str
+    logic: str
+    thresholds_resolved: Dict[str, Optional[float]]
+    probability_pct: Optional[float] = None
+    stats: Optional[Dict[str, float]] = None
+    sample: SampleInfo
+    dataset_used: List[str]
+    message: Optional[str] = None
+
+class BatchItemResult(BaseModel):
+    # Una línea del NDJSON de /query/batch; index = posición en el lote
+    index: int
+    status: Literal["ok", "insufficient_sample", "no_data", "error"]
+    condition: Optional[str] = None
+    logic: Optional[str] = None
+    location: Optional[Location] = None
+    target_day: Optional[str] = None
+    thresholds_resolved: Optional[Dict[str, Optional[float]]] = None
+    probability_pct: Optional[float] = None
+    stats: Optional[Dict[str, float]] = None
+    sample: Optional[SampleInfo] = None
+    message: Optional[str] = None
+
+class MapRequest(BaseModel):
+    # Caja [lat_min, lat_max, lon_min, lon_max] (sin cruzar el antimeridiano)
+    bbox: List[float]
+    target_day: str = Field(..., description="MM-DD o YYYY-MM-DD")
+    condition: ConditionName
+    logic: Literal["ANY", "ALL"] = "ANY"
+    units: Literal["SI", "Imperial"] = "SI"
+    thresholds: Optional[Dict[str, Optional[float]]] = None
+    window_days: int = 15
+    years_mode: Literal["lastN", "all"] = "lastN"
+    lastN_years: int = 20
+    # json: rejilla en JSON; npz: binaria compacta; png: mapa de calor (norte arriba)
+    format: Literal["json", "npz", "png"] = "json"
+    # Píxeles por celda en png
+    scale: int = Field(1, ge=1, le=32)
+    engine: Optional[EngineName] = None
+
+    @field_validator("target_day")
+    @classmethod
+    def validate_day(cls, v: str):
+        return _check_target_day(v)
+
+    @field_validator("bbox")
+    @classmethod
+    def validate_bbox(cls, v: List[float]):
+        if len(v) != 4:
+            raise ValueError("bbox debe ser [lat_min, lat_max, lon_min, lon_max]")
+        lat_min, lat_max, lon_min, lon_max = v
+        if not (-90 <= lat_min <= lat_max <= 90):
+            raise ValueError("bbox: se requiere -90 <= lat_min <= lat_max <= 90")
+        if not (-180 <= lon_min <= lon_max <= 180):
+            raise ValueError("bbox: se requiere -180 <= lon_min <= lon_max <= 180")
+        return v
+
+class MapResponse(BaseModel):
+    condition: str
+    logic: str
+    target_day: str
+    window_days: int
+    years: Years
+    bbox: List[float]
+    thresholds_resolved: Dict[str, Optional[float]]
+    # Centros de celda ascendentes; las filas de la rejilla van de sur a norte
+    lats: List[float]
+    lons: List[float]
+    # null donde la muestra es menor que min_sample_size
+    probability_pct: List[List[Optional[float]]]
+    n_days: List[List[int]]
+    min_sample_size: int
+    dataset_used: List[str]
+    notes: List[str]
+    units: Dict[str, str]
+    generated_at: str
+
+class MultiQueryResponse(BaseModel):
+    query_id: str
+    conditions: List[str]
+    location: Location
+    target_day: str
+    window_days: int
+    years: Years
+    results: Dict[str, ConditionResult]
+    notes: List[str]
+    units: Dict[str, str]
+    generated_at: str
+    timeseries: Optional[List[Dict[str, Any]]] = None
+
 class ErrorResponse(BaseModel):
     status: Literal["insufficient_sample", "error"]
     message: str
@@ -1,25 +1,29 @@
 ﻿# backend/app/nasa_engine.py
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
-from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple, TypeVar
 
 import numpy as np
 import xarray as xr
 import earthaccess as ea
-from pydap.cas.urs import setup_session as urs_setup_session
-import netrc as _netrc
+import contextlib
 import re
 import os
 import time
 import logging
-import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 
-from .formulas import (
-    compute_dew_point,
-    compute_heat_index,
-    compute_wind_chill,
-)
+from . import progress
+from .formulas import dew_point_array, heat_index_array, wind_chill_array
+from .maps import GridData
+from .point_cache import get_point_cache, missing_windows, window_days
+from .series import Series
+from .urs_sessions import get_pool as get_urs_pool
+from .utils import round_exact, seasonal_windows
+
+T = TypeVar("T")
 
 
 # ---------------------------------------------------------------------------
@@ -34,13 +38,18 @@ def parse_target_day(value: str) -> Tuple[int, int]:
 
 
 def daterange_around(month: int, day: int, years: int, window: int) -> Tuple[str, str]:
-    today = date.today()
-    end_year = today.year - 1
-    start_year = end_year - (years - 1)
-    center_day = min(day, 28)
-    start = date(start_year, month, center_day) - timedelta(days=window)
-    end = date(end_year, month, center_day) + timedelta(days=window)
-    return start.isoformat(), end.isoformat()
+    """Overall span covered by the seasonal windows (first start, last end)."""
+    windows = seasonal_windows(month, day, years, window)
+    return windows[0][0], windows[-1][1]
+
+
+def _clip_to_windows(ds: xr.Dataset, windows: List[Tuple[str, str]]) -> xr.Dataset:
+    """Keep only the time steps that fall inside one of the planned windows."""
+    days = ds["time"].values.astype("datetime64[D]")
+    keep = np.zeros(days.shape, dtype=bool)
+    for start, end in windows:
+        keep |= (days >= np.datetime64(start)) & (days <= np.datetime64(end))
+    return ds.isel(time=keep)
 
 
 # ---------------------------------------------------------------------------
@@ -52,14 +61,35 @@ def edl_login() -> ea.Auth:
 
 
 def cmr_search(short_name: str, start: str, end: str) -> List[ea.DataGranule]:
-    auth = edl_login()
-    results = ea.search_data(
-        short_name=short_name,
-        temporal=(start, end),
-        cloud_hosted=False,
-        count=-1,
-    )
-    return list(results)
+    return cmr_search_windows(short_name, [(start, end)])
+
+
+_CMR_CONCURRENCY = int(os.getenv("NASA_CMR_CONCURRENCY", "8"))
+
+
+def cmr_search_windows(short_name: str, windows: List[Tuple[str, str]]) -> List[ea.DataGranule]:
+    """Search CMR once per planned window so only in-season granules are listed.
+
+    The searches (one round-trip each) run concurrently, at most
+    ``NASA_CMR_CONCURRENCY`` at a time; granules keep the windows' order.
+    CMR search is public, so no Earthdata login is needed here.
+    """
+
+    def _search(window: Tuple[str, str]) -> List[ea.DataGranule]:
+        return list(
+            ea.search_data(
+                short_name=short_name,
+                temporal=window,
+                cloud_hosted=False,
+                count=-1,
+            )
+        )
+
+    if len(windows) <= 1:
+        return [granule for window in windows for granule in _search(window)]
+    workers = max(1, min(_CMR_CONCURRENCY, len(windows)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cmr") as pool:
+        return [granule for found in pool.map(_search, windows) for granule in found]
 
 
 def _to_opendap_url(link: str) -> str:
@@ -134,42 +164,60 @@ def _to_dds(endpoint: str) -> str:
     return endpoint + ".dds"
 
 
-def _open_opendap_dataset(url: str) -> xr.Dataset:
+def _open_opendap_dataset(
+    url: str,
+    deadline: float | None = None,
+    stack: contextlib.ExitStack | None = None,
+) -> xr.Dataset:
     """Attempt to open an OPeNDAP dataset trying host and endpoint variants with URS session.
 
     Adds detailed logging and short, bounded timeouts to avoid edge timeouts (502).
+    ``deadline`` is a ``time.monotonic()`` value shared by a whole granule batch;
+    when omitted the ``NASA_DAP_TOTAL`` budget starts with this call.
+
+    Sessions come from the process-wide URS pool. The dataset reads lazily
+    through its session, so callers pass ``stack`` to keep the session leased
+    until they are done with the dataset; without it the lease ends on return.
     """
     logger = logging.getLogger("cronoweath.nasa")
-    timeout_s = float(os.getenv("NASA_DAP_TIMEOUT", "12"))  # per attempt
-    max_total_s = float(os.getenv("NASA_DAP_TOTAL", "22"))   # hard stop to avoid 20s edge limit
+    pool = get_urs_pool()
+    timeout_s = pool.timeout_s  # per attempt
     t0 = time.monotonic()
-    nrc = _netrc.netrc()
-    auth = nrc.authenticators("urs.earthdata.nasa.gov")
-    if not auth:
-        raise RuntimeError("Credenciales URS no encontradas en ~/.netrc")
-    username, _, password = auth
+    if deadline is None:
+        deadline = t0 + float(os.getenv("NASA_DAP_TOTAL", "22"))  # hard stop to avoid 20s edge limit
+    pool.credentials()  # fail fast when ~/.netrc has no URS entry
 
     last_error: Exception | None = None
     for host_url in _host_alternatives(url):
         for endpoint in _dap_variants(host_url):
+            attempt = contextlib.ExitStack()
             try:
-                session = urs_setup_session(username, password, check_url=endpoint)
-                # Inject per-request timeout into the session
-                session.request = functools.partial(session.request, timeout=timeout_s)  # type: ignore[attr-defined]
+                # The slot of the host actually read (goldsmr5/gpm2 on failover)
+                attempt.enter_context(_host_slot(endpoint, deadline))
+                session = attempt.enter_context(pool.lease(endpoint, deadline))
                 # Quick probe on .dds to avoid hanging inside pydap/xarray
                 probe = _to_dds(endpoint)
                 logger.info("OPeNDAP probe=%s timeout=%ss", probe, timeout_s)
                 resp = session.get(probe)
-                if getattr(resp, "status_code", 200) >= 400:
-                    raise RuntimeError(f"probe failed code={getattr(resp,'status_code',None)} url={probe}")
+                code = getattr(resp, "status_code", 200)
+                if code in (401, 403):
+                    # Expired cookies/credentials: drop the session so the pool re-authenticates
+                    pool.invalidate(session)
+                if code >= 400:
+                    raise RuntimeError(f"probe failed code={code} url={probe}")
                 logger.info("OPeNDAP try endpoint=%s timeout=%ss", endpoint, timeout_s)
                 ds = xr.open_dataset(endpoint, engine="pydap", backend_kwargs={"session": session})
                 logger.info("OPeNDAP success endpoint=%s took=%.2fs", endpoint, time.monotonic() - t0)
+                if stack is not None:
+                    stack.enter_context(attempt.pop_all())
+                else:
+                    attempt.close()
                 return ds
             except Exception as exc:
+                attempt.close()
                 last_error = exc
                 logger.warning("OPeNDAP fail endpoint=%s err=%s", endpoint, exc)
-                if (time.monotonic() - t0) > max_total_s:
+                if time.monotonic() > deadline:
                     logger.error("OPeNDAP abort after %.2fs (edge timeout guard)", time.monotonic() - t0)
                     raise last_error
                 continue
@@ -177,12 +225,94 @@ def _open_opendap_dataset(url: str) -> xr.Dataset:
     try:
         endpoint = _prefer_server(url)
         logger.info("OPeNDAP fallback open raw url=%s", endpoint)
-        return xr.open_dataset(endpoint)
+        attempt = contextlib.ExitStack()
+        attempt.enter_context(_host_slot(endpoint, deadline))
+        try:
+            ds = xr.open_dataset(endpoint)
+        except BaseException:
+            attempt.close()
+            raise
+        if stack is not None:
+            stack.enter_context(attempt)
+        else:
+            attempt.close()
+        return ds
     except Exception as exc:
         logger.error("OPeNDAP fallback failed url=%s err=%s", endpoint, exc)
         raise exc if last_error is None else last_error
 
 
+# ---------------------------------------------------------------------------
+# Concurrent granule reader
+# ---------------------------------------------------------------------------
+
+_DAP_CONCURRENCY = int(os.getenv("NASA_DAP_CONCURRENCY", "8"))
+_DAP_PER_HOST = int(os.getenv("NASA_DAP_PER_HOST", "4"))
+_HOST_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_HOST_SLOTS_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def _host_slot(endpoint: str, deadline: float | None = None) -> Iterator[None]:
+    """Hold one of the NASA_DAP_PER_HOST read slots of ``endpoint``'s host.
+
+    Keyed on the host actually contacted, so goldsmr4/5 and gpm1/2 each get
+    their own limit. Waiting for a slot stops at ``deadline``.
+    """
+    host = urlsplit(endpoint).netloc
+    with _HOST_SLOTS_LOCK:
+        slot = _HOST_SLOTS.get(host)
+        if slot is None:
+            slot = _HOST_SLOTS[host] = threading.BoundedSemaphore(max(1, _DAP_PER_HOST))
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    if not slot.acquire(timeout=timeout):
+        raise TimeoutError(f"no OPeNDAP read slot free for {host}")
+    try:
+        yield
+    finally:
+        slot.release()
+
+
+def _read_granules(
+    urls: List[str],
+    read_one: Callable[[str, float], T],
+    concurrency: int | None = None,
+) -> List[T]:
+    """Run ``read_one(url, deadline)`` over a bounded thread pool.
+
+    ``NASA_DAP_TOTAL`` applies to the whole batch: every granule shares one
+    deadline and the batch aborts once it passes. Results are returned in the
+    order of ``urls`` (time order, as granule names embed the date). A
+    cancelled fetch (``progress.cancellable``) stops after the granules
+    already being read; the queued ones are dropped.
+    """
+    logger = logging.getLogger("cronoweath.nasa")
+    if not urls:
+        return []
+    progress.check_cancelled()
+    t0 = time.monotonic()
+    deadline = t0 + float(os.getenv("NASA_DAP_TOTAL", "22"))
+    workers = max(1, min(concurrency or _DAP_CONCURRENCY, len(urls)))
+
+    results: List[Any] = [None] * len(urls)
+    progress.add(granules_total=len(urls))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="opendap")
+    try:
+        futures = {pool.submit(read_one, url, deadline): idx for idx, url in enumerate(urls)}
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - t0)):
+                results[futures[future]] = future.result()
+                progress.add(granules_done=1)
+                progress.check_cancelled()
+        except TimeoutError as exc:
+            logger.error("OPeNDAP batch abort after %.2fs (edge timeout guard)", time.monotonic() - t0)
+            raise RuntimeError(f"OPeNDAP batch exceeded NASA_DAP_TOTAL ({len(urls)} granules)") from exc
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    logger.info("OPeNDAP batch granules=%d workers=%d took=%.2fs", len(urls), workers, time.monotonic() - t0)
+    return results
+
+
 def _extract_links(granule: Any) -> List[str]:
     """Try multiple earthaccess APIs to extract downloadable links from a granule."""
     # Prefer newer API first
@@ -246,6 +376,48 @@ def granules_to_opendap_urls(granules: List[ea.DataGranule]) -> List[str]:
 # Spatial helpers
 # ---------------------------------------------------------------------------
 
+class Grid(NamedTuple):
+    """Regular lat/lon grid given by its first cell centre and spacing."""
+    lat0: float
+    dlat: float
+    lon0: float
+    dlon: float
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return int(round(180.0 / self.dlat)) + (1 if self.lat0 == -90.0 else 0), int(round(360.0 / self.dlon))
+
+
+MERRA2_GRID = Grid(-90.0, 0.5, -180.0, 0.625)
+IMERG_GRID = Grid(-89.95, 0.1, -179.95, 0.1)
+
+
+def snap_cell(grid: Grid, lat: float, lon: float) -> Tuple[int, int]:
+    """Index (i, j) of the grid cell whose centre is nearest to (lat, lon)."""
+    n_lat, n_lon = grid.shape
+    lon = ((lon + 180.0) % 360.0) - 180.0
+    i = min(max(int(round((lat - grid.lat0) / grid.dlat)), 0), n_lat - 1)
+    j = int(round((lon - grid.lon0) / grid.dlon)) % n_lon
+    return i, j
+
+
+def cell_center(grid: Grid, cell: Tuple[int, int]) -> Tuple[float, float]:
+    return grid.lat0 + cell[0] * grid.dlat, grid.lon0 + cell[1] * grid.dlon
+
+
+def _needs_precip(condition: str | Sequence[str] | None) -> bool:
+    """IMERG is only read for "wet"; ``condition`` may list several conditions."""
+    if condition is None or isinstance(condition, str):
+        return condition == "wet"
+    return "wet" in condition
+
+
+def series_key(lat: float, lon: float, condition: str | Sequence[str] | None = None) -> Tuple[Any, ...]:
+    """Identity of the fetched series: points in the same grid cell(s) share data."""
+    imerg_cell = snap_cell(IMERG_GRID, lat, lon) if _needs_precip(condition) else None
+    return snap_cell(MERRA2_GRID, lat, lon), imerg_cell
+
+
 def to_360(lon: float) -> float:
     return lon if lon >= 0 else lon + 360.0
 
@@ -258,6 +430,86 @@ def select_point(ds: xr.Dataset, lat: float, lon: float) -> xr.Dataset:
     return ds.sel({lat_var: lat, lon_var: lon}, method="nearest")
 
 
+class Region(NamedTuple):
+    """Area read from each granule in one go: a set of points or a bbox.
+
+    ``points`` are (lat, lon) pairs, each taken from its nearest grid cell
+    (as ``select_point`` does) and stacked along a ``point`` dimension. With
+    ``bbox`` = (lat_min, lat_max, lon_min, lon_max) the block keeps its
+    ``lat``/``lon`` dimensions: every cell whose centre lies inside, or the
+    one nearest to the box centre when none does.
+    """
+    points: Tuple[Tuple[float, float], ...] = ()
+    bbox: Tuple[float, float, float, float] | None = None
+
+
+def _nearest_index(coord: np.ndarray, value: float) -> int:
+    return int(np.abs(coord - value).argmin())
+
+
+def _inside_span(coord: np.ndarray, lo: float, hi: float) -> slice:
+    idx = np.nonzero((coord >= lo) & (coord <= hi))[0]
+    if idx.size == 0:
+        mid = _nearest_index(coord, (lo + hi) / 2.0)
+        return slice(mid, mid + 1)
+    return slice(int(idx.min()), int(idx.max()) + 1)
+
+
+def select_region(ds: xr.Dataset, region: Region) -> xr.Dataset:
+    """Read the region's block with index ranges and pick its points in memory.
+
+    Slicing with ``isel`` becomes an OPeNDAP hyperslab constraint
+    (``var[t0:t1][i0:i1][j0:j1]``), so each variable costs one request
+    covering the hull of the points (or the bbox), instead of one open and
+    read per point. Subset ``ds`` to the variables needed first: the whole
+    block is loaded.
+    """
+    lon_var = "lon" if "lon" in ds.coords else "longitude"
+    lat_var = "lat" if "lat" in ds.coords else "latitude"
+    lats = np.asarray(ds[lat_var].values, dtype=float)
+    lons = np.asarray(ds[lon_var].values, dtype=float)
+    wrap = lons.max() > 180
+
+    def _lon(value: float) -> float:
+        return to_360(value) if wrap and value < 0 else value
+
+    if region.bbox is not None:
+        lat_min, lat_max, lon_min, lon_max = region.bbox
+        spans = {
+            lat_var: _inside_span(lats, lat_min, lat_max),
+            lon_var: _inside_span(lons, _lon(lon_min), _lon(lon_max)),
+        }
+        return ds.isel(spans).load()
+
+    rows = np.array([_nearest_index(lats, lat) for lat, _ in region.points])
+    cols = np.array([_nearest_index(lons, _lon(lon)) for _, lon in region.points])
+    block = ds.isel(
+        {lat_var: slice(int(rows.min()), int(rows.max()) + 1), lon_var: slice(int(cols.min()), int(cols.max()) + 1)}
+    ).load()
+    return block.isel(
+        {
+            lat_var: xr.DataArray(rows - rows.min(), dims="point"),
+            lon_var: xr.DataArray(cols - cols.min(), dims="point"),
+        }
+    )
+
+
+_REGION_TILE = int(os.getenv("NASA_REGION_TILE", "16"))
+
+
+def region_tiles(points: Sequence[Tuple[float, float]], tile: int | None = None) -> List[List[int]]:
+    """Indices of ``points`` grouped by ``tile`` x ``tile`` blocks of MERRA-2 cells.
+
+    Bounds the size of each regional read when points are far apart.
+    """
+    size = max(1, tile or _REGION_TILE)
+    tiles: Dict[Tuple[int, int], List[int]] = {}
+    for idx, (lat, lon) in enumerate(points):
+        i, j = snap_cell(MERRA2_GRID, lat, lon)
+        tiles.setdefault((i // size, j // size), []).append(idx)
+    return list(tiles.values())
+
+
 # ---------------------------------------------------------------------------
 # Unit conversions and aggregations
 # ---------------------------------------------------------------------------
@@ -290,147 +542,467 @@ def wind_speed(u10: xr.DataArray, v10: xr.DataArray) -> xr.DataArray:
 # Dataset readers
 # ---------------------------------------------------------------------------
 
-def merra2_daily_point(lat: float, lon: float, start: str, end: str) -> Dict[str, xr.DataArray]:
-    granules = cmr_search("M2T1NXSLV", start, end)
-    urls = granules_to_opendap_urls(granules)
-    if not urls:
-        raise RuntimeError("No se encontraron granulos MERRA-2 en el rango solicitado.")
+# Picks the point(s) out of a time-clipped granule (``select_point``/``select_region``)
+Selector = Callable[[xr.Dataset], xr.Dataset]
 
-    tmax_list: List[xr.DataArray] = []
-    tmin_list: List[xr.DataArray] = []
-    wmax_list: List[xr.DataArray] = []
-    gust95_list: List[xr.DataArray] = []
-    rhmax_list: List[xr.DataArray] = []
+_MERRA2_VARS = ("T2M", "U10M", "V10M", "RH2M")
 
-    for url in urls:
-        ds = _open_opendap_dataset(url)
-        # Recorta por tiempo lo antes posible para reducir I/O
-        try:
-            ds = ds.sel(time=slice(start, end))
-        except Exception:
-            pass
-        ds = select_point(ds, lat, lon)
 
-        T2M = ds["T2M"]
-        U10M = ds.get("U10M")
-        V10M = ds.get("V10M")
-        RH2M = ds.get("RH2M")
+def _merra2_granule(
+    url: str,
+    select: Selector,
+    windows: List[Tuple[str, str]],
+    deadline: float | None = None,
+) -> Dict[str, xr.DataArray | None]:
+    with contextlib.ExitStack() as stack:
+        ds = _open_opendap_dataset(url, deadline, stack)
+        return _merra2_extract(ds, select, windows)
 
-        if not np.issubdtype(ds["time"].dtype, np.datetime64):
-            ds["time"] = xr.decode_cf(ds).time
 
-        tmax_list.append(daily_agg_max(K_to_C(T2M)))
-        tmin_list.append(daily_agg_min(K_to_C(T2M)))
+def _merra2_extract(
+    ds: xr.Dataset,
+    select: Selector,
+    windows: List[Tuple[str, str]],
+) -> Dict[str, xr.DataArray | None]:
+    # Recorta por tiempo lo antes posible para reducir I/O
+    try:
+        ds = _clip_to_windows(ds, windows)
+    except Exception:
+        pass
+    ds = select(ds[[name for name in _MERRA2_VARS if name in ds.data_vars]])
+
+    T2M = ds["T2M"]
+    U10M = ds.get("U10M")
+    V10M = ds.get("V10M")
+    RH2M = ds.get("RH2M")
+
+    if not np.issubdtype(ds["time"].dtype, np.datetime64):
+        ds["time"] = xr.decode_cf(ds).time
+
+    out: Dict[str, xr.DataArray | None] = {
+        "t2m_max": daily_agg_max(K_to_C(T2M)),
+        "t2m_min": daily_agg_min(K_to_C(T2M)),
+        "wind_speed_max": None,
+        "wind_gust_p95": None,
+        "rh_max": None,
+    }
 
-        if U10M is not None and V10M is not None:
-            wspd = wind_speed(U10M, V10M)
-            wspd_kmh = ms_to_kmh(wspd)
-            wmax_list.append(daily_agg_max(wspd_kmh))
-            gust95_list.append(wspd_kmh.resample(time="1D").reduce(np.nanpercentile, q=95))
+    if U10M is not None and V10M is not None:
+        wspd = wind_speed(U10M, V10M)
+        wspd_kmh = ms_to_kmh(wspd)
+        out["wind_speed_max"] = daily_agg_max(wspd_kmh)
+        out["wind_gust_p95"] = wspd_kmh.resample(time="1D").reduce(np.nanpercentile, q=95)
 
-        if RH2M is not None:
-            rhmax_list.append(daily_agg_max(RH2M))
+    if RH2M is not None:
+        out["rh_max"] = daily_agg_max(RH2M)
 
-        try:
-            ds.close()
-        except Exception:
-            pass
+    try:
+        ds.close()
+    except Exception:
+        pass
+    return out
 
-    def _combine(items: List[xr.DataArray]) -> xr.DataArray | None:
+
+def _merra2_daily(windows: List[Tuple[str, str]], select: Selector) -> Dict[str, xr.DataArray]:
+    granules = cmr_search_windows("M2T1NXSLV", windows)
+    urls = granules_to_opendap_urls(granules)
+    if not urls:
+        raise RuntimeError("No se encontraron granulos MERRA-2 en el rango solicitado.")
+
+    per_granule = _read_granules(
+        urls, lambda url, deadline: _merra2_granule(url, select, windows, deadline)
+    )
+
+    def _combine(field: str) -> xr.DataArray | None:
+        items = [item[field] for item in per_granule if item[field] is not None]
         return xr.concat(items, dim="time").sortby("time") if items else None
 
     return {
-        "t2m_max": _combine(tmax_list),
-        "t2m_min": _combine(tmin_list),
-        "wind_speed_max": _combine(wmax_list),
-        "wind_gust_p95": _combine(gust95_list),
-        "rh_max": _combine(rhmax_list),
+        field: _combine(field)
+        for field in ("t2m_max", "t2m_min", "wind_speed_max", "wind_gust_p95", "rh_max")
     }
 
 
-def imerg_daily_point(lat: float, lon: float, start: str, end: str) -> xr.DataArray:
-    granules = cmr_search("GPM_3IMERGDF", start, end)
+def merra2_daily_point(lat: float, lon: float, windows: List[Tuple[str, str]]) -> Dict[str, xr.DataArray]:
+    return _merra2_daily(windows, lambda ds: select_point(ds, lat, lon))
+
+
+def merra2_daily_region(region: Region, windows: List[Tuple[str, str]]) -> Dict[str, xr.DataArray]:
+    """Daily MERRA-2 fields over ``region``: dims (time, point) or (time, lat, lon)."""
+    return _merra2_daily(windows, lambda ds: select_region(ds, region))
+
+
+def _imerg_granule(
+    url: str,
+    select: Selector,
+    windows: List[Tuple[str, str]],
+    deadline: float | None = None,
+) -> xr.DataArray:
+    with contextlib.ExitStack() as stack:
+        ds = _open_opendap_dataset(url, deadline, stack)
+        return _imerg_extract(ds, select, windows)
+
+
+def _imerg_extract(
+    ds: xr.Dataset,
+    select: Selector,
+    windows: List[Tuple[str, str]],
+) -> xr.DataArray:
+    # Recorta por tiempo lo antes posible
+    try:
+        ds = _clip_to_windows(ds, windows)
+    except Exception:
+        pass
+    var = "precipitation" if "precipitation" in ds.data_vars else "precipitationCal"
+    ds = select(ds[[var]])
+    if not np.issubdtype(ds["time"].dtype, np.datetime64):
+        ds["time"] = xr.decode_cf(ds).time
+    pr = ds[var].load()
+    try:
+        ds.close()
+    except Exception:
+        pass
+    return pr
+
+
+def _imerg_daily(windows: List[Tuple[str, str]], select: Selector) -> xr.DataArray:
+    granules = cmr_search_windows("GPM_3IMERGDF", windows)
     urls = granules_to_opendap_urls(granules)
     if not urls:
         raise RuntimeError("No se encontraron granulos IMERG Daily en el rango solicitado.")
 
-    series: List[xr.DataArray] = []
-    for url in urls:
-        ds = _open_opendap_dataset(url)
-        # Recorta por tiempo lo antes posible
-        try:
-            ds = ds.sel(time=slice(start, end))
-        except Exception:
-            pass
-        ds = select_point(ds, lat, lon)
-        var = "precipitation" if "precipitation" in ds.data_vars else "precipitationCal"
-        pr = ds[var]
-        if not np.issubdtype(ds["time"].dtype, np.datetime64):
-            ds["time"] = xr.decode_cf(ds).time
-        series.append(pr)
-        try:
-            ds.close()
-        except Exception:
-            pass
-
+    series = _read_granules(
+        urls, lambda url, deadline: _imerg_granule(url, select, windows, deadline)
+    )
     return xr.concat(series, dim="time").sortby("time")
 
 
+def imerg_daily_point(lat: float, lon: float, windows: List[Tuple[str, str]]) -> xr.DataArray:
+    return _imerg_daily(windows, lambda ds: select_point(ds, lat, lon))
+
+
+def imerg_daily_region(region: Region, windows: List[Tuple[str, str]]) -> xr.DataArray:
+    """Daily IMERG precipitation over ``region`` (dims as in ``merra2_daily_region``)."""
+    return _imerg_daily(windows, lambda ds: select_region(ds, region))
+
+
+# (points, windows) -> per point, daily fields with a single ``time`` dimension
+FetchMany = Callable[
+    [List[Tuple[float, float]], List[Tuple[str, str]]], List[Dict[str, xr.DataArray | None]]
+]
+
+
+def _cached_daily_many(
+    dataset: str,
+    grid: Grid,
+    points: Sequence[Tuple[float, float]],
+    windows: List[Tuple[str, str]],
+    fetch: FetchMany,
+) -> List[Dict[str, xr.DataArray | None]]:
+    """Serve daily fields for several points from the on-disk cache, fetching only missing days.
+
+    Points are snapped to their grid cell, so nearby queries in the same cell
+    share cache entries; fetches use the cell centre so the nearest-neighbour
+    selection lands on that same cell. Cells with missing days are fetched
+    together in a single ``fetch`` covering the union of their missing windows.
+    """
+    cache = get_point_cache()
+    if cache is None:
+        return fetch(list(points), windows)
+
+    logger = logging.getLogger("cronoweath.nasa")
+    days = window_days(windows)
+    cells = [snap_cell(grid, lat, lon) for lat, lon in points]
+    unique = list(dict.fromkeys(cells))
+    cached = {cell: cache.read(dataset, cell, days) for cell in unique}
+    stale = [cell for cell in unique if not all(mask.all() for mask in cached[cell][1].values())]
+    missing = np.zeros(days.shape, dtype=bool)
+    for cell in stale:
+        for mask in cached[cell][1].values():
+            missing |= ~mask
+    todo = missing_windows(days, ~missing)
+    logger.info(
+        "cache %s cells=%d stale=%d days=%d missing_windows=%d",
+        dataset, len(unique), len(stale), days.size, len(todo),
+    )
+    if todo:
+        fresh_all = fetch([cell_center(grid, cell) for cell in stale], todo)
+        for cell, fresh in zip(stale, fresh_all):
+            values, fetched = cached[cell]
+            # Per field: a field missing from this read (no variable in the
+            # granule, failed read) stays unfetched and is read again next time
+            got = {name: np.zeros(days.shape, dtype=bool) for name in values}
+            new_values = {name: np.full(days.shape, np.nan) for name in values}
+            for name, data_array in fresh.items():
+                if data_array is None or name not in new_values:
+                    continue
+                stamps = data_array["time"].values.astype("datetime64[D]")
+                idx = np.clip(np.searchsorted(days, stamps), 0, days.size - 1)
+                ok = days[idx] == stamps
+                new_values[name][idx[ok]] = np.asarray(data_array.values, dtype=float)[ok]
+                got[name][idx[ok]] = True
+            if any(mask.any() for mask in got.values()):
+                cache.write(dataset, cell, days, new_values, got)
+                for name, mask in got.items():
+                    values[name][mask] = new_values[name][mask]
+                    fetched[name] |= mask
+
+    out: List[Dict[str, xr.DataArray | None]] = []
+    for cell in cells:
+        values, fetched = cached[cell]
+        any_fetched = np.logical_or.reduce(list(fetched.values()))
+        time_coord = days[any_fetched].astype("datetime64[ns]")
+        fields: Dict[str, xr.DataArray | None] = {}
+        for name, arr in values.items():
+            column = np.where(fetched[name], arr, np.nan)[any_fetched]
+            fields[name] = (
+                xr.DataArray(column, coords={"time": time_coord}, dims=("time",))
+                if np.isfinite(column).any()
+                else None
+            )
+        out.append(fields)
+    return out
+
+
+def _cached_daily(
+    dataset: str,
+    grid: Grid,
+    lat: float,
+    lon: float,
+    windows: List[Tuple[str, str]],
+    fetch: Callable[[float, float, List[Tuple[str, str]]], Dict[str, xr.DataArray | None]],
+) -> Dict[str, xr.DataArray | None]:
+    """Single-point ``_cached_daily_many`` over a point reader."""
+    return _cached_daily_many(
+        dataset, grid, [(lat, lon)], windows, lambda pts, todo: [fetch(pts[0][0], pts[0][1], todo)]
+    )[0]
+
+
+def _split_points(data: Dict[str, xr.DataArray | None], n_points: int) -> List[Dict[str, xr.DataArray | None]]:
+    """Per-point fields from a regional read with a ``point`` dimension."""
+    return [
+        {name: None if arr is None else arr.isel(point=k, drop=True) for name, arr in data.items()}
+        for k in range(n_points)
+    ]
+
+
+def merra2_daily_cached(lat: float, lon: float, windows: List[Tuple[str, str]]) -> Dict[str, xr.DataArray | None]:
+    return _cached_daily("merra2", MERRA2_GRID, lat, lon, windows, merra2_daily_point)
+
+
+def imerg_daily_cached(lat: float, lon: float, windows: List[Tuple[str, str]]) -> xr.DataArray | None:
+    data = _cached_daily(
+        "imerg",
+        IMERG_GRID,
+        lat,
+        lon,
+        windows,
+        lambda la, lo, w: {"precip_daily": imerg_daily_point(la, lo, w)},
+    )
+    return data["precip_daily"]
+
+
+def merra2_daily_cached_many(
+    points: Sequence[Tuple[float, float]], windows: List[Tuple[str, str]]
+) -> List[Dict[str, xr.DataArray | None]]:
+    """``merra2_daily_cached`` for several points, missing cells read as one region."""
+    return _cached_daily_many(
+        "merra2",
+        MERRA2_GRID,
+        points,
+        windows,
+        lambda pts, w: _split_points(merra2_daily_region(Region(points=tuple(pts)), w), len(pts)),
+    )
+
+
+def imerg_daily_cached_many(
+    points: Sequence[Tuple[float, float]], windows: List[Tuple[str, str]]
+) -> List[xr.DataArray | None]:
+    data = _cached_daily_many(
+        "imerg",
+        IMERG_GRID,
+        points,
+        windows,
+        lambda pts, w: _split_points(
+            {"precip_daily": imerg_daily_region(Region(points=tuple(pts)), w)}, len(pts)
+        ),
+    )
+    return [item["precip_daily"] for item in data]
+
+
 # ---------------------------------------------------------------------------
 # Series assembler
 # ---------------------------------------------------------------------------
 
-def assemble_series_real(
+_BASE_FIELDS = ("t2m_max", "t2m_min", "wind_speed_max", "wind_gust_p95", "rh_max", "precip_daily")
+
+
+def assemble_windows(
     lat: float,
     lon: float,
-    target_month: int,
-    target_day: int,
-    years: int = 20,
-    window: int = 15,
-    condition: str | None = None,
-) -> List[Dict[str, Any]]:
-    start_iso, end_iso = daterange_around(target_month, target_day, years, window)
-
-    merra_data = merra2_daily_point(lat, lon, start_iso, end_iso)
-    need_precip = (condition == "wet")
+    windows: List[Tuple[str, str]],
+    condition: str | Sequence[str] | None = None,
+) -> Series:
+    """Series of the given inclusive ISO windows (one CMR search and granule batch)."""
+    merra_data = merra2_daily_cached(lat, lon, windows)
+    need_precip = _needs_precip(condition)
     imerg_data = None
     if need_precip:
-        imerg_data = imerg_daily_point(lat, lon, start_iso, end_iso)
+        imerg_data = imerg_daily_cached(lat, lon, windows)
+    return _series_from_daily(merra_data, imerg_data)
+
 
+def _series_from_daily(
+    merra_data: Dict[str, xr.DataArray | None],
+    imerg_data: xr.DataArray | None,
+) -> Series:
+    # Scalar lat/lon left by point selection differ between the two grids
     pieces: List[xr.DataArray] = []
     for name, data_array in merra_data.items():
         if data_array is not None:
-            pieces.append(data_array.rename(name))
+            pieces.append(data_array.rename(name).reset_coords(drop=True))
     if imerg_data is not None:
-        pieces.append(imerg_data.rename("precip_daily"))
+        pieces.append(imerg_data.rename("precip_daily").reset_coords(drop=True))
 
     ds = xr.merge(pieces).sortby("time")
 
-    rows: List[Dict[str, Any]] = []
-    for ts_value in ds["time"].values:
-        row: Dict[str, Any] = {"date": np.datetime_as_string(ts_value, unit="D")}
-        for var in ds.data_vars:
-            value = ds[var].sel(time=ts_value).item()
-            if isinstance(value, (np.floating, float, int, np.integer)):
-                row[var] = None if np.isnan(value) else round(float(value), 2)
+    # Pull every variable out of xarray once; per-day ``.sel(...).item()``
+    # lookups dominated assembly time for multi-year series.
+    series = Series(ds["time"].values)
+    for var in ds.data_vars:
+        series.set(var, round_exact(ds[var].values, 2))
 
-        temp_max = row.get("t2m_max")
-        rh_max = row.get("rh_max")
-        temp_min = row.get("t2m_min")
-        wind_max = row.get("wind_speed_max")
+    absent = np.full(len(series), np.nan)
+    temp_max = series.values("t2m_max") if "t2m_max" in series else absent
+    rh_max = series.values("rh_max") if "rh_max" in series else absent
+    temp_min = series.values("t2m_min") if "t2m_min" in series else absent
+    wind_max = series.values("wind_speed_max") if "wind_speed_max" in series else absent
+    # Derived fields are only present on days where they could be computed
+    series.set("hi_max", heat_index_array(temp_max, rh_max), present="finite")
+    series.set("dewpoint_max", dew_point_array(temp_max, rh_max), present="finite")
+    series.set("wc_min", wind_chill_array(temp_min, wind_max), present="finite")
+    return series
 
-        hi = compute_heat_index(temp_max, rh_max)
-        if hi is not None:
-            row["hi_max"] = hi
 
-        dew = compute_dew_point(temp_max, rh_max)
-        if dew is not None:
-            row["dewpoint_max"] = dew
+def assemble_series_real(
+    lat: float,
+    lon: float,
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | Sequence[str] | None = None,
+) -> Series:
+    windows = seasonal_windows(target_month, target_day, years, window)
+    return assemble_windows(lat, lon, windows, condition)
 
-        wc = compute_wind_chill(temp_min, wind_max)
-        if wc is not None:
-            row["wc_min"] = wc
 
-        rows.append(row)
+def assemble_series_points(
+    points: Sequence[Tuple[float, float]],
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | Sequence[str] | None = None,
+) -> List[Series]:
+    """``assemble_series_real`` for many points, one series per point.
+
+    Points are grouped into tiles of ``NASA_REGION_TILE`` MERRA-2 cells;
+    each tile reads every granule once as a region and extracts all of its
+    points from that block, instead of opening the granule once per point.
+    """
+    windows = seasonal_windows(target_month, target_day, years, window)
+    need_precip = _needs_precip(condition)
+    out: List[Series] = [None] * len(points)  # type: ignore[list-item]
+    for members in region_tiles(points):
+        subset = [points[k] for k in members]
+        merra_data = merra2_daily_cached_many(subset, windows)
+        imerg_data = imerg_daily_cached_many(subset, windows) if need_precip else [None] * len(subset)
+        for k, merra_item, imerg_item in zip(members, merra_data, imerg_data):
+            out[k] = _series_from_daily(merra_item, imerg_item)
+    return out
+
+
+def assemble_grid(
+    bbox: Tuple[float, float, float, float],
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | Sequence[str] | None = None,
+) -> GridData:
+    """Daily fields over ``bbox`` on the native grid, from one regional read per granule.
+
+    Maps for "wet" use the IMERG grid (0.1 deg) and carry precipitation only;
+    the others use MERRA-2 (0.5 x 0.625 deg), with the derived fields
+    computed per cell as ``_series_from_daily`` does for a point.
+    """
+    windows = seasonal_windows(target_month, target_day, years, window)
+    region = Region(bbox=tuple(bbox))  # type: ignore[arg-type]
+    if _needs_precip(condition):
+        data: Dict[str, xr.DataArray | None] = {"precip_daily": imerg_daily_region(region, windows)}
+    else:
+        data = merra2_daily_region(region, windows)
+
+    fields: Dict[str, np.ndarray] = {}
+    dates = lats = lons = None
+    for name, data_array in data.items():
+        if data_array is None:
+            continue
+        lat_var = "lat" if "lat" in data_array.dims else "latitude"
+        lon_var = "lon" if "lon" in data_array.dims else "longitude"
+        data_array = data_array.transpose("time", lat_var, lon_var).sortby(lat_var).sortby(lon_var)
+        if dates is None:
+            dates = data_array["time"].values.astype("datetime64[D]")
+            lats = np.asarray(data_array[lat_var].values, dtype=float)
+            lons = np.asarray(data_array[lon_var].values, dtype=float)
+        fields[name] = round_exact(data_array.values, 2)
+    if dates is None:
+        raise RuntimeError("No data for the requested region")
+    lons = np.where(lons > 180, lons - 360.0, lons)
+    if np.any(np.diff(lons) < 0):  # 0..360 grid: back to ascending -180..180
+        order = np.argsort(lons, kind="stable")
+        lons = lons[order]
+        fields = {name: values[..., order] for name, values in fields.items()}
+
+    if "precip_daily" not in fields:
+        absent = np.full((dates.size, lats.size, lons.size), np.nan)
+        temp_max = fields.get("t2m_max", absent)
+        rh_max = fields.get("rh_max", absent)
+        fields["hi_max"] = heat_index_array(temp_max, rh_max)
+        fields["dewpoint_max"] = dew_point_array(temp_max, rh_max)
+        fields["wc_min"] = wind_chill_array(fields.get("t2m_min", absent), fields.get("wind_speed_max", absent))
+    return GridData(dates, lats, lons, fields)
+
+
+def iter_series_real(
+    lat: float,
+    lon: float,
+    target_month: int,
+    target_day: int,
+    years: int = 20,
+    window: int = 15,
+    condition: str | Sequence[str] | None = None,
+) -> Iterator[Tuple[Series, int, int]]:
+    """Fetch the same series as ``assemble_series_real`` a few years at a time.
+
+    Yields ``(series so far, windows done, windows total)``, most recent
+    years first; the last item is the complete series. Chunks hold
+    ``NASA_PROGRESS_YEARS`` seasonal windows (default: a quarter of them),
+    each fetched with its own CMR search and granule batch.
+    """
+    windows = seasonal_windows(target_month, target_day, years, window)
+    per_chunk = int(os.getenv("NASA_PROGRESS_YEARS", "0")) or max(1, -(-len(windows) // 4))
+    ordered = windows[::-1]
+    parts: List[Series] = []
+    for start in range(0, len(ordered), per_chunk):
+        chunk = sorted(ordered[start:start + per_chunk])
+        parts.append(assemble_windows(lat, lon, chunk, condition))
+        series = Series.concat(parts)
+        series = series.take(np.argsort(series.dates, kind="stable"))
+        # A whole-range merge carries base fields on every row (null when missing)
+        for name in series.fields:
+            if name in _BASE_FIELDS:
+                series.present[name] = np.ones(len(series), dtype=bool)
+        yield series, min(start + per_chunk, len(ordered)), len(ordered)
 
-    return rows
@@ -0,0 +1,213 @@
+# backend/app/point_cache.py
+"""Persistent on-disk cache of daily point series keyed by grid cell and day.
+
+Layout: ``<root>/<dataset>/<i>_<j>/<year>.npy``, one float64 array of shape
+``(366, 2 * len(fields))`` per snapped grid cell and calendar year. Rows are
+indexed by day of year; the first columns hold the values and the last
+ones flag, per field, the days that field was already fetched (so a
+legitimately missing value, NaN, is not fetched again, while a field absent
+from a partial read is). Files are read memory-mapped and rewritten
+atomically; the least recently used files are evicted once the cache
+exceeds ``NASA_CACHE_MAX_MB``.
+
+Several processes (uvicorn workers) may share the cache directory: each
+read-modify-write of a cell's files holds an exclusive ``flock`` on the
+cell's ``.lock`` file, so workers filling different fields of the same
+cell do not drop each other's values or flags.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:  # POSIX only; elsewhere writes are serialised within one process
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+DATASET_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "merra2": ("t2m_max", "t2m_min", "wind_speed_max", "wind_gust_p95", "rh_max"),
+    "imerg": ("precip_daily",),
+}
+
+_DAYS_PER_FILE = 366
+
+logger = logging.getLogger("cronoweath.cache")
+
+
+def window_days(windows: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """All days (datetime64[D]) covered by the inclusive ISO windows, in order."""
+    parts = [
+        np.arange(np.datetime64(start), np.datetime64(end) + 1, dtype="datetime64[D]")
+        for start, end in windows
+    ]
+    return np.concatenate(parts) if parts else np.array([], dtype="datetime64[D]")
+
+
+def missing_windows(days: np.ndarray, fetched: np.ndarray) -> List[Tuple[str, str]]:
+    """Collapse the not-yet-fetched days into contiguous inclusive ISO windows."""
+    todo = days[~fetched]
+    if todo.size == 0:
+        return []
+    breaks = np.nonzero(np.diff(todo).astype(int) != 1)[0]
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [todo.size - 1]))
+    return [(str(todo[s]), str(todo[e])) for s, e in zip(starts, ends)]
+
+
+def _split_days(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    years = days.astype("datetime64[Y]").astype(int) + 1970
+    doy = (days - days.astype("datetime64[Y]")).astype(int)
+    return years, doy
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive ``flock`` on ``path``, held against other processes too."""
+    if fcntl is None:  # pragma: no cover - depends on the platform
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class PointCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _path(self, dataset: str, cell: Tuple[int, int], year: int) -> Path:
+        return self.root / dataset / f"{cell[0]}_{cell[1]}" / f"{year}.npy"
+
+    def _lock_path(self, dataset: str, cell: Tuple[int, int]) -> Path:
+        return self.root / dataset / f"{cell[0]}_{cell[1]}" / ".lock"
+
+    def read(
+        self,
+        dataset: str,
+        cell: Tuple[int, int],
+        days: np.ndarray,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Return ``(values per field, fetched mask per field)`` aligned with ``days``."""
+        fields = DATASET_FIELDS[dataset]
+        values = {name: np.full(days.shape, np.nan) for name in fields}
+        fetched = {name: np.zeros(days.shape, dtype=bool) for name in fields}
+        years, doy = _split_days(days)
+        for year in np.unique(years):
+            path = self._path(dataset, cell, int(year))
+            try:
+                block = np.load(path, mmap_mode="r")
+                os.utime(path)
+            except (OSError, ValueError):
+                continue
+            sel = years == year
+            rows = block[doy[sel]]
+            for col, name in enumerate(fields):
+                values[name][sel] = rows[:, col]
+                fetched[name][sel] = rows[:, len(fields) + col] == 1.0
+        return values, fetched
+
+    def write(
+        self,
+        dataset: str,
+        cell: Tuple[int, int],
+        days: np.ndarray,
+        values: Dict[str, np.ndarray],
+        fetched: Dict[str, np.ndarray],
+    ) -> None:
+        """Store ``values`` (aligned with ``days``) where ``fetched`` is set, and flag them."""
+        fields = DATASET_FIELDS[dataset]
+        years, doy = _split_days(days)
+        with self._lock, _file_lock(self._lock_path(dataset, cell)):
+            for year in np.unique(years):
+                path = self._path(dataset, cell, int(year))
+                try:
+                    block = np.load(path)
+                    old_size = path.stat().st_size
+                except (OSError, ValueError):
+                    block = np.full((_DAYS_PER_FILE, 2 * len(fields)), np.nan)
+                    old_size = 0
+                sel = years == year
+                for col, name in enumerate(fields):
+                    mask = fetched.get(name)
+                    if mask is None:
+                        continue
+                    rows = sel & mask
+                    block[doy[rows], col] = values[name][rows]
+                    block[doy[rows], len(fields) + col] = 1.0
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with tmp.open("wb") as fh:
+                    np.save(fh, block)
+                os.replace(tmp, path)
+                if self._size is not None:
+                    self._size += path.stat().st_size - old_size
+            self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.root.glob("*/*/*.npy"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._scan())
+        if self._size <= self.max_bytes:
+            return
+        entries = sorted(self._scan())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self._size -= size
+                logger.info("cache evict %s", path)
+            except OSError:
+                continue
+
+
+_CACHE: Optional[PointCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_point_cache() -> Optional[PointCache]:
+    """Process-wide cache, or ``None`` when disabled with ``NASA_CACHE=off``."""
+    global _CACHE
+    if os.getenv("NASA_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            root = os.getenv("NASA_CACHE_DIR") or os.path.join(
+                os.path.expanduser("~"), ".cache", "cronoweath", "nasa"
+            )
+            max_mb = float(os.getenv("NASA_CACHE_MAX_MB", "512"))
+            _CACHE = PointCache(Path(root), int(max_mb * 1024 * 1024))
+        return _CACHE
+
+
+__all__ = [
+    "DATASET_FIELDS",
+    "PointCache",
+    "get_point_cache",
+    "missing_windows",
+    "window_days",
+]
@@ -0,0 +1,82 @@
+# backend/app/progress.py
+"""Progress reporting from deep inside the engines without threading a callback.
+
+The job runner installs a reporter with ``reporting(...)``; engine code
+calls ``add``/``update`` wherever it makes progress (e.g. per granule
+read). Outside a job these calls are no-ops. The reporter lives in a
+``ContextVar``, so it follows the thread (or task) that runs the job.
+
+A fetch that is no longer wanted (e.g. the losing source of a hedged
+request) is stopped the same way: the caller runs it under
+``cancellable(event)`` and long loops call ``check_cancelled()`` between
+steps, which raises ``FetchCancelled`` once the event is set.
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, Protocol
+
+
+class Reporter(Protocol):
+    def add(self, **deltas: int) -> None: ...
+
+    def report(self, **info: Any) -> None: ...
+
+
+_REPORTER: ContextVar[Optional[Reporter]] = ContextVar("cronoweath_progress", default=None)
+_CANCEL: ContextVar[Optional[threading.Event]] = ContextVar("cronoweath_cancel", default=None)
+
+
+class FetchCancelled(RuntimeError):
+    pass
+
+
+@contextlib.contextmanager
+def reporting(reporter: Optional[Reporter]) -> Iterator[None]:
+    token = _REPORTER.set(reporter)
+    try:
+        yield
+    finally:
+        _REPORTER.reset(token)
+
+
+def add(**deltas: int) -> None:
+    """Increment counters, e.g. ``add(granules_total=31)`` then ``add(granules_done=1)``."""
+    reporter = _REPORTER.get()
+    if reporter is not None:
+        reporter.add(**deltas)
+
+
+def update(**info: Any) -> None:
+    reporter = _REPORTER.get()
+    if reporter is not None:
+        reporter.report(**info)
+
+
+@contextlib.contextmanager
+def cancellable(event: Optional[threading.Event]) -> Iterator[None]:
+    token = _CANCEL.set(event)
+    try:
+        yield
+    finally:
+        _CANCEL.reset(token)
+
+
+def check_cancelled() -> None:
+    """Raise ``FetchCancelled`` if the surrounding ``cancellable`` event is set."""
+    event = _CANCEL.get()
+    if event is not None and event.is_set():
+        raise FetchCancelled("fetch cancelled")
+
+
+__all__ = [
+    "FetchCancelled",
+    "Reporter",
+    "add",
+    "cancellable",
+    "check_cancelled",
+    "reporting",
+    "update",
+]
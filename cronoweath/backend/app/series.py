@@ -0,0 +1,214 @@
+# backend/app/series.py
+"""Columnar daily timeseries shared by the engines, evaluator, store and exporters.
+
+A ``Series`` holds one ``datetime64[D]`` date array plus one float64 array
+per field, with NaN for missing values. ``present`` is the explicit
+missing-field mask: it tells whether a row carries the key at all (engines
+omit some derived fields instead of emitting ``null``), so ``to_rows`` can
+rebuild exactly the dicts the JSON API has always returned. Boolean fields
+such as ``exceed`` are stored as 1.0/0.0/NaN and listed in ``flags``.
+``source`` names the engine that produced the series when a composite
+engine chose among several (``None`` otherwise).
+"""
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class Series:
+    __slots__ = ("dates", "columns", "present", "flags", "source")
+
+    def __init__(self, dates: Any) -> None:
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.columns: Dict[str, np.ndarray] = {}
+        self.present: Dict[str, np.ndarray] = {}
+        self.flags: frozenset = frozenset()
+        self.source: Optional[str] = None
+
+    def __len__(self) -> int:
+        return int(self.dates.size)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.columns
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + sum(
+            self.columns[name].nbytes + self.present[name].nbytes for name in self.columns
+        )
+
+    # -- building ------------------------------------------------------------
+
+    def set(
+        self,
+        name: str,
+        values: Any,
+        present: Optional[Any] = None,
+        flag: bool = False,
+    ) -> "Series":
+        """Add or replace a column in place.
+
+        ``present=None`` means every row carries the key (``null`` when NaN);
+        pass ``"finite"`` to carry it only where the value is not NaN.
+        """
+        arr = np.asarray(values, dtype=float)
+        if arr.shape != self.dates.shape:
+            raise ValueError(f"column {name!r} has shape {arr.shape}, expected {self.dates.shape}")
+        if present is None:
+            mask = np.ones(arr.shape, dtype=bool)
+        elif isinstance(present, str) and present == "finite":
+            mask = ~np.isnan(arr)
+        else:
+            mask = np.asarray(present, dtype=bool)
+        self.columns[name] = arr
+        self.present[name] = mask
+        if flag:
+            self.flags = self.flags | {name}
+        elif name in self.flags:
+            self.flags = self.flags - {name}
+        return self
+
+    def with_column(self, name: str, values: Any, present: Optional[Any] = None, flag: bool = False) -> "Series":
+        """Shallow copy with one extra column; the other arrays are shared, not copied."""
+        out = self.copy()
+        return out.set(name, values, present=present, flag=flag)
+
+    def copy(self) -> "Series":
+        out = Series(self.dates)
+        out.columns = dict(self.columns)
+        out.present = dict(self.present)
+        out.flags = self.flags
+        out.source = self.source
+        return out
+
+    def take(self, index: Any) -> "Series":
+        """Rows selected by a boolean mask or integer index."""
+        out = Series(self.dates[index])
+        for name in self.columns:
+            out.columns[name] = self.columns[name][index]
+            out.present[name] = self.present[name][index]
+        out.flags = self.flags
+        out.source = self.source
+        return out
+
+    @classmethod
+    def concat(cls, parts: Sequence["Series"]) -> "Series":
+        """Stack series row-wise; fields missing from a part are absent on its rows."""
+        if not parts:
+            return cls(np.array([], dtype="datetime64[D]"))
+        out = cls(np.concatenate([part.dates for part in parts]))
+        names: List[str] = []
+        for part in parts:
+            names.extend(name for name in part.columns if name not in names)
+        for name in names:
+            out.columns[name] = np.concatenate(
+                [part.columns.get(name, np.full(len(part), np.nan)) for part in parts]
+            )
+            out.present[name] = np.concatenate(
+                [part.present.get(name, np.zeros(len(part), dtype=bool)) for part in parts]
+            )
+        out.flags = frozenset().union(*(part.flags for part in parts))
+        sources = {part.source for part in parts}
+        out.source = sources.pop() if len(sources) == 1 else None
+        return out
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "Series":
+        rows = list(rows)
+        out = cls([row["date"] for row in rows])
+        names: List[str] = []
+        for row in rows:
+            names.extend(key for key in row if key != "date" and key not in names)
+        for name in names:
+            values = [row.get(name) for row in rows]
+            out.set(
+                name,
+                [np.nan if value is None else float(value) for value in values],
+                present=[name in row for row in rows],
+                flag=any(isinstance(value, bool) for value in values),
+            )
+        return out
+
+    # -- binary encoding -----------------------------------------------------
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        """Compact ``.npz`` encoding (no pickling); inverse of ``from_bytes``."""
+        arrays: Dict[str, np.ndarray] = {
+            "dates": self.dates.astype(np.int32),
+            "flags": np.array(sorted(self.flags), dtype=str),
+        }
+        for name in self.columns:
+            arrays[f"col:{name}"] = self.columns[name]
+            arrays[f"present:{name}"] = np.packbits(self.present[name])
+        buf = io.BytesIO()
+        (np.savez_compressed if compress else np.savez)(buf, **arrays)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Series":
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            out = cls(npz["dates"].astype("datetime64[D]"))
+            n = len(out)
+            for key in npz.files:
+                if key.startswith("col:"):
+                    name = key[4:]
+                    out.columns[name] = npz[key]
+                    out.present[name] = np.unpackbits(npz[f"present:{name}"], count=n).astype(bool)
+            out.flags = frozenset(npz["flags"].tolist())
+        return out
+
+    # -- reading -------------------------------------------------------------
+
+    def values(self, name: str) -> Optional[np.ndarray]:
+        """Column values with NaN wherever the row lacks the field or it is null."""
+        if name not in self.columns:
+            return None
+        arr = self.columns[name]
+        present = self.present[name]
+        return arr if present.all() else np.where(present, arr, np.nan)
+
+    def date_strings(self) -> List[str]:
+        return np.datetime_as_string(self.dates, unit="D").tolist()
+
+    def _python_column(self, name: str) -> List[Any]:
+        values = self.columns[name].tolist()
+        if name in self.flags:
+            return [None if v != v else bool(v) for v in values]
+        return [None if v != v else v for v in values]
+
+    def iter_records(self, fields: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+        """Yield ``(date, value, ...)`` tuples of plain Python values (None when missing)."""
+        cols = [
+            self._python_column(name) if name in self.columns else [None] * len(self)
+            for name in fields
+        ]
+        masks = [
+            self.present[name].tolist() if name in self.columns else [False] * len(self)
+            for name in fields
+        ]
+        for idx, day in enumerate(self.date_strings()):
+            yield (day, *(col[idx] if mask[idx] else None for col, mask in zip(cols, masks)))
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Row dicts as exposed by the JSON API (only at that boundary)."""
+        names = self.fields
+        cols = [self._python_column(name) for name in names]
+        masks = [self.present[name].tolist() for name in names]
+        rows: List[Dict[str, Any]] = []
+        for idx, day in enumerate(self.date_strings()):
+            row: Dict[str, Any] = {"date": day}
+            for name, col, mask in zip(names, cols, masks):
+                if mask[idx]:
+                    row[name] = col[idx]
+            rows.append(row)
+        return rows
+
+
+__all__ = ["Series"]
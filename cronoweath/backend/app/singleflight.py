@@ -0,0 +1,99 @@
+# backend/app/singleflight.py
+"""In-flight request coalescing ("single-flight").
+
+Concurrent callers asking for the same key wait on one shared future instead
+of each starting its own fetch. The key is forgotten as soon as the leader
+finishes, so later callers trigger a fresh call.
+
+Some failures belong to the leader alone, not to the fetch: its job was
+cancelled or ran out of time, or its task was cancelled. Followers that
+see one of these ``leader_local`` exceptions do not inherit it; they retry,
+one of them becoming the new leader.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, leader_local: Iterable[Type[BaseException]] = ()) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._leader_local: Tuple[Type[BaseException], ...] = (asyncio.CancelledError, *leader_local)
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            # A settled call whose leader has not yet forgotten it does not count
+            leader = future is None or future.done()
+            if leader:
+                future = self._calls[key] = Future()
+        return future, leader
+
+    def _retry(self, future: Future) -> bool:
+        """Whether the shared call failed for a reason local to its leader."""
+        return future.done() and not future.cancelled() and isinstance(future.exception(), self._leader_local)
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Run ``fn`` once per in-flight ``key``; returns ``(result, shared)``."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except BaseException:
+                if not self._retry(future):
+                    raise
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._forget(key, future)
+        return result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """``do`` for coroutines; shares in-flight calls with ``do`` callers too."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # Shielded: a cancelled follower must not cancel the shared call
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except BaseException:
+                if not self._retry(future):
+                    raise
+
+        try:
+            result = await fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._forget(key, future)
+        return result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+__all__ = ["SingleFlight"]
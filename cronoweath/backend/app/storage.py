@@ -1,2 +1,495 @@
-from typing import Dict, Any
-STORE: Dict[str, Dict[str, Any]] = {}
+# backend/app/storage.py
+"""Bounded in-process stores for query results and async task status.
+
+``ResultStore`` keeps the response payload and the columnar series of each
+query under a byte budget (``RESULT_STORE_MAX_MB``), drops entries older
+than ``RESULT_TTL`` seconds and evicts the least recently used ones first.
+With ``RESULT_SPILL_DIR`` set, series that are not returned inline are
+kept compressed on disk and only loaded back for ``/download``; under
+memory pressure in-memory series are spilled before whole entries are
+dropped.
+
+``RESULT_STORE=sqlite`` switches both stores to one SQLite database in WAL
+mode (``RESULT_DB``) so that every uvicorn worker on the host sees the same
+results and task statuses.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+from .series import Series
+
+logger = logging.getLogger("cronoweath.store")
+
+
+@dataclass
+class StoredResult:
+    """A stored query: payload (without timeseries) plus a lazily loaded series."""
+
+    payload: Dict[str, Any]
+    include_timeseries: bool
+    _loader: Callable[[], Optional[Series]] = field(repr=False)
+    _series: Optional[Series] = field(default=None, repr=False)
+
+    def series(self) -> Optional[Series]:
+        if self._series is None:
+            self._series = self._loader()
+        return self._series
+
+
+@dataclass
+class _Entry:
+    payload: Dict[str, Any]
+    include_timeseries: bool
+    expires_at: float
+    payload_bytes: int
+    series: Optional[Series] = None
+    spill_path: Optional[Path] = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.payload_bytes + (self.series.nbytes if self.series is not None else 0)
+
+
+class ResultStore:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_s: float,
+        spill_dir: Optional[Path] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.spills = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultStore":
+        max_mb = float(os.getenv("RESULT_STORE_MAX_MB", "256"))
+        ttl_s = float(os.getenv("RESULT_TTL", "3600"))
+        spill_dir = os.getenv("RESULT_SPILL_DIR") or None
+        return cls(int(max_mb * 1024 * 1024), ttl_s, Path(spill_dir) if spill_dir else None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, query_id: object) -> bool:
+        with self._lock:
+            entry = self._entries.get(query_id)  # type: ignore[arg-type]
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    # -- writing -------------------------------------------------------------
+
+    def put(
+        self,
+        query_id: str,
+        payload: Dict[str, Any],
+        series: Optional[Series],
+        include_timeseries: bool = False,
+    ) -> None:
+        entry = _Entry(
+            payload=payload,
+            include_timeseries=include_timeseries,
+            expires_at=time.monotonic() + self.ttl_s,
+            payload_bytes=len(json.dumps(payload, default=str)),
+            series=series,
+        )
+        with self._lock:
+            self._drop(query_id)
+            # Only /download needs the series of a query that did not ask for it
+            if series is not None and not include_timeseries and self.spill_dir is not None:
+                self._spill(query_id, entry)
+            self._entries[query_id] = entry
+            self._bytes += entry.nbytes
+            self._purge_expired()
+            self._enforce_budget()
+
+    def delete(self, query_id: str) -> None:
+        with self._lock:
+            self._drop(query_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            for query_id in list(self._entries):
+                self._drop(query_id)
+
+    # -- reading -------------------------------------------------------------
+
+    def get(self, query_id: str) -> Optional[StoredResult]:
+        with self._lock:
+            entry = self._entries.get(query_id)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(query_id)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query_id)
+            self.hits += 1
+            series = entry.series
+            spill_path = entry.spill_path
+        return StoredResult(
+            payload=entry.payload,
+            include_timeseries=entry.include_timeseries,
+            _loader=lambda: series if series is not None else _load_spilled(spill_path),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "spills": self.spills,
+            }
+
+    # -- internals (lock held) -----------------------------------------------
+
+    def _drop(self, query_id: str) -> None:
+        entry = self._entries.pop(query_id, None)
+        if entry is None:
+            return
+        self._bytes -= entry.nbytes
+        if entry.spill_path is not None:
+            try:
+                entry.spill_path.unlink()
+            except OSError:
+                pass
+
+    def _spill(self, query_id: str, entry: _Entry) -> bool:
+        assert self.spill_dir is not None and entry.series is not None
+        path = self.spill_dir / f"{query_id}.npz"
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(entry.series.to_bytes())
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("spill failed for %s: %s", query_id, exc)
+            return False
+        entry.series = None
+        entry.spill_path = path
+        self.spills += 1
+        return True
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [qid for qid, entry in self._entries.items() if entry.expires_at <= now]
+        for query_id in expired:
+            self._drop(query_id)
+        self.expirations += len(expired)
+
+    def _enforce_budget(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        # Spill least recently used series first, then drop whole entries
+        if self.spill_dir is not None:
+            for query_id, entry in self._entries.items():
+                if self._bytes <= self.max_bytes:
+                    return
+                if entry.series is not None:
+                    before = entry.nbytes
+                    if self._spill(query_id, entry):
+                        self._bytes -= before - entry.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            query_id = next(iter(self._entries))
+            self._drop(query_id)
+            self.evictions += 1
+            logger.info("result evict %s", query_id)
+
+
+def _load_spilled(path: Optional[Path]) -> Optional[Series]:
+    if path is None:
+        return None
+    try:
+        return Series.from_bytes(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+class TaskTable:
+    """Status of async tasks by query_id, forgotten after ``ttl_s`` seconds."""
+
+    def __init__(self, ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, tuple] = {}
+
+    def __setitem__(self, query_id: str, status: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._tasks[query_id] = (now + self.ttl_s, status)
+            if len(self._tasks) % 256 == 0:
+                self._tasks = {k: v for k, v in self._tasks.items() if v[0] > now}
+
+    def get(self, query_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._tasks.get(query_id)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._tasks[query_id]
+                return None
+            return item[1]
+
+    def transition(self, query_id: str, status: Dict[str, Any], expect: Sequence[str]) -> bool:
+        """Replace the status only if the current one is in ``expect``."""
+        with self._lock:
+            item = self._tasks.get(query_id)
+            if item is None or item[1].get("status") not in expect:
+                return False
+            self._tasks[query_id] = (item[0], status)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+# ---------------------------------------------------------------------------
+# SQLite backend (shared by every worker process on the host)
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    query_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    include_timeseries INTEGER NOT NULL,
+    series BLOB,
+    nbytes INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+CREATE TABLE IF NOT EXISTS tasks (
+    query_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteDB:
+    """One WAL-mode database file; a connection per thread and process."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self.connect().executescript(_SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextlib.contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Immediate (write-locked) transaction; readers are never blocked in WAL mode."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SQLiteResultStore:
+    """``ResultStore`` counterpart kept in SQLite; series are stored as npz blobs.
+
+    Hit/miss/eviction counters are per process; sizes and entries are global.
+    """
+
+    def __init__(self, db: SQLiteDB, max_bytes: int, ttl_s: float) -> None:
+        self.db = db
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __contains__(self, query_id: object) -> bool:
+        row = self.db.connect().execute(
+            "SELECT 1 FROM results WHERE query_id = ? AND expires_at > ?", (query_id, time.time())
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.db.connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def put(
+        self,
+        query_id: str,
+        payload: Dict[str, Any],
+        series: Optional[Series],
+        include_timeseries: bool = False,
+    ) -> None:
+        payload_json = json.dumps(payload, default=str)
+        blob = series.to_bytes() if series is not None else None
+        nbytes = len(payload_json) + (len(blob) if blob is not None else 0)
+        now = time.time()
+        with self.db.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query_id, payload_json, int(include_timeseries), blob, nbytes, now + self.ttl_s, now),
+            )
+            self.expirations += conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for victim_id, size in conn.execute(
+                    "SELECT query_id, nbytes FROM results ORDER BY accessed_at"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((victim_id,))
+                    total -= size
+                conn.executemany("DELETE FROM results WHERE query_id = ?", victims)
+                self.evictions += len(victims)
+
+    def delete(self, query_id: str) -> None:
+        with self.db.write() as conn:
+            conn.execute("DELETE FROM results WHERE query_id = ?", (query_id,))
+
+    def clear(self) -> None:
+        with self.db.write() as conn:
+            conn.execute("DELETE FROM results")
+
+    def get(self, query_id: str) -> Optional[StoredResult]:
+        conn = self.db.connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT payload, include_timeseries, expires_at FROM results WHERE query_id = ?",
+            (query_id,),
+        ).fetchone()
+        if row is not None and row[2] <= now:
+            self.delete(query_id)
+            self.expirations += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        conn.execute("UPDATE results SET accessed_at = ? WHERE query_id = ?", (now, query_id))
+        return StoredResult(
+            payload=json.loads(row[0]),
+            include_timeseries=bool(row[1]),
+            _loader=lambda: self._load_series(query_id),
+        )
+
+    def _load_series(self, query_id: str) -> Optional[Series]:
+        row = self.db.connect().execute(
+            "SELECT series FROM results WHERE query_id = ?", (query_id,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return Series.from_bytes(row[0])
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self.db.connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM results"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteTaskTable:
+    """``TaskTable`` counterpart; ``transition`` is a single conditional UPDATE."""
+
+    def __init__(self, db: SQLiteDB, ttl_s: float) -> None:
+        self.db = db
+        self.ttl_s = ttl_s
+
+    def __setitem__(self, query_id: str, status: Dict[str, Any]) -> None:
+        now = time.time()
+        with self.db.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?)",
+                (query_id, status.get("status", ""), json.dumps(status), now + self.ttl_s),
+            )
+            conn.execute("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+
+    def get(self, query_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.connect().execute(
+            "SELECT data FROM tasks WHERE query_id = ? AND expires_at > ?", (query_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def transition(self, query_id: str, status: Dict[str, Any], expect: Sequence[str]) -> bool:
+        marks = ", ".join("?" for _ in expect)
+        with self.db.write() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET status = ?, data = ? WHERE query_id = ? AND expires_at > ? AND status IN ({marks})",
+                (status.get("status", ""), json.dumps(status), query_id, time.time(), *expect),
+            )
+        return cursor.rowcount == 1
+
+    def __len__(self) -> int:
+        return self.db.connect().execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def _open_stores() -> Tuple[Any, Any]:
+    """Pick the backend: ``RESULT_STORE=memory`` (default) or ``sqlite`` (``RESULT_DB``)."""
+    task_ttl = float(os.getenv("TASK_TTL", os.getenv("RESULT_TTL", "3600")))
+    if os.getenv("RESULT_STORE", "memory").lower() == "sqlite":
+        path = os.getenv("RESULT_DB") or os.path.join(
+            os.path.expanduser("~"), ".cache", "cronoweath", "results.db"
+        )
+        db = SQLiteDB(Path(path))
+        max_mb = float(os.getenv("RESULT_STORE_MAX_MB", "256"))
+        ttl_s = float(os.getenv("RESULT_TTL", "3600"))
+        return SQLiteResultStore(db, int(max_mb * 1024 * 1024), ttl_s), SQLiteTaskTable(db, task_ttl)
+    return ResultStore.from_env(), TaskTable(task_ttl)
+
+
+STORE, TASKS = _open_stores()
+
+__all__ = [
+    "ResultStore",
+    "SQLiteDB",
+    "SQLiteResultStore",
+    "SQLiteTaskTable",
+    "StoredResult",
+    "TaskTable",
+    "STORE",
+    "TASKS",
+]
@@ -0,0 +1,184 @@
+# backend/app/urs_sessions.py
+"""Process-wide pool of authenticated Earthdata (URS) sessions.
+
+Opening a granule used to run ``pydap.cas.urs.setup_session`` for every
+endpoint attempt: a new Earthdata login handshake, a new TCP/TLS connection
+and a re-read of ``~/.netrc``. The pool keeps up to ``URS_SESSION_POOL_SIZE``
+logged-in ``requests`` sessions per host and lends them out exclusively, so
+cookies and keep-alive connections are reused across granules and requests.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import netrc as _netrc
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pydap.cas.urs import setup_session as urs_setup_session
+
+URS_HOST = "urs.earthdata.nasa.gov"
+
+
+@dataclass
+class _Entry:
+    session: object
+    created_at: float = field(default_factory=time.monotonic)
+    stale: bool = False
+
+
+class URSSessionPool:
+    """Per-host pool of URS sessions, safe to share between threads.
+
+    A session is refreshed (closed and re-created with freshly read
+    credentials) once it is older than ``URS_SESSION_TTL`` seconds, or
+    immediately after a caller reports it as rejected via ``invalidate``.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        timeout_s: Optional[float] = None,
+    ) -> None:
+        self.size = max(1, size or int(os.getenv("URS_SESSION_POOL_SIZE", os.getenv("NASA_DAP_PER_HOST", "4"))))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("URS_SESSION_TTL", "3000"))
+        self.timeout_s = timeout_s if timeout_s is not None else float(os.getenv("NASA_DAP_TIMEOUT", "12"))
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[_Entry]] = {}
+        self._leased: Dict[int, _Entry] = {}
+        self._count: Dict[str, int] = {}
+        self._creds: Optional[Tuple[str, str]] = None
+        self._creds_mtime: Optional[float] = None
+
+    # -- credentials -------------------------------------------------------
+
+    def credentials(self) -> Tuple[str, str]:
+        """Return (username, password) from ``~/.netrc``, re-read only when it changes."""
+        path = os.path.join(os.path.expanduser("~"), ".netrc")
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        with self._cond:
+            if self._creds is not None and mtime == self._creds_mtime:
+                return self._creds
+        auth = _netrc.netrc().authenticators(URS_HOST)
+        if not auth:
+            raise RuntimeError("Credenciales URS no encontradas en ~/.netrc")
+        username, _, password = auth
+        with self._cond:
+            self._creds = (username, password)
+            self._creds_mtime = mtime
+        return self._creds
+
+    # -- leasing -------------------------------------------------------------
+
+    def _expired(self, entry: _Entry) -> bool:
+        return entry.stale or (time.monotonic() - entry.created_at) > self.ttl_s
+
+    def _create(self, endpoint: str) -> _Entry:
+        username, password = self.credentials()
+        session = urs_setup_session(username, password, check_url=endpoint)
+        # Inject per-request timeout into the session
+        session.request = functools.partial(session.request, timeout=self.timeout_s)  # type: ignore[attr-defined]
+        return _Entry(session=session)
+
+    def _checkout(self, host: str, endpoint: str, deadline: Optional[float]) -> _Entry:
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(host, [])
+                while idle:
+                    entry = idle.pop()
+                    if not self._expired(entry):
+                        self._leased[id(entry.session)] = entry
+                        return entry
+                    self._count[host] -= 1
+                    _close_quietly(entry)
+                if self._count.get(host, 0) < self.size:
+                    self._count[host] = self._count.get(host, 0) + 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"no URS session available for {host}")
+                self._cond.wait(remaining)
+        try:
+            entry = self._create(endpoint)
+        except BaseException:
+            with self._cond:
+                self._count[host] -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._leased[id(entry.session)] = entry
+        return entry
+
+    def _checkin(self, host: str, entry: _Entry) -> None:
+        with self._cond:
+            self._leased.pop(id(entry.session), None)
+            if self._expired(entry):
+                self._count[host] -= 1
+                _close_quietly(entry)
+            else:
+                self._idle.setdefault(host, []).append(entry)
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def lease(self, endpoint: str, deadline: Optional[float] = None) -> Iterator[object]:
+        """Borrow a logged-in session for ``endpoint``'s host until the block exits.
+
+        ``deadline`` (a ``time.monotonic()`` value) bounds the wait when every
+        session for the host is already lent out.
+        """
+        host = urlsplit(endpoint).netloc
+        entry = self._checkout(host, endpoint, deadline)
+        try:
+            yield entry.session
+        finally:
+            self._checkin(host, entry)
+
+    def invalidate(self, session: object) -> None:
+        """Mark a leased session as rejected (e.g. 401/403) so it is not reused."""
+        with self._cond:
+            entry = self._leased.get(id(session))
+            if entry is not None:
+                entry.stale = True
+            self._creds_mtime = None
+
+    def clear(self) -> None:
+        """Close every idle session (leased ones are closed on return)."""
+        with self._cond:
+            for host, idle in self._idle.items():
+                for entry in idle:
+                    self._count[host] -= 1
+                    _close_quietly(entry)
+                idle.clear()
+            for entry in self._leased.values():
+                entry.stale = True
+
+
+def _close_quietly(entry: _Entry) -> None:
+    try:
+        entry.session.close()  # type: ignore[attr-defined]
+    except Exception:
+        pass
+
+
+_POOL: Optional[URSSessionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> URSSessionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = URSSessionPool()
+        return _POOL
+
+
+__all__ = ["URSSessionPool", "get_pool"]
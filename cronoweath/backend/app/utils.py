@@ -1,7 +1,11 @@
-import io
-import csv
-from typing import Any, Dict, List
-from datetime import datetime, timezone
+import calendar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .series import Series
 
 
 def now_iso() -> str:
@@ -14,27 +18,56 @@ def default_units(units_ui: str = "SI") -> Dict[str, str]:
     return {"temp": "degC", "precip": "mm", "wind": "km/h", "prob": "%"}
 
 
-def timeseries_to_csv(meta: Dict[str, Any], ts: List[Dict[str, Any]]) -> bytes:
-    buffer = io.StringIO()
-    for key, value in meta.items():
-        buffer.write(f"# {key}: {value}\n")
-
-    headers = [
-        "date",
-        "t2m_max",
-        "hi_max",
-        "t2m_min",
-        "wc_min",
-        "wind_speed_max",
-        "wind_gust_p95",
-        "precip_daily",
-        "precip_rate_max",
-        "exceed",
-    ]
-
-    writer = csv.DictWriter(buffer, fieldnames=headers)
-    writer.writeheader()
-    for row in ts:
-        writer.writerow({header: row.get(header, "") for header in headers})
-
-    return buffer.getvalue().encode("utf-8")
+def round_exact(values: Any, ndigits: int) -> np.ndarray:
+    """Vectorized ``round(float(x), ndigits)`` with Python's exact semantics.
+
+    ``np.round`` scales by ``10**ndigits`` and can land on the other side of a
+    .5 tie than Python's correctly-rounded ``round``; the few near-tie values
+    are re-rounded in Python so results match the scalar code bit for bit.
+    """
+    arr = np.asarray(values, dtype=float)
+    out = np.round(arr, ndigits)
+    scaled = arr * 10.0 ** ndigits
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for idx in np.flatnonzero(near_tie):
+        out.flat[idx] = round(float(arr.flat[idx]), ndigits)
+    return out
+
+
+def seasonal_windows(
+    month: int,
+    day: int,
+    years: int,
+    window: int,
+    end_year: Optional[int] = None,
+) -> List[Tuple[str, str]]:
+    """Plan the per-year date windows (inclusive ISO bounds) around MM-DD.
+
+    Only the ``2 * window + 1`` days around the target in each year are
+    requested, instead of one contiguous multi-decade span. Windows may cross
+    a year boundary (e.g. 01-05 +/-15 starts in December of the previous
+    year). Days that do not exist in a given year (02-29 outside leap years,
+    04-31) are clamped to the last day of that month. Overlapping windows
+    (very wide ``window`` values) are merged so no day is fetched twice.
+    """
+    if end_year is None:
+        end_year = date.today().year - 1
+    start_year = end_year - (years - 1)
+    spans: List[Tuple[date, date]] = []
+    for year in range(start_year, end_year + 1):
+        center = date(year, month, min(day, calendar.monthrange(year, month)[1]))
+        start = center - timedelta(days=window)
+        end = center + timedelta(days=window)
+        if spans and start <= spans[-1][1] + timedelta(days=1):
+            spans[-1] = (spans[-1][0], max(end, spans[-1][1]))
+        else:
+            spans.append((start, end))
+    return [(start.isoformat(), end.isoformat()) for start, end in spans]
+
+
+def timeseries_to_csv(meta: Dict[str, Any], ts: "Series") -> bytes:
+    """Whole CSV in memory; ``/download`` streams ``exporters.iter_csv`` instead."""
+    from .exporters import iter_csv
+
+    return b"".join(iter_csv(meta, ts))
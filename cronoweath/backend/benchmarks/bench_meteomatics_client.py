@@ -0,0 +1,205 @@
+# backend/benchmarks/bench_meteomatics_client.py
+"""Meteomatics fetches against a local stub server: one-shot requests vs. the pooled client.
+
+Starts a Starlette/uvicorn stand-in for the Meteomatics API on localhost
+(each response is delayed by ``--latency`` plus ``--per-day`` per
+requested day) and runs ``--queries`` 20-year fetches for different
+points three ways: the previous ``httpx.get`` of the whole period (a new
+connection per query), ``fetch_daily_series`` (pooled keep-alive client,
+periods split into parallel sub-requests) and ``fetch_daily_series_async``.
+The stub counts the connections it accepts; every way must give the same
+series. A last pass makes the stub fail ``--fail-rate`` of the requests
+with 429/503 to exercise the retries. uvicorn speaks HTTP/1.1 only, so the
+HTTP/2 path is not covered here::
+
+    python cronoweath/backend/benchmarks/bench_meteomatics_client.py --queries 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from cronoweath.backend.app import meteomatics_engine as mm  # noqa: E402
+from cronoweath.backend.app.series import Series  # noqa: E402
+from cronoweath.backend.app.utils import round_exact, seasonal_windows  # noqa: E402
+
+
+class Stub:
+    """The stand-in API; ``connections`` holds the client ports seen since the last reset."""
+
+    def __init__(self, latency: float, per_day: float) -> None:
+        self.latency = latency
+        self.per_day = per_day
+        self.fail_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.connections: set = set()
+        self.app = Starlette(routes=[Route("/{path:path}", self.handle)])
+
+    def reset(self) -> None:
+        self.requests = self.failures = 0
+        self.connections = set()
+
+    async def handle(self, request: Request) -> Response:
+        self.requests += 1
+        self.connections.add(request.client.port)
+        periods, parameters, point, _ = request.path_params["path"].split("/")
+        days = _days(periods)
+        await asyncio.sleep(self.latency + self.per_day * len(days))
+        if random.random() < self.fail_rate:
+            self.failures += 1
+            return Response("busy", status_code=random.choice([429, 503]), headers={"Retry-After": "0"})
+        lat, lon = map(float, point.split(","))
+        data = [
+            {
+                "parameter": parameter,
+                "coordinates": [
+                    {"lat": lat, "lon": lon, "dates": [
+                        {"date": f"{day}T00:00:00Z", "value": _value(parameter, day, lat)} for day in days
+                    ]}
+                ],
+            }
+            for parameter in parameters.split(",")
+        ]
+        return Response(json.dumps({"version": "3.0", "status": "OK", "data": data}), media_type="application/json")
+
+    def start(self) -> str:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="error"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.02)
+        return f"http://127.0.0.1:{port}"
+
+
+def _days(periods: str) -> List[date]:
+    days = []
+    for period in periods.split(","):
+        start, end = period.split(":PT24H")[0].split("--")
+        day, last = date.fromisoformat(start[:10]), date.fromisoformat(end[:10])
+        while day <= last:
+            days.append(day)
+            day += timedelta(days=1)
+    return days
+
+
+def _value(parameter: str, day: date, lat: float) -> float | None:
+    h = (day.toordinal() * 7919 + sum(map(ord, parameter)) + int(lat * 100)) % 997
+    if h % 41 == 0:
+        return None
+    return round((h % 600) / 10.0 - (20.0 if parameter.startswith("t_") else 0.0), 1)
+
+
+def _fetch_one_shot(lat: float, lon: float, windows: List[Tuple[str, str]]) -> Series:
+    """``fetch_daily_series`` before the pooled client: one request, fresh connection, whole body decoded."""
+    user, password = mm._credentials()
+    url = mm._build_url(windows, lat, lon)
+    response = httpx.get(url, auth=(user, password), timeout=mm.DEFAULT_TIMEOUT)
+    if response.status_code >= 400:
+        raise RuntimeError(f"Meteomatics request failed ({response.status_code}): {response.text[:200]}")
+
+    payload = response.json()
+    rows: Dict[str, Dict[str, Any]] = {}
+    for entry in payload.get("data", []):
+        field = mm.PARAMETERS.get(entry.get("parameter"))
+        if field is None:
+            continue
+        for coordinate in entry.get("coordinates", []):
+            for item in coordinate.get("dates", []):
+                date_iso = item.get("date")
+                if date_iso:
+                    rows.setdefault(date_iso[:10], {})[field] = mm._to_float(item.get("value"))
+
+    sorted_days = sorted(rows.keys())
+    series = Series(sorted_days)
+    for field in mm.SERIES_FIELDS:
+        column = np.array([np.nan if rows[day].get(field) is None else rows[day][field] for day in sorted_days])
+        series.set(field, round_exact(column, 2), present="finite")
+    return mm._with_derived(series)
+
+
+def _timed(label: str, stub: Stub, fn) -> List[Series]:
+    stub.reset()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {elapsed:7.2f} s  {stub.requests:4d} requests  "
+        f"{len(stub.connections):3d} connections  {stub.failures:3d} failed"
+    )
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=10, help="points fetched one after another")
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--window", type=int, default=15)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub delay per request (s)")
+    parser.add_argument("--per-day", type=float, default=0.0005, help="stub delay per requested day (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="share of failed requests in the last pass")
+    parser.add_argument("--seed", type=int, default=21)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.getLogger("cronoweath.meteomatics").setLevel(logging.ERROR)
+    stub = Stub(args.latency, args.per_day)
+    mm.BASE_URL = stub.start()
+    mm.BACKOFF_S = 0.01
+    os.environ.setdefault("METEOMATICS_USERNAME", "bench")
+    os.environ.setdefault("METEOMATICS_PASSWORD", "bench")
+
+    windows = seasonal_windows(7, 15, args.years, args.window)
+    points = [(19.43 + 0.37 * i, -99.13 + 0.21 * i) for i in range(args.queries)]
+
+    def _sync(fetch) -> List[Series]:
+        return [fetch(lat, lon, windows) for lat, lon in points]
+
+    async def _async() -> List[Series]:
+        series = [await mm.fetch_daily_series_async(lat, lon, windows) for lat, lon in points]
+        await mm.close_clients()
+        return series
+
+    print(
+        f"{args.queries} queries x {len(windows)} windows, {mm.CHUNK_WINDOWS} windows per sub-request, "
+        f"concurrency {mm.CONCURRENCY}, HTTP/2 {'on' if mm.HTTP2 else 'off (h2 not installed)'}"
+    )
+    reference = _timed("one-shot httpx.get", stub, lambda: _sync(_fetch_one_shot))
+    pooled = _timed("pooled, parallel", stub, lambda: _sync(mm.fetch_daily_series))
+    awaited = _timed("async, parallel", stub, lambda: asyncio.run(_async()))
+    stub.fail_rate = args.fail_rate
+    retried = _timed(f"pooled, {args.fail_rate:.0%} failing", stub, lambda: _sync(mm.fetch_daily_series))
+
+    expected = [series.to_rows() for series in reference]
+    for label, result in (("pooled", pooled), ("async", awaited), ("retried", retried)):
+        assert [series.to_rows() for series in result] == expected, f"{label} series differ from one-shot"
+    print("series identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
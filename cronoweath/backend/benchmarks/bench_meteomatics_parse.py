@@ -0,0 +1,151 @@
+# backend/benchmarks/bench_meteomatics_parse.py
+"""Parsing of Meteomatics responses: whole-body rows dict vs. streamed arrays.
+
+Builds seeded Meteomatics-like JSON bodies (with ``null`` values and an
+unknown parameter) for the seasonal default, one sub-request of it and
+contiguous spans, and parses each three ways: the previous
+``response.json()`` + per-date rows dict (kept here as the reference),
+``_parse_stream`` decoding the body whole with ``json.loads`` and
+``_parse_stream`` streaming it through ``ijson``. Reports the best time of
+``--repeat`` runs and the ``tracemalloc`` peak (the raw body, held by every
+path, is excluded), and which path the engine picks by default
+(``METEOMATICS_STREAM_MIN_DAYS``). The JSON of the resulting rows must be
+byte-identical::
+
+    python cronoweath/backend/benchmarks/bench_meteomatics_parse.py --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from cronoweath.backend.app import meteomatics_engine as mm  # noqa: E402
+from cronoweath.backend.app.series import Series  # noqa: E402
+from cronoweath.backend.app.utils import round_exact, seasonal_windows  # noqa: E402
+
+_BODY_CHUNK = 64 * 1024  # bytes per iter_bytes() chunk
+
+
+def _body(windows: List[Tuple[str, str]], seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    days = np.concatenate(
+        [np.arange(np.datetime64(start), np.datetime64(end) + 1, dtype="datetime64[D]") for start, end in windows]
+    )
+    dates = [f"{day}T00:00:00Z" for day in days.astype(str)]
+    data = []
+    for parameter in [*mm.PARAMETERS, "msl_pressure:hPa"]:
+        values = np.round(rng.normal(20.0, 8.0, days.size), 1).tolist()
+        for index in np.flatnonzero(rng.random(days.size) < 0.03):
+            values[index] = None
+        data.append({
+            "parameter": parameter,
+            "coordinates": [{"lat": 19.43, "lon": -99.13, "dates": [
+                {"date": date, "value": value} for date, value in zip(dates, values)
+            ]}],
+        })
+    return json.dumps({"version": "3.0", "status": "OK", "data": data}).encode("utf-8")
+
+
+def _parse_rows(body: bytes) -> Series:
+    """``_parse_response`` before streaming: whole document, rows dict keyed by date, sort."""
+    payload = json.loads(body)
+    rows: Dict[str, Dict[str, Any]] = {}
+
+    for entry in payload.get("data", []):
+        parameter = entry.get("parameter")
+        field = mm.PARAMETERS.get(parameter)
+        if field is None:
+            continue
+        for coordinate in entry.get("coordinates", []):
+            for item in coordinate.get("dates", []):
+                date_iso = item.get("date")
+                if not date_iso:
+                    continue
+                day_key = date_iso[:10]
+                rows.setdefault(day_key, {})[field] = mm._to_float(item.get("value"))
+
+    sorted_days = sorted(rows.keys())
+    series = Series(sorted_days)
+    for field in mm.SERIES_FIELDS:
+        values = [rows[day].get(field) for day in sorted_days]
+        column = np.array([np.nan if value is None else value for value in values], dtype=float)
+        series.set(field, round_exact(column, 2), present="finite")
+    return series
+
+
+def _parse_arrays(body: bytes, windows: List[Tuple[str, str]], stream: bool) -> Series:
+    chunks = [body[start:start + _BODY_CHUNK] for start in range(0, len(body), _BODY_CHUNK)]
+    default = mm.STREAM_MIN_DAYS
+    mm.STREAM_MIN_DAYS = 0 if stream else sys.maxsize
+    try:
+        return mm._parse_stream(iter(chunks), windows)
+    finally:
+        mm.STREAM_MIN_DAYS = default
+
+
+def _measure(fn, repeat: int) -> Tuple[Series, float, float]:
+    """``(result, best seconds, peak MB)``."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=22)
+    args = parser.parse_args()
+
+    if mm.ijson is None:
+        print("ijson is not installed: nothing to compare")
+        return 1
+
+    seasonal = seasonal_windows(7, 15, 20, 15)
+    cases = {
+        "sub-request (5 x +/-15 d)": seasonal[: mm.CHUNK_WINDOWS],
+        "1 year": [("2019-01-01", "2019-12-31")],
+        "20 x +/-15 d": seasonal,
+        "5 years": [("2015-01-01", "2019-12-31")],
+        "20 years": [("2000-01-01", "2019-12-31")],
+    }
+    print(f"default: streamed from {mm.STREAM_MIN_DAYS} requested days (METEOMATICS_STREAM_MIN_DAYS)")
+    print(f"{'case':<26} {'days':>5} {'body':>8}  {'rows dict':>16}  {'json.loads':>16}  {'ijson':>16}  default")
+    for label, windows in cases.items():
+        body = _body(windows, args.seed)
+        results = [
+            _measure(lambda: _parse_rows(body), args.repeat),
+            _measure(lambda: _parse_arrays(body, windows, stream=False), args.repeat),
+            _measure(lambda: _parse_arrays(body, windows, stream=True), args.repeat),
+        ]
+        reference = json.dumps(mm._with_derived(results[0][0]).to_rows())
+        for series, _, _ in results[1:]:
+            assert json.dumps(mm._with_derived(series).to_rows()) == reference, f"{label}: rows differ"
+        days = len(results[0][0])
+        timings = "  ".join(f"{seconds * 1e3:6.1f} ms {peak:5.1f} MB" for _, seconds, peak in results)
+        chosen = "ijson" if mm._streamed(windows) else "json.loads"
+        print(f"{label:<26} {days:5d} {len(body) / 1e6:6.2f} MB  {timings}  {chosen}")
+    print("rows identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# backend/benchmarks/bench_opendap_reader.py
+"""Wall-clock of the concurrent OPeNDAP granule reader against a local server.
+
+Serves MERRA-2-like hourly granules (T2M, U10M, V10M, RH2M) with pydap's
+in-memory handler, adding ``--latency`` seconds to every request as a
+stand-in for the round trip to GES DISC. Granules alternate between two
+host names (``127.0.0.1`` and ``localhost``), so the per-host limit can be
+seen in the peak of concurrent requests each host received::
+
+    python cronoweath/backend/benchmarks/bench_opendap_reader.py --granules 24 --per-host 2
+
+The local server needs no Earthdata login, so the URS pool hands out plain
+``requests`` sessions here.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Dict, List
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+warnings.filterwarnings("ignore")
+
+
+def _granule(day: int):
+    from pydap.model import BaseType, DatasetType, GridType
+
+    dataset = DatasetType(f"G{day:04d}")
+    coords = {
+        "time": (np.arange(24, dtype="f8") * 60 + day * 1440, {"units": "minutes since 2020-01-01 00:00:00"}),
+        "lat": (np.arange(15.0, 25.0, 0.5), {}),
+        "lon": (np.arange(-105.0, -95.0, 0.625), {}),
+    }
+    shape = tuple(values.size for values, _ in coords.values())
+    rng = np.random.default_rng(day)
+    for name, base, spread in (("T2M", 290.0, 8.0), ("U10M", 0.0, 6.0), ("V10M", 0.0, 6.0), ("RH2M", 60.0, 30.0)):
+        grid = GridType(name)
+        grid[name] = BaseType(name, (base + spread * rng.standard_normal(shape)).astype("f4"), dimensions=tuple(coords))
+        for coord, (values, attrs) in coords.items():
+            grid[coord] = BaseType(coord, values, dimensions=(coord,), **attrs)
+        dataset[name] = grid
+    for coord, (values, attrs) in coords.items():
+        dataset[coord] = BaseType(coord, values, dimensions=(coord,), **attrs)
+    return dataset
+
+
+class _Server:
+    """Threaded WSGI server for ``/G<day>.nc4<.ext...>``; counts in-flight requests per host."""
+
+    def __init__(self, granules: int, latency: float) -> None:
+        from pydap.handlers.lib import BaseHandler
+
+        self.latency = latency
+        self.handlers = {f"/G{day:04d}.nc4": BaseHandler(_granule(day)) for day in range(granules)}
+        self.lock = threading.Lock()
+        self.inflight: Dict[str, int] = {}
+        self.peak: Dict[str, int] = {}
+        self.requests = 0
+
+        class _Threaded(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+
+        class _Quiet(WSGIRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = make_server("127.0.0.1", 0, self.app, server_class=_Threaded, handler_class=_Quiet)
+        self.port = self.httpd.server_port
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def app(self, environ, start_response):
+        host = environ.get("HTTP_HOST", "").split(":")[0]
+        with self.lock:
+            self.requests += 1
+            self.inflight[host] = self.inflight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.inflight[host])
+        try:
+            time.sleep(self.latency)
+            # Any DAP suffix chain after the granule name (.dds, .dods.dds, ...)
+            path = environ["PATH_INFO"]
+            handler = self.handlers.get(path[: path.find(".nc4") + 4]) if ".nc4" in path else None
+            if handler is None:
+                start_response("404 Not Found", [("Content-Type", "text/plain")])
+                return [b"not found"]
+            return handler(environ, start_response)
+        finally:
+            with self.lock:
+                self.inflight[host] -= 1
+
+    def reset(self) -> None:
+        with self.lock:
+            self.peak.clear()
+            self.requests = 0
+
+    def urls(self, granules: int) -> List[str]:
+        hosts = ("127.0.0.1", "localhost")
+        return [f"http://{hosts[day % 2]}:{self.port}/G{day:04d}.nc4" for day in range(granules)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--granules", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--per-host", type=int, default=4, help="NASA_DAP_PER_HOST")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="NASA_DAP_CONCURRENCY values to compare")
+    args = parser.parse_args()
+
+    os.environ["NASA_DAP_PER_HOST"] = str(args.per_host)
+    os.environ.setdefault("NASA_DAP_TOTAL", "600")
+    from cronoweath.backend.app import nasa_engine, urs_sessions
+
+    class _LocalPool(urs_sessions.URSSessionPool):
+        def credentials(self):
+            return "bench", "bench"
+
+        def _create(self, endpoint):
+            import requests
+
+            return urs_sessions._Entry(session=requests.Session())
+
+    urs_sessions._POOL = _LocalPool(size=args.per_host)
+    server = _Server(args.granules, args.latency)
+    urls = server.urls(args.granules)
+    windows = [("2020-01-01", str(np.datetime64("2020-01-01") + args.granules - 1))]
+
+    def _read_one(url: str, deadline: float):
+        return nasa_engine._merra2_granule(
+            url, lambda ds: nasa_engine.select_point(ds, 20.0, -99.0), windows, deadline
+        )
+
+    print(f"{args.granules} granules, {args.latency * 1000:.0f} ms per request, NASA_DAP_PER_HOST={args.per_host}")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'requests':>9}  peak in-flight per host")
+    reference = None
+    baseline = None
+    for workers in [int(item) for item in args.concurrency.split(",")]:
+        server.reset()
+        t0 = time.perf_counter()
+        results = nasa_engine._read_granules(urls, _read_one, concurrency=workers)
+        elapsed = time.perf_counter() - t0
+        t2m = np.concatenate([item["t2m_max"].values for item in results])
+        stamps = np.concatenate([item["t2m_max"]["time"].values for item in results])
+        assert np.all(np.diff(stamps) > np.timedelta64(0)), "results not in time order"
+        if reference is None:
+            reference, baseline = t2m, elapsed
+        assert np.array_equal(t2m, reference), "results differ between concurrency levels"
+        assert max(server.peak.values()) <= args.per_host, f"per-host limit exceeded: {server.peak}"
+        print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x {server.requests:>9}  {dict(sorted(server.peak.items()))}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+# backend/benchmarks/bench_row_assembly.py
+"""Row assembly of a NASA point series: per-cell lookups vs. whole columns.
+
+Builds seeded MERRA-2/IMERG-like daily series (with gaps and NaNs) over
+``--years`` seasonal windows and assembles them twice: with the previous
+per-day, per-variable ``ds[var].sel(time=...).item()`` loop, kept here as
+the reference, and with ``nasa_engine._series_from_daily``. The JSON
+serialisation of both must be byte-identical::
+
+    python cronoweath/backend/benchmarks/bench_row_assembly.py --years 80
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import xarray as xr
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+warnings.filterwarnings("ignore")
+
+from cronoweath.backend.app.formulas import compute_dew_point, compute_heat_index, compute_wind_chill  # noqa: E402
+from cronoweath.backend.app.nasa_engine import _series_from_daily, seasonal_windows  # noqa: E402
+from cronoweath.backend.app.point_cache import window_days  # noqa: E402
+
+_FIELDS = {
+    # name: (mean, spread)
+    "t2m_max": (30.0, 8.0),
+    "t2m_min": (12.0, 9.0),
+    "wind_speed_max": (18.0, 10.0),
+    "wind_gust_p95": (28.0, 12.0),
+    "rh_max": (70.0, 25.0),
+}
+
+
+def _inputs(years: int, window: int, seed: int):
+    rng = np.random.default_rng(seed)
+    days = window_days(seasonal_windows(7, 15, years, window))
+    merra: Dict[str, xr.DataArray | None] = {}
+    for name, (mean, spread) in _FIELDS.items():
+        values = mean + spread * rng.standard_normal(days.size)
+        if name == "rh_max":
+            values = np.clip(values, 1.0, 100.0)
+        if name == "wind_speed_max":
+            values = np.abs(values)
+        values[rng.random(days.size) < 0.05] = np.nan
+        merra[name] = xr.DataArray(values, coords={"time": days.astype("datetime64[ns]")}, dims="time")
+    # IMERG misses some days entirely, so the merge has to align the two
+    kept = np.sort(rng.choice(days.size, size=int(days.size * 0.9), replace=False))
+    precip = np.abs(rng.gamma(0.6, 6.0, kept.size))
+    precip[rng.random(kept.size) < 0.03] = np.nan
+    imerg = xr.DataArray(precip, coords={"time": days[kept].astype("datetime64[ns]")}, dims="time")
+    return merra, imerg
+
+
+def _rows_per_cell(merra: Dict[str, xr.DataArray | None], imerg: xr.DataArray | None) -> List[Dict[str, Any]]:
+    """The assembly loop ``assemble_series_real`` used before it was vectorized."""
+    pieces: List[xr.DataArray] = []
+    for name, data_array in merra.items():
+        if data_array is not None:
+            pieces.append(data_array.rename(name).reset_coords(drop=True))
+    if imerg is not None:
+        pieces.append(imerg.rename("precip_daily").reset_coords(drop=True))
+
+    ds = xr.merge(pieces).sortby("time")
+
+    rows: List[Dict[str, Any]] = []
+    for ts_value in ds["time"].values:
+        row: Dict[str, Any] = {"date": np.datetime_as_string(ts_value, unit="D")}
+        for var in ds.data_vars:
+            value = ds[var].sel(time=ts_value).item()
+            if isinstance(value, (np.floating, float, int, np.integer)):
+                row[var] = None if np.isnan(value) else round(float(value), 2)
+
+        temp_max = row.get("t2m_max")
+        rh_max = row.get("rh_max")
+        temp_min = row.get("t2m_min")
+        wind_max = row.get("wind_speed_max")
+
+        hi = compute_heat_index(temp_max, rh_max)
+        if hi is not None:
+            row["hi_max"] = hi
+
+        dew = compute_dew_point(temp_max, rh_max)
+        if dew is not None:
+            row["dewpoint_max"] = dew
+
+        wc = compute_wind_chill(temp_min, wind_max)
+        if wc is not None:
+            row["wc_min"] = wc
+
+        rows.append(row)
+
+    return rows
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=80, help="seasonal windows to assemble")
+    parser.add_argument("--window", type=int, default=15, help="half-width of each window in days")
+    parser.add_argument("--seed", type=int, default=6)
+    args = parser.parse_args()
+
+    merra, imerg = _inputs(args.years, args.window, args.seed)
+    reference, old_s = _timed(_rows_per_cell, merra, imerg)
+    series, new_s = _timed(lambda: _series_from_daily(merra, imerg).to_rows())
+
+    old_json = json.dumps(reference)
+    new_json = json.dumps(series)
+    assert new_json == old_json, "vectorized rows differ from the per-cell reference"
+
+    print(f"{len(reference)} days, {len(old_json)} bytes of JSON, output identical")
+    print(f"per-cell  {old_s:8.3f} s")
+    print(f"columns   {new_s:8.3f} s  ({old_s / new_s:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
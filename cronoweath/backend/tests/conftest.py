@@ -0,0 +1,10 @@
+# backend/tests/conftest.py
+"""Make ``cronoweath.backend.app`` importable when pytest runs from any directory."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
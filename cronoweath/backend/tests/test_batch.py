@@ -0,0 +1,126 @@
+# backend/tests/test_batch.py
+"""``/query/batch`` must answer each query exactly as a single ``/query`` does."""
+from __future__ import annotations
+
+import json
+import types
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from cronoweath.backend.app import engines, main, mock_engine
+from cronoweath.backend.app.engines import Engine
+from cronoweath.backend.app.series import Series
+
+PRECIP = ("precip_daily", "precip_rate_max")
+
+
+class PointEngine:
+    """The mock engine made location-dependent, fetching precipitation only for ``wet`` (as NASA does)."""
+
+    def __init__(self) -> None:
+        self.fetches = 0
+
+    @staticmethod
+    def series_key(lat, lon, condition=None):
+        conditions = [condition] if isinstance(condition, str) else list(condition or ())
+        return round(lat, 1), round(lon, 1), "wet" in conditions
+
+    def assemble_series_real(self, lat, lon, target_month, target_day, years=20, window=15, condition=None):
+        self.fetches += 1
+        base = mock_engine.assemble_series(target_month, target_day, years=years, window=window)
+        cell_lat, cell_lon, wet = self.series_key(lat, lon, condition)
+        shift = (cell_lat - 20.0) / 5.0 + (cell_lon + 100.0) / 50.0
+        series = Series(base.dates)
+        for name in base.fields:
+            if name in PRECIP and not wet:
+                continue
+            values = base.values(name)
+            if name not in PRECIP:
+                values = np.round(values + shift, 1)
+            series.set(name, values, present=base.present[name])
+        return series
+
+    def engine(self) -> Engine:
+        engine = Engine("mock", ".mock_engine", {}, remote=False)
+        module = types.ModuleType("point_mock")
+        module.__dict__.update(vars(mock_engine))
+        module.series_key = self.series_key
+        module.assemble_series_real = self.assemble_series_real
+        engine._module = module
+        return engine
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    monkeypatch.setitem(engines.ENGINES, "mock", PointEngine().engine())
+    monkeypatch.setenv("ALWAYS_ASYNC", "false")
+    return TestClient(main.app)
+
+
+def _queries() -> List[Dict[str, Any]]:
+    # Two points share a cell; the third has warmer, the fourth colder data
+    locations = [(19.40, -99.10), (19.43, -99.12), (25.7, -100.3), (40.4, -3.7)]
+    variants = [
+        {},
+        {"logic": "ALL"},
+        {"thresholds": {"T_min": 30.0, "HI_min": 33.0}, "logic": "ALL"},
+        {"thresholds": {"HI_min": None}},
+        {"window_days": 5, "lastN_years": 12},
+        {"target_day": "02-29"},
+        {"years_mode": "all"},
+        {"window_days": 1, "lastN_years": 2},
+        {"thresholds": {"T_min": None, "HI_min": None, "T_max": None, "WC_max": None}},
+    ]
+    queries = []
+    for lat, lon in locations:
+        for condition in ("hot", "cold", "windy", "wet", "muggy"):
+            for variant in variants:
+                query = {"location": {"lat": lat, "lon": lon}, "target_day": "07-15", "condition": condition}
+                queries.append({**query, "engine": "mock", **variant})
+    return queries
+
+
+def test_batch_matches_single_queries(client: TestClient) -> None:
+    queries = _queries()
+    response = client.post("/query/batch", json=queries)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(queries)))
+
+    statuses = set()
+    for line in lines:
+        single = client.post("/query", json=queries[line["index"]]).json()
+        statuses.add(line["status"])
+        if "detail" in single:
+            # /query answers "no data" with an HTTP error
+            assert line["status"] == "no_data" and line["message"] == single["detail"], line
+            assert line["sample"]["n_days"] == 0
+            continue
+        assert line["status"] == single.get("status", "ok"), line
+        assert line["sample"] == single["sample"], line
+        if line["status"] == "ok":
+            for key in ("condition", "logic", "location", "target_day", "thresholds_resolved", "probability_pct", "stats"):
+                assert line[key] == single[key], (key, line)
+        else:
+            assert line["message"] == single["message"]
+            assert line["probability_pct"] is None
+    assert {"ok", "insufficient_sample", "no_data"} <= statuses
+    # Locations in different cells get different answers, so a mix-up would show
+    by_index = {line["index"]: line for line in lines}
+    per_point = len(queries) // 4
+    hot = [by_index[point * per_point]["probability_pct"] for point in range(4)]
+    assert hot[0] == hot[1] and len(set(hot)) == 3
+
+
+def test_batch_reports_invalid_items_on_their_own_line(client: TestClient) -> None:
+    good = _queries()[0]
+    body = "\n".join([json.dumps(good), "{not json", json.dumps({**good, "condition": "foggy"})])
+    response = client.post("/query/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+
+    assert lines[0]["probability_pct"] == client.post("/query", json=good).json()["probability_pct"]
+    assert lines[1]["status"] == "error" and lines[1]["message"].startswith("Invalid JSON line")
+    assert lines[2]["status"] == "error" and lines[2]["message"].startswith("Invalid query")
@@ -0,0 +1,114 @@
+# backend/tests/test_cancel.py
+"""Cancelling a running async query, including through another worker's task table."""
+from __future__ import annotations
+
+import threading
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+from cronoweath.backend.app import engines, main, mock_engine, progress
+from cronoweath.backend.app.engines import Engine
+from cronoweath.backend.app.storage import SQLiteDB, SQLiteTaskTable
+
+CHUNKS = 40
+
+
+class SlowEngine:
+    """The mock engine, fetched in ``CHUNKS`` slow chunks."""
+
+    def __init__(self) -> None:
+        self.chunks = 0
+        self.stopped = threading.Event()
+
+    def iter_series_real(self, lat, lon, target_month, target_day, years=20, window=15, condition=None):
+        series = mock_engine.assemble_series(target_month, target_day, years=years, window=window)
+        try:
+            for done in range(1, CHUNKS + 1):
+                time.sleep(0.02)
+                progress.check_cancelled()
+                self.chunks = done
+                yield series, done, CHUNKS
+        finally:
+            self.stopped.set()
+
+    def engine(self) -> Engine:
+        engine = Engine("mock", ".mock_engine", {}, remote=True)
+        module = types.ModuleType("slow_mock")
+        module.__dict__.update(vars(mock_engine))
+        module.iter_series_real = self.iter_series_real
+        engine._module = module
+        return engine
+
+
+@pytest.fixture
+def slow(monkeypatch, tmp_path: Path) -> SlowEngine:
+    fake = SlowEngine()
+    monkeypatch.setitem(engines.ENGINES, "mock", fake.engine())
+    monkeypatch.setattr(main, "TASKS", SQLiteTaskTable(SQLiteDB(tmp_path / "results.db"), 60.0))
+    monkeypatch.setattr(main, "_PROGRESS_INTERVAL_S", 0.0)
+    return fake
+
+
+def _submit() -> str:
+    request = {"location": {"lat": 19.4, "lon": -99.1}, "target_day": "07-15", "condition": "hot", "engine": "mock"}
+    return main._submit_job(main.QueryRequest(**request).model_dump())["query_id"]
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_cancel_through_another_worker_stops_the_job(slow, tmp_path: Path) -> None:
+    query_id = _submit()
+    _wait_for(lambda: slow.chunks >= 3)
+
+    # Another worker only sees the shared table: it cannot reach this scheduler
+    other = SQLiteTaskTable(SQLiteDB(tmp_path / "results.db"), 60.0)
+    assert other.transition(query_id, {"status": "cancelled"}, expect=("queued", "running"))
+
+    assert slow.stopped.wait(5)
+    assert slow.chunks < CHUNKS
+    assert main.TASKS.get(query_id)["status"] == "cancelled"
+    assert main.STORE.get(query_id) is None
+
+
+def test_cancel_on_this_worker_stops_the_job(slow) -> None:
+    query_id = _submit()
+    _wait_for(lambda: slow.chunks >= 3)
+
+    assert main.cancel(query_id)["status"] == "cancelled"
+
+    assert slow.stopped.wait(5)
+    assert slow.chunks < CHUNKS
+    assert main.TASKS.get(query_id)["status"] == "cancelled"
+
+
+def test_cancelling_the_leader_leaves_an_identical_query_running(slow) -> None:
+    first = _submit()
+    _wait_for(lambda: slow.chunks >= 3)
+    # Same cell, day and window: waits on the first query's fetch
+    second = _submit()
+    _wait_for(lambda: main.TASKS.get(second)["status"] == "running")
+
+    main.cancel(first)
+
+    _wait_for(lambda: main.TASKS.get(second)["status"] != "running", timeout=10)
+    assert main.TASKS.get(second)["status"] == "done"
+    assert main.STORE.get(second) is not None
+    assert main.TASKS.get(first)["status"] == "cancelled"
+
+
+def test_job_past_its_deadline_ends_in_error(slow, monkeypatch) -> None:
+    monkeypatch.setattr(main.SCHEDULER, "timeout_s", 0.2)
+    query_id = _submit()
+
+    _wait_for(lambda: main.TASKS.get(query_id)["status"] != "running" and slow.stopped.is_set())
+    task = main.TASKS.get(query_id)
+    assert task["status"] == "error"
+    assert "deadline" in task["message"]
@@ -0,0 +1,76 @@
+# backend/tests/test_climatology.py
+"""Climatology builder: one engine call per calendar year, resumable, quiet first build."""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app import climatology, engines
+
+
+@pytest.fixture
+def calls(monkeypatch) -> List[List[Tuple[str, str]]]:
+    engine = engines.get_engine("mock")
+    real = engine.module.assemble_windows
+    seen: List[List[Tuple[str, str]]] = []
+
+    def _record(lat, lon, windows, condition=None):
+        seen.append(list(windows))
+        return real(lat, lon, windows, condition)
+
+    monkeypatch.setattr(engine.module, "assemble_windows", _record)
+    return seen
+
+
+def _same(a: climatology.ClimatologyIndex, b: climatology.ClimatologyIndex) -> bool:
+    return all(
+        np.array_equal(getattr(a.fields[name], attr), getattr(b.fields[name], attr))
+        for name in climatology.FIELDS
+        for attr in ("offsets", "values", "years")
+    )
+
+
+def test_build_fetches_one_year_per_call(tmp_path, calls, caplog) -> None:
+    store = climatology.ClimatologyStore(tmp_path)
+    engine = engines.get_engine("mock")
+    end_year = date.today().year - 1
+
+    with caplog.at_level(logging.WARNING, logger="cronoweath.climatology"):
+        index = climatology.build_location(store, engine, "Quito", -0.2, -78.5, years=3)
+
+    assert caplog.records == []
+    assert [len(windows) for windows in calls] == [1] * 5
+    assert calls[0] == [(f"{end_year - 3}-07-01", f"{end_year - 3}-12-31")]
+    assert calls[-1] == [(f"{end_year + 1}-01-01", f"{end_year + 1}-07-01")]
+    assert index.meta["first_day"] == f"{end_year - 3}-07-01"
+    assert index.meta["last_day"] == f"{end_year + 1}-07-01"
+    assert climatology.build_location(store, engine, "Quito", -0.2, -78.5, years=3) is None
+
+
+def test_interrupted_build_resumes(tmp_path, calls, monkeypatch) -> None:
+    engine = engines.get_engine("mock")
+    full = climatology.build_location(climatology.ClimatologyStore(tmp_path / "full"), engine, "A", 1.0, 2.0, 3)
+
+    record = engine.module.assemble_windows
+
+    def _fail_third(lat, lon, windows, condition=None):
+        if len(calls) == 5 + 2:  # the full build's five, then two years in
+            raise RuntimeError("connection reset")
+        return record(lat, lon, windows, condition)
+
+    store = climatology.ClimatologyStore(tmp_path / "partial")
+    monkeypatch.setattr(engine.module, "assemble_windows", _fail_third)
+    with pytest.raises(RuntimeError):
+        climatology.build_location(store, engine, "A", 1.0, 2.0, 3)
+    monkeypatch.setattr(engine.module, "assemble_windows", record)
+
+    saved = climatology.ClimatologyStore(tmp_path / "partial").load("mock", "a")
+    assert saved is not None and saved.meta["last_day"].endswith("-12-31")
+    resumed = climatology.build_location(store, engine, "A", 1.0, 2.0, 3)
+    assert resumed.meta["first_day"] == full.meta["first_day"]
+    assert resumed.meta["last_day"] == full.meta["last_day"]
+    assert _same(resumed, full)
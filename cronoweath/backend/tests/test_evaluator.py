@@ -0,0 +1,196 @@
+# backend/tests/test_evaluator.py
+"""The column evaluator must reproduce the former per-row ANY/ALL evaluation exactly."""
+from __future__ import annotations
+
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app.evaluator import (
+    CONDITION_CHECKS,
+    compile_checks,
+    count_batch,
+    evaluate,
+    exceedance_curve,
+)
+from cronoweath.backend.app.series import Series
+
+N = 2_000
+
+# field: (mean, spread) of the synthetic values
+FIELDS = {
+    "t2m_max": (28.0, 8.0),
+    "t2m_min": (5.0, 8.0),
+    "hi_max": (30.0, 9.0),
+    "wc_min": (2.0, 9.0),
+    "wind_speed_max": (20.0, 10.0),
+    "wind_gust_p95": (30.0, 12.0),
+    "precip_daily": (4.0, 6.0),
+    "precip_rate_max": (2.0, 3.0),
+    "dewpoint_max": (15.0, 6.0),
+}
+
+# Threshold sets per condition: both limits, either one, and none
+LIMITS = {
+    "hot": {"T_min": 32.0, "HI_min": 35.0},
+    "cold": {"T_max": 0.0, "WC_max": -5.0},
+    "windy": {"V_min": 25.0, "gust_min": 40.0},
+    "wet": {"P_daily": 5.0, "P_rate": 3.0},
+    "muggy": {"HI_min": 33.0, "Td_min": 18.0},
+}
+
+
+def _evaluate_row(row: Dict[str, Any], condition: str, thr: Dict[str, Any], logic: str) -> Tuple[bool, bool]:
+    """``main._evaluate_row`` as it was before the column evaluator replaced it."""
+    checks: List[bool] = []
+
+    def has(field: str) -> Optional[float]:
+        value = row.get(field)
+        return None if value is None else float(value)
+
+    if condition == "hot":
+        t_lim = thr.get("T_min")
+        if t_lim is not None and (val := has("t2m_max")) is not None:
+            checks.append(val >= float(t_lim))
+        hi_lim = thr.get("HI_min")
+        if hi_lim is not None and (val := has("hi_max")) is not None:
+            checks.append(val >= float(hi_lim))
+
+    elif condition == "cold":
+        t_lim = thr.get("T_max")
+        if t_lim is not None and (val := has("t2m_min")) is not None:
+            checks.append(val <= float(t_lim))
+        wc_lim = thr.get("WC_max")
+        if wc_lim is not None and (val := has("wc_min")) is not None:
+            checks.append(val <= float(wc_lim))
+
+    elif condition == "windy":
+        v_lim = thr.get("V_min")
+        if v_lim is not None and (val := has("wind_speed_max")) is not None:
+            checks.append(val >= float(v_lim))
+        g_lim = thr.get("gust_min")
+        if g_lim is not None and (val := has("wind_gust_p95")) is not None:
+            checks.append(val >= float(g_lim))
+
+    elif condition == "wet":
+        p_lim = thr.get("P_daily")
+        if p_lim is not None and (val := has("precip_daily")) is not None:
+            checks.append(val >= float(p_lim))
+        r_lim = thr.get("P_rate")
+        if r_lim is not None and (val := has("precip_rate_max")) is not None:
+            checks.append(val >= float(r_lim))
+
+    elif condition == "muggy":
+        hi_lim = thr.get("HI_min")
+        if hi_lim is not None and (val := has("hi_max")) is not None:
+            checks.append(val >= float(hi_lim))
+        td_lim = thr.get("Td_min")
+        if td_lim is not None and (val := has("dewpoint_max")) is not None:
+            checks.append(val >= float(td_lim))
+
+    if not checks:
+        return False, False
+    return (any(checks) if logic == "ANY" else all(checks)), True
+
+
+@functools.lru_cache(maxsize=None)
+def _rows(seed: int, absent: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+    """Seeded rows, rounded to 2 decimals; ~15 % of values missing, ``absent`` fields never present.
+
+    Cached, so callers must not modify them.
+    """
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64("2000-01-01"), np.datetime64("2000-01-01") + N)
+    rows: List[Dict[str, Any]] = []
+    for day in days:
+        row: Dict[str, Any] = {"date": str(day)}
+        for name, (mean, spread) in FIELDS.items():
+            if name in absent or rng.random() < 0.15:
+                continue
+            row[name] = round(float(mean + spread * rng.standard_normal()), 2)
+        rows.append(row)
+    # Values exactly at a limit must count for >= and <= alike
+    for row in rows[:40]:
+        row.update(t2m_max=32.0, t2m_min=0.0, wind_speed_max=25.0, precip_daily=5.0)
+    return rows
+
+
+def _threshold_sets(condition: str) -> List[Dict[str, Optional[float]]]:
+    first, second = LIMITS[condition]
+    both = dict(LIMITS[condition])
+    return [both, {**both, second: None}, {**both, first: None}, {first: None, second: None}]
+
+
+def _reference(rows, condition, thresholds, logic) -> Tuple[np.ndarray, np.ndarray]:
+    pairs = [_evaluate_row(row, condition, thresholds, logic) for row in rows]
+    return np.array([p[0] for p in pairs], dtype=bool), np.array([p[1] for p in pairs], dtype=bool)
+
+
+CASES = [
+    (condition, logic, index)
+    for condition in CONDITION_CHECKS
+    for logic in ("ANY", "ALL")
+    for index in range(4)
+]
+
+
+@pytest.mark.parametrize("absent", [(), ("hi_max", "wind_gust_p95", "precip_rate_max")], ids=["all", "absent"])
+@pytest.mark.parametrize("condition,logic,index", CASES)
+def test_evaluate_matches_per_row(condition: str, logic: str, index: int, absent) -> None:
+    rows = _rows(9, absent)
+    thresholds = _threshold_sets(condition)[index]
+    exceed, considered = _reference(rows, condition, thresholds, logic)
+
+    evaluation = evaluate(Series.from_rows(rows), compile_checks(condition, thresholds), logic)
+
+    np.testing.assert_array_equal(evaluation.considered, considered)
+    np.testing.assert_array_equal(evaluation.exceed, exceed)
+    flags = evaluation.flags()
+    assert np.isnan(flags[~considered]).all()
+    np.testing.assert_array_equal(flags[considered], exceed[considered].astype(float))
+
+
+def test_no_applicable_check() -> None:
+    rows = [{"date": "2000-07-01"}, {"date": "2000-07-02", "t2m_min": -3.0}]
+    evaluation = evaluate(Series.from_rows(rows), compile_checks("hot", LIMITS["hot"]), "ALL")
+
+    assert evaluation.evaluated_days == 0 and evaluation.exceed_count == 0
+
+
+@pytest.mark.parametrize("condition", list(CONDITION_CHECKS))
+def test_count_batch_matches_per_row(condition: str) -> None:
+    rows = _rows(11, ("precip_rate_max",))
+    series = Series.from_rows(rows)
+    requests = [
+        (thresholds, logic)
+        for thresholds in _threshold_sets(condition)
+        for logic in ("ANY", "ALL")
+    ]
+    # Same keys, different limits: evaluated together in one broadcast
+    requests += [({key: limit + 1.5 for key, limit in LIMITS[condition].items()}, "ALL")]
+
+    counts, evaluated = count_batch(series, condition, [r[0] for r in requests], [r[1] for r in requests])
+
+    for idx, (thresholds, logic) in enumerate(requests):
+        exceed, considered = _reference(rows, condition, thresholds, logic)
+        assert (counts[idx], evaluated[idx]) == (exceed.sum(), considered.sum())
+
+
+@pytest.mark.parametrize("logic", ["ANY", "ALL"])
+@pytest.mark.parametrize("condition", ["hot", "cold"])
+def test_exceedance_curve_matches_per_row(condition: str, logic: str) -> None:
+    rows = _rows(13)
+    series = Series.from_rows(rows)
+    checks = compile_checks(condition, LIMITS[condition])
+    sweep = checks[0]
+    limits = np.round(np.linspace(-10.0, 45.0, 56), 1)
+
+    counts, evaluated = exceedance_curve(series, checks, sweep, logic, limits)
+
+    for limit, count in zip(limits, counts):
+        thresholds = {**LIMITS[condition], sweep.key: float(limit)}
+        exceed, considered = _reference(rows, condition, thresholds, logic)
+        assert count == exceed.sum(), limit
+        assert evaluated == considered.sum()
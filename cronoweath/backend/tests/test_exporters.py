@@ -0,0 +1,160 @@
+# backend/tests/test_exporters.py
+"""``/download`` exporters: CSV compatible with the former writer, gzip, JSON and the binary formats."""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app import exporters, mock_engine
+from cronoweath.backend.app.series import Series
+
+META = {"location": "19.4,-99.1", "condition": "hot", "thresholds": {"T_min": 32.0, "HI_min": None}}
+
+
+def _timeseries_to_csv(meta: Dict[str, Any], ts: Series) -> bytes:
+    """``utils.timeseries_to_csv`` as it was before the exporters replaced it."""
+    buffer = io.StringIO()
+    for key, value in meta.items():
+        buffer.write(f"# {key}: {value}\n")
+
+    headers = [
+        "date",
+        "t2m_max",
+        "hi_max",
+        "t2m_min",
+        "wc_min",
+        "wind_speed_max",
+        "wind_gust_p95",
+        "precip_daily",
+        "precip_rate_max",
+        "exceed",
+    ]
+
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    writer.writerows(ts.iter_records(headers[1:]))
+
+    return buffer.getvalue().encode("utf-8")
+
+
+def _series(extra: bool = False) -> Series:
+    """Mock series with gaps and an ``exceed`` flag; ``extra`` keeps and adds fields the old CSV did not have."""
+    mock = mock_engine.assemble_series(7, 15, years=6, window=10)
+    series = Series(mock.dates)
+    for name in mock.fields:
+        if extra or name in exporters.CSV_COLUMNS:
+            series.set(name, mock.values(name), present=mock.present[name])
+    rng = np.random.default_rng(16)
+    t2m_max = series.values("t2m_max").copy()
+    t2m_max[rng.random(len(series)) < 0.1] = np.nan
+    series.set("t2m_max", t2m_max, present="finite")
+    exceed = np.where(np.isnan(t2m_max), np.nan, (t2m_max >= 32.0).astype(float))
+    series = series.with_column("exceed", exceed, present="finite", flag=True)
+    if extra:
+        series.set("rh_max", np.round(rng.uniform(20.0, 90.0, len(series)), 2))
+        series.set("exceed_wet", (rng.random(len(series)) < 0.2).astype(float), flag=True)
+    return series
+
+
+def _join(chunks) -> bytes:
+    return b"".join(chunks)
+
+
+def test_csv_matches_former_writer() -> None:
+    series = _series()
+    expected = _timeseries_to_csv(META, series)
+
+    # Chunk boundaries must not show in the output
+    for chunk_rows in (1, 7, exporters.CHUNK_ROWS):
+        assert _join(exporters.iter_csv(META, series, chunk_rows=chunk_rows)) == expected
+
+
+def test_csv_appends_new_fields_after_the_former_columns() -> None:
+    series = _series(extra=True)
+    old = list(csv.reader(io.StringIO(_timeseries_to_csv(META, series).decode())))
+    new = list(csv.reader(io.StringIO(_join(exporters.iter_csv(META, series, chunk_rows=7)).decode())))
+
+    assert len(new) == len(old)
+    header = new[len(META)]
+    added = [name for name in series.fields if name not in exporters.CSV_COLUMNS]
+    assert "rh_max" in added and "exceed_wet" in added
+    assert header == [*old[len(META)], *added]
+    width = len(old[len(META)])
+    assert [row[:width] for row in new] == [row[:width] for row in old]
+
+
+def test_gzip_round_trip() -> None:
+    series = _series(extra=True)
+    plain = _join(exporters.iter_csv(META, series, chunk_rows=7))
+    chunks = list(exporters.gzip_chunks(exporters.iter_csv(META, series, chunk_rows=7)))
+
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == plain
+
+
+@pytest.mark.parametrize(
+    "header,accepted",
+    [(None, False), ("", False), ("gzip", True), ("br, gzip;q=0.5", True), ("gzip;q=0", False), ("*", True), ("identity", False)],
+)
+def test_accepts_gzip(header, accepted) -> None:
+    assert exporters.accepts_gzip(header) is accepted
+
+
+def test_json_and_ndjson_rows() -> None:
+    series = _series(extra=True)
+    rows = series.to_rows()
+
+    document = json.loads(_join(exporters.iter_json({"query_id": "q_1", "timeseries": None}, series, chunk_rows=7)))
+    assert document == {"query_id": "q_1", "timeseries": rows}
+    lines = _join(exporters.iter_ndjson({"query_id": "q_1"}, series, chunk_rows=7)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"query_id": "q_1"}, *rows]
+
+
+def _check_columns(table: Dict[str, list], series: Series) -> None:
+    assert list(table) == ["date", *exporters.binary_columns(series)]
+    assert table["date"] == [np.datetime64(day, "D").item() for day in series.date_strings()]
+    for name in exporters.binary_columns(series):
+        values = series.values(name)
+        expected = [None if np.isnan(v) else (v == 1.0 if name in series.flags else v) for v in values]
+        assert table[name] == expected, name
+
+
+def test_arrow_stream_round_trip() -> None:
+    pa = pytest.importorskip("pyarrow")
+    series = _series(extra=True)
+    data = _join(exporters.iter_arrow(META, series, chunk_rows=7))
+
+    reader = pa.ipc.open_stream(data)
+    table = reader.read_all()
+    _check_columns(table.to_pydict(), series)
+    assert {k.decode(): json.loads(v) for k, v in table.schema.metadata.items()} == META
+
+
+def test_parquet_round_trip() -> None:
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    series = _series(extra=True)
+    data = _join(exporters.iter_parquet(META, series, chunk_rows=7))
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == -(-len(series) // 7)
+    table = parquet.read()
+    _check_columns(table.to_pydict(), series)
+    assert json.loads(table.schema.metadata[b"thresholds"]) == META["thresholds"]
+
+
+def test_npz_round_trip() -> None:
+    series = _series(extra=True)
+    with np.load(io.BytesIO(exporters.npz_bytes(META, series))) as npz:
+        assert list(npz.files) == ["date", *exporters.binary_columns(series), "metadata"]
+        np.testing.assert_array_equal(npz["date"], series.dates)
+        for name in exporters.binary_columns(series):
+            np.testing.assert_array_equal(npz[name], series.values(name))
+        assert json.loads(str(npz["metadata"])) == META
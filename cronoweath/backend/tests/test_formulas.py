@@ -0,0 +1,104 @@
+# backend/tests/test_formulas.py
+"""The ``*_array`` formulas must equal the scalar ``compute_*`` ones value for value."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app.formulas import (
+    compute_dew_point,
+    compute_heat_index,
+    compute_wind_chill,
+    dew_point_array,
+    heat_index_array,
+    wind_chill_array,
+)
+
+N = 20_000
+
+
+def _scalar(fn, *inputs: np.ndarray) -> np.ndarray:
+    """Apply ``fn`` per element the way row assembly does: NaN in, ``None`` in; ``None`` out, NaN out."""
+    out = np.empty(inputs[0].shape)
+    for idx, args in enumerate(zip(*inputs)):
+        value = fn(*(None if np.isnan(a) else float(a) for a in args))
+        out[idx] = np.nan if value is None else value
+    return out
+
+
+def _with_nan(rng: np.random.Generator, values: np.ndarray, share: float = 0.05) -> np.ndarray:
+    values = values.copy()
+    values[rng.random(values.size) < share] = np.nan
+    return values
+
+
+def _mix(rng: np.random.Generator, *parts: np.ndarray) -> np.ndarray:
+    values = np.concatenate(parts)
+    return values[rng.permutation(values.size)]
+
+
+@pytest.fixture(params=[False, True], ids=["raw", "rounded"])
+def rounded(request) -> bool:
+    """Series columns reach the formulas rounded to 2 decimals; check both."""
+    return request.param
+
+
+def _prepare(values: np.ndarray, rounded: bool) -> np.ndarray:
+    return np.round(values, 2) if rounded else values
+
+
+def test_heat_index_matches_scalar(rounded: bool) -> None:
+    rng = np.random.default_rng(7)
+    k = N // 4
+    # Dry adjustment: 80-112 °F with RH < 13 %; humid adjustment: 80-87 °F with RH > 85 %
+    temp = _mix(
+        rng,
+        rng.uniform(-20.0, 50.0, k),
+        rng.uniform(26.0, 45.0, k),
+        rng.uniform(26.0, 31.0, k),
+        rng.uniform(26.0, 45.0, k),
+    )
+    rh = _mix(
+        rng,
+        rng.uniform(-5.0, 100.0, k),
+        rng.uniform(0.0, 14.0, k),
+        rng.uniform(84.0, 100.0, k),
+        rng.uniform(38.0, 42.0, k),
+    )
+    # Exact cutoffs: 80 °F, RH 40 %, RH 0 %, and the adjustment edges
+    temp[:8] = [(80.0 - 32.0) * 5.0 / 9.0, 26.67, 26.66, 44.44, 30.56, 30.55, 27.0, 27.0]
+    rh[:8] = [40.0, 40.0, 39.99, 12.99, 85.01, 85.0, 0.0, 13.0]
+    temp = _prepare(_with_nan(rng, temp), rounded)
+    rh = _prepare(_with_nan(rng, rh), rounded)
+
+    np.testing.assert_array_equal(heat_index_array(temp, rh), _scalar(compute_heat_index, temp, rh))
+
+
+def test_dew_point_matches_scalar(rounded: bool) -> None:
+    rng = np.random.default_rng(11)
+    temp = _prepare(_with_nan(rng, rng.uniform(-40.0, 50.0, N)), rounded)
+    rh = _mix(rng, rng.uniform(-5.0, 100.0, N - 4), np.array([0.0, -1.0, 1e-9, 100.0]))
+    rh = _prepare(_with_nan(rng, rh), rounded)
+
+    np.testing.assert_array_equal(dew_point_array(temp, rh), _scalar(compute_dew_point, temp, rh))
+
+
+def test_wind_chill_matches_scalar(rounded: bool) -> None:
+    rng = np.random.default_rng(13)
+    k = N // 2
+    temp = _mix(rng, rng.uniform(-40.0, 20.0, k), rng.uniform(9.0, 11.0, k))
+    wind = _mix(rng, rng.uniform(0.0, 90.0, k), rng.uniform(4.0, 5.5, k))
+    # Exact cutoffs: T = 10 °C and wind = 4.8 km/h
+    temp[:4] = [10.0, 10.01, 10.0, -5.0]
+    wind[:4] = [4.8, 4.8, 4.79, 0.0]
+    temp = _prepare(_with_nan(rng, temp), rounded)
+    wind = _prepare(_with_nan(rng, wind), rounded)
+
+    np.testing.assert_array_equal(wind_chill_array(temp, wind), _scalar(compute_wind_chill, temp, wind))
+
+
+def test_missing_inputs_give_nan() -> None:
+    nan = np.nan
+    assert np.isnan(heat_index_array([nan, 30.0, 30.0], [50.0, nan, 0.0])).all()
+    assert np.isnan(dew_point_array([nan, 20.0, 20.0], [50.0, nan, -3.0])).all()
+    assert np.isnan(wind_chill_array([nan, -5.0], [20.0, nan])).all()
@@ -0,0 +1,139 @@
+# backend/tests/test_hybrid.py
+"""Hybrid hedging: per-source pools, loser cancellation, no hedging onto a saturated source."""
+from __future__ import annotations
+
+import threading
+import time
+import types
+from typing import List
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app import engines, hybrid_engine, progress
+from cronoweath.backend.app.engines import Engine
+from cronoweath.backend.app.series import Series
+
+
+class FakeSource:
+    """Engine module whose fetch takes ``steps`` steps of ``step_s`` seconds, checking for cancellation."""
+
+    def __init__(self, name: str, steps: int, step_s: float = 0.01) -> None:
+        self.name = name
+        self.steps = steps
+        self.step_s = step_s
+        self.started = 0
+        self.cancelled = 0
+        self.finished = 0
+        self.release = threading.Event()
+        self.blocking = False
+
+    def assemble_series_real(self, lat, lon, target_month, target_day, years=20, window=15, condition=None):
+        self.started += 1
+        try:
+            for _ in range(self.steps):
+                if self.blocking:
+                    self.release.wait()
+                time.sleep(self.step_s)
+                progress.check_cancelled()
+        except progress.FetchCancelled:
+            self.cancelled += 1
+            raise
+        self.finished += 1
+        series = Series(np.arange(np.datetime64("2020-07-01"), np.datetime64("2020-07-04")))
+        series.set("t2m_max", np.array([30.0, 31.0, 32.0]))
+        return series
+
+    def engine(self) -> Engine:
+        engine = Engine(self.name, f".{self.name}", {}, remote=True)
+        module = types.ModuleType(self.name)
+        module.assemble_series_real = self.assemble_series_real
+        engine._module = module
+        return engine
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    created: List[FakeSource] = []
+
+    def _install(*fakes: FakeSource, workers: int = 2) -> None:
+        for fake in fakes:
+            monkeypatch.setitem(engines.ENGINES, fake.name, fake.engine())
+            created.append(fake)
+        monkeypatch.setenv("HYBRID_ENGINES", ",".join(fake.name for fake in fakes))
+        monkeypatch.setattr(hybrid_engine, "WORKERS", workers)
+        monkeypatch.setattr(hybrid_engine, "_POOLS", {})
+
+    yield _install
+    for fake in created:
+        fake.release.set()
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+def _fetch() -> Series:
+    return hybrid_engine.assemble_series_real(19.4, -99.1, 7, 15, years=2)
+
+
+def test_fast_primary_wins_without_hedging(sources, monkeypatch) -> None:
+    primary, backup = FakeSource("fake_a", steps=2), FakeSource("fake_b", steps=2)
+    sources(primary, backup)
+    monkeypatch.setattr(hybrid_engine, "HEDGE_AFTER_S", 1.0)
+
+    assert _fetch().source == "fake_a"
+    assert backup.started == 0
+
+
+def test_losing_source_is_cancelled(sources, monkeypatch) -> None:
+    slow, fast = FakeSource("fake_slow", steps=500), FakeSource("fake_fast", steps=2)
+    sources(slow, fast)
+    monkeypatch.setattr(hybrid_engine, "HEDGE_AFTER_S", 0.05)
+
+    assert _fetch().source == "fake_fast"
+    _wait_for(lambda: slow.cancelled == 1)
+    assert slow.finished == 0
+    _wait_for(lambda: hybrid_engine._pool("fake_slow").in_flight == 0)
+
+
+def test_no_hedging_onto_a_saturated_source(sources, monkeypatch) -> None:
+    primary, backup = FakeSource("fake_primary", steps=20), FakeSource("fake_backup", steps=1)
+    sources(primary, backup, workers=1)
+    monkeypatch.setattr(hybrid_engine, "HEDGE_AFTER_S", 0.02)
+    # Occupy the backup's only thread with a fetch that does not return
+    backup.blocking = True
+    stuck = hybrid_engine._pool("fake_backup").submit(backup.assemble_series_real, 0.0, 0.0, 7, 15)
+    _wait_for(lambda: backup.started == 1)
+
+    assert _fetch().source == "fake_primary"
+    assert backup.started == 1
+
+    # Nothing was queued behind the stuck fetch either
+    backup.release.set()
+    stuck.result(timeout=5)
+    time.sleep(0.1)
+    assert backup.started == 1
+
+
+def test_read_granules_stops_when_cancelled() -> None:
+    from cronoweath.backend.app import nasa_engine
+
+    reads: List[str] = []
+    stop = threading.Event()
+
+    def _read(url: str, deadline: float) -> str:
+        reads.append(url)
+        if len(reads) == 3:
+            stop.set()
+        time.sleep(0.02)
+        return url
+
+    urls = [f"https://example.invalid/G{i:03d}.nc4" for i in range(200)]
+    with progress.cancellable(stop), pytest.raises(progress.FetchCancelled):
+        nasa_engine._read_granules(urls, _read, concurrency=2)
+    time.sleep(0.1)
+    assert len(reads) < 10
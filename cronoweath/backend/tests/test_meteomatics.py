@@ -0,0 +1,209 @@
+# backend/tests/test_meteomatics.py
+"""Meteomatics fetches against ``httpx.MockTransport``: chunking, retries, auth."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import pytest
+
+from cronoweath.backend.app import meteomatics_engine as mm
+
+WINDOWS = [(f"{year}-07-10", f"{year}-07-20") for year in range(2008, 2020)]
+
+
+def _days(periods: str) -> List[date]:
+    days = []
+    for period in periods.split(","):
+        start, end = period.split(":PT24H")[0].split("--")
+        day, last = date.fromisoformat(start[:10]), date.fromisoformat(end[:10])
+        while day <= last:
+            days.append(day)
+            day += timedelta(days=1)
+    return days
+
+
+def _value(parameter: str, day: date) -> float:
+    return round((day.toordinal() * 7 + len(parameter)) % 400 / 10.0, 1)
+
+
+def _payload(request: httpx.Request) -> httpx.Response:
+    periods, parameters, _, _ = request.url.path.strip("/").split("/")
+    days = _days(periods)
+    data = [
+        {
+            "parameter": parameter,
+            "coordinates": [
+                {"dates": [{"date": f"{day}T00:00:00Z", "value": _value(parameter, day)} for day in days]}
+            ],
+        }
+        for parameter in parameters.split(",")
+    ]
+    return httpx.Response(200, json={"status": "OK", "data": data})
+
+
+class Server:
+    """Replies from ``script`` (one entry per request, then successes) and records requests."""
+
+    def __init__(self, script: Optional[List[Callable[[httpx.Request], httpx.Response]]] = None) -> None:
+        self.script = list(script or [])
+        self.requests: List[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.script:
+            return self.script.pop(0)(request)
+        return _payload(request)
+
+
+def _status(code: int, headers: Optional[Dict[str, str]] = None) -> Callable[[httpx.Request], httpx.Response]:
+    return lambda request: httpx.Response(code, text="busy", headers=headers)
+
+
+def _disconnect(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    monkeypatch.setenv("METEOMATICS_USERNAME", "user")
+    monkeypatch.setenv("METEOMATICS_PASSWORD", "secret")
+    monkeypatch.setattr(mm, "CHUNK_WINDOWS", 5)
+    monkeypatch.setattr(mm, "RETRIES", 3)
+    monkeypatch.setattr(mm, "BACKOFF_S", 0.01)
+    monkeypatch.setattr(mm, "MAX_BACKOFF_S", 2.0)
+    monkeypatch.setattr(mm, "TOTAL_S", 30.0)
+    delays: List[float] = []
+    monkeypatch.setattr(mm.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def serve(monkeypatch, sleeps):
+    def _serve(server: Server) -> Server:
+        monkeypatch.setattr(mm, "_CLIENT", httpx.Client(transport=httpx.MockTransport(server)))
+        return server
+
+    yield _serve
+    client = mm._CLIENT
+    if client is not None:
+        client.close()
+
+
+def test_windows_split_into_chunks(serve) -> None:
+    server = serve(Server())
+    series = mm.fetch_daily_series(19.43, -99.13, WINDOWS)
+
+    periods = [request.url.path.strip("/").split("/")[0].count("PT24H") for request in server.requests]
+    assert sorted(periods) == [2, 5, 5]
+    expected = [day for start, end in WINDOWS for day in _days(f"{start}--{end}:PT24H")]
+    assert series.date_strings() == [day.isoformat() for day in expected]
+    assert series.values("t2m_max").tolist() == [_value("t_max_2m_24h:C", day) for day in expected]
+    assert np.isfinite(series.values("hi_max")).all()
+
+
+@pytest.mark.parametrize("code", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(serve, sleeps, code) -> None:
+    server = serve(Server([_status(code), _status(code)]))
+    series = mm.fetch_daily_series(19.43, -99.13, WINDOWS[:2])
+
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2 and all(0 < delay <= mm.MAX_BACKOFF_S for delay in sleeps)
+    assert len(series) == 22
+
+
+def test_retry_after_is_capped(serve, sleeps) -> None:
+    server = serve(Server([_status(429, {"Retry-After": "3600"}), _status(429, {"Retry-After": "1"})]))
+    mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+    assert len(server.requests) == 3
+    assert sleeps == [mm.MAX_BACKOFF_S, 1.0]
+
+
+def test_retries_exhausted(serve, sleeps) -> None:
+    server = serve(Server([_status(503)] * 10))
+    with pytest.raises(RuntimeError, match=r"\(503\)"):
+        mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+    assert len(server.requests) == mm.RETRIES + 1
+    assert len(sleeps) == mm.RETRIES
+
+
+def test_no_retry_past_the_budget(serve, sleeps, monkeypatch) -> None:
+    monkeypatch.setattr(mm, "TOTAL_S", 1.5)
+    server = serve(Server([_status(429, {"Retry-After": "2"})]))
+    with pytest.raises(RuntimeError, match=r"\(429\)"):
+        mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+    assert len(server.requests) == 1
+    assert sleeps == []
+
+
+def test_transport_error_is_retried(serve, sleeps) -> None:
+    server = serve(Server([_disconnect]))
+    series = mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+    assert len(server.requests) == 2
+    assert len(sleeps) == 1
+    assert len(series) == 11
+
+
+def test_unauthorized_is_not_retried(serve, sleeps) -> None:
+    server = serve(Server([_status(401)]))
+    with pytest.raises(mm.MeteomaticsAuthError):
+        mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+    assert len(server.requests) == 1
+    assert sleeps == []
+    assert server.requests[0].headers["Authorization"].startswith("Basic ")
+
+
+def test_missing_credentials(monkeypatch) -> None:
+    monkeypatch.delenv("METEOMATICS_USERNAME", raising=False)
+    with pytest.raises(mm.MeteomaticsAuthError):
+        mm.fetch_daily_series(19.43, -99.13, WINDOWS[:1])
+
+
+def test_async_fetch_retries_and_matches_sync(serve, monkeypatch) -> None:
+    serve(Server())
+    reference = mm.fetch_daily_series(19.43, -99.13, WINDOWS)
+    server = Server([_status(500), _status(429, {"Retry-After": "60"})])
+    delays: List[float] = []
+
+    async def _sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(mm.asyncio, "sleep", _sleep)
+
+    async def _fetch():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+            monkeypatch.setattr(mm, "get_async_client", lambda: client)
+            return await mm.fetch_daily_series_async(19.43, -99.13, WINDOWS)
+
+    series = asyncio.run(_fetch())
+
+    assert len(server.requests) == 3 + 2
+    assert len(delays) == 2 and max(delays) == mm.MAX_BACKOFF_S
+    assert series.to_rows() == reference.to_rows()
+
+
+def test_streamed_parse_matches_whole_body(serve, monkeypatch) -> None:
+    pytest.importorskip("ijson")
+    serve(Server())
+    monkeypatch.setattr(mm, "STREAM_MIN_DAYS", 10**9)
+    whole = mm.fetch_daily_series(19.43, -99.13, WINDOWS)
+    monkeypatch.setattr(mm, "STREAM_MIN_DAYS", 0)
+    streamed = mm.fetch_daily_series(19.43, -99.13, WINDOWS)
+
+    assert streamed.to_rows() == whole.to_rows()
+
+
+def test_only_large_bodies_are_streamed(monkeypatch) -> None:
+    pytest.importorskip("ijson")
+    monkeypatch.setattr(mm, "STREAM_MIN_DAYS", 1500)
+
+    assert not mm._streamed(WINDOWS[:5])
+    assert mm._streamed([("2000-01-01", "2019-12-31")])
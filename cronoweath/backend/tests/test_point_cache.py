@@ -0,0 +1,54 @@
+# backend/tests/test_point_cache.py
+"""Point cache: values and per-field flags round-trip, concurrent writers from several processes."""
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from cronoweath.backend.app import point_cache
+from cronoweath.backend.app.point_cache import DATASET_FIELDS, PointCache, window_days
+
+CELL = (218, 129)
+DAYS = window_days([("2019-07-01", "2019-08-09")])
+
+
+def test_partial_fields_round_trip(tmp_path: Path) -> None:
+    cache = PointCache(tmp_path, 1 << 30)
+    values = {"t2m_max": np.linspace(20.0, 30.0, DAYS.size), "rh_max": np.full(DAYS.size, np.nan)}
+    fetched = {"t2m_max": np.ones(DAYS.size, dtype=bool), "rh_max": DAYS < np.datetime64("2019-07-10")}
+    cache.write("merra2", CELL, DAYS, values, fetched)
+
+    got, flags = cache.read("merra2", CELL, DAYS)
+    np.testing.assert_array_equal(got["t2m_max"], values["t2m_max"])
+    assert flags["t2m_max"].all()
+    np.testing.assert_array_equal(flags["rh_max"], fetched["rh_max"])
+    assert np.isnan(got["rh_max"]).all()
+    assert not flags["t2m_min"].any()
+
+
+def _fill(root: str, field: str) -> None:
+    # A fresh cache object per process, as each uvicorn worker has its own
+    cache = PointCache(Path(root), 1 << 30)
+    for index in range(DAYS.size):
+        mask = np.zeros(DAYS.size, dtype=bool)
+        mask[index] = True
+        cache.write("merra2", CELL, DAYS, {field: np.full(DAYS.size, float(index))}, {field: mask})
+
+
+@pytest.mark.skipif(point_cache.fcntl is None, reason="needs fcntl")
+def test_concurrent_processes_keep_each_others_fields(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fill, args=(str(tmp_path), name)) for name in DATASET_FIELDS["merra2"]]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    values, fetched = PointCache(tmp_path, 1 << 30).read("merra2", CELL, DAYS)
+    for name in DATASET_FIELDS["merra2"]:
+        assert fetched[name].all(), name
+        np.testing.assert_array_equal(values[name], np.arange(DAYS.size, dtype=float))
@@ -0,0 +1,81 @@
+# backend/tests/test_seasonal_windows.py
+"""``seasonal_windows``: per-year windows at year boundaries, on 02-29 and when they overlap."""
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+from typing import List, Set, Tuple
+
+import pytest
+
+from cronoweath.backend.app.utils import seasonal_windows
+
+
+def _reference_days(month: int, day: int, years: int, window: int, end_year: int) -> Set[date]:
+    """Every day within ``window`` of the target in each year, the target clamped to the month's end."""
+    days: Set[date] = set()
+    for year in range(end_year - years + 1, end_year + 1):
+        center = date(year, month, min(day, calendar.monthrange(year, month)[1]))
+        days.update(center + timedelta(days=offset) for offset in range(-window, window + 1))
+    return days
+
+
+def _days(windows: List[Tuple[str, str]]) -> List[date]:
+    days: List[date] = []
+    for start, end in windows:
+        day, last = date.fromisoformat(start), date.fromisoformat(end)
+        assert day <= last
+        while day <= last:
+            days.append(day)
+            day += timedelta(days=1)
+    return days
+
+
+@pytest.mark.parametrize(
+    "month, day, years, window",
+    [
+        (7, 15, 20, 15),
+        (1, 5, 10, 15),  # starts in the previous December
+        (12, 28, 10, 15),  # ends in the next January
+        (1, 1, 5, 0),
+        (2, 29, 12, 7),  # clamped to 02-28 outside leap years
+        (4, 31, 3, 2),  # no 04-31 in any year
+        (12, 31, 6, 183),  # every window touches the next one: one span
+        (3, 1, 8, 200),  # overlapping windows
+    ],
+)
+def test_windows_cover_exactly_the_seasonal_days(month, day, years, window) -> None:
+    windows = seasonal_windows(month, day, years, window, end_year=2023)
+    days = _days(windows)
+
+    assert len(days) == len(set(days)), "a day is fetched twice"
+    assert days == sorted(days)
+    assert set(days) == _reference_days(month, day, years, window, 2023)
+
+
+def test_separate_windows_per_year() -> None:
+    windows = seasonal_windows(1, 5, 3, 15, end_year=2023)
+    assert windows == [
+        ("2020-12-21", "2021-01-20"),
+        ("2021-12-21", "2022-01-20"),
+        ("2022-12-21", "2023-01-20"),
+    ]
+
+
+def test_february_29() -> None:
+    windows = seasonal_windows(2, 29, 4, 0, end_year=2024)
+    assert windows == [
+        ("2021-02-28", "2021-02-28"),
+        ("2022-02-28", "2022-02-28"),
+        ("2023-02-28", "2023-02-28"),
+        ("2024-02-29", "2024-02-29"),
+    ]
+
+
+def test_overlapping_windows_are_merged() -> None:
+    assert seasonal_windows(6, 30, 3, 183, end_year=2023) == [("2020-12-29", "2023-12-30")]
+
+
+def test_default_end_year_is_last_year() -> None:
+    last = date.today().year - 1
+    assert seasonal_windows(7, 15, 1, 0) == [(f"{last}-07-15", f"{last}-07-15")]
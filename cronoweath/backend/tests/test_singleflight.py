@@ -0,0 +1,136 @@
+# backend/tests/test_singleflight.py
+"""Single-flight coalescing: shared results and errors, leader-local failures retried by followers."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from cronoweath.backend.app.jobs import JobCancelled
+from cronoweath.backend.app.singleflight import SingleFlight
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.005)
+
+
+class Fetch:
+    """``fn`` for ``do``: the first call blocks until released, then fails with ``first_error``.
+
+    Later calls take long enough for every retrying follower to join them.
+    """
+
+    def __init__(self, first_error: BaseException | None = None) -> None:
+        self.first_error = first_error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self) -> str:
+        self.calls += 1
+        call = self.calls
+        if call == 1:
+            self.release.wait(5)
+            if self.first_error is not None:
+                raise self.first_error
+        else:
+            time.sleep(0.2)
+        return f"result {call}"
+
+
+def test_concurrent_callers_share_one_call() -> None:
+    flight, fetch = SingleFlight(), Fetch()
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "k", fetch) for _ in range(4)]
+        _wait_for(lambda: fetch.calls == 1)
+        time.sleep(0.05)
+        fetch.release.set()
+        results = [future.result() for future in futures]
+
+    assert fetch.calls == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"result 1"}
+    assert flight.in_flight() == 0
+
+
+def test_fetch_errors_are_shared() -> None:
+    flight, fetch = SingleFlight(leader_local=(JobCancelled,)), Fetch(RuntimeError("upstream 503"))
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flight.do, "k", fetch) for _ in range(3)]
+        _wait_for(lambda: fetch.calls == 1)
+        time.sleep(0.05)
+        fetch.release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="upstream 503"):
+                future.result()
+    assert fetch.calls == 1
+
+
+def test_followers_retry_when_the_leader_is_cancelled() -> None:
+    flight, fetch = SingleFlight(leader_local=(JobCancelled,)), Fetch(JobCancelled("job q_1 cancelled"))
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flight.do, "k", fetch)
+        _wait_for(lambda: fetch.calls == 1)
+        followers = [pool.submit(flight.do, "k", fetch) for _ in range(3)]
+        time.sleep(0.05)
+        fetch.release.set()
+
+        with pytest.raises(JobCancelled):
+            leader.result()
+        results = [future.result(timeout=5) for future in followers]
+
+    # One follower fetched again as the new leader; the others shared its call
+    assert fetch.calls == 2
+    assert {result for result, _ in results} == {"result 2"}
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert flight.in_flight() == 0
+
+
+def test_async_followers_retry_when_the_leader_task_is_cancelled() -> None:
+    flight = SingleFlight()
+    calls: List[int] = []
+
+    async def _fetch() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.2 if len(calls) == 1 else 0)
+        return f"result {len(calls)}"
+
+    async def _run():
+        leader = asyncio.create_task(flight.do_async("k", _fetch))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flight.do_async("k", _fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(_run())
+    assert len(calls) == 2
+    assert {result for result, _ in results} == {"result 2"}
+
+
+def test_cancelled_async_follower_leaves_the_call_running() -> None:
+    flight = SingleFlight()
+
+    async def _fetch() -> str:
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def _run():
+        leader = asyncio.create_task(flight.do_async("k", _fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do_async("k", _fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(_run()) == ("result", False)
@@ -0,0 +1,36 @@
+# backend/tests/test_startup_imports.py
+"""Importing the app must not load the heavy data stacks; engines load them on first use."""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[3]
+
+HEAVY = ("xarray", "earthaccess", "pydap", "httpx", "pyarrow", "netCDF4", "pandas")
+
+_PROBE = (
+    "import json, sys\n"
+    "import cronoweath.backend.app.main\n"
+    f"print(json.dumps(sorted(name for name in {HEAVY!r} if name in sys.modules)))\n"
+)
+
+
+@pytest.mark.parametrize("engine", ["nasa", "meteomatics", "hybrid"])
+def test_app_import_skips_heavy_modules(engine: str) -> None:
+    env = {**os.environ, "CRONOWEATH_ENGINE": engine, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []